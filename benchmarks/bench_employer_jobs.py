@@ -0,0 +1,109 @@
+# pylint: disable = print-used
+"""
+Reads all the jobs of an employer from the in-memory DynamoDB stand-in (tests/helpers/fake_dynamodb.py), through the
+real boto3 resource, the two ways the project does it:
+
+- scan: a filtered Scan of the jobs table, page by page (get_employer_jobs)
+- index_query: a Query of the employer id index (second-index), page by page (update_employer_summary)
+
+Each is timed, with its pages, scanned items and simulated read capacity units, no network needed.
+
+    python benchmarks/bench_employer_jobs.py --sizes 1000 10000 100000 --output benchmarks/employer_jobs.json
+"""
+import sys
+import os
+sys.path.append(os.getcwd())
+import argparse
+import json
+import platform
+import time
+from datetime import datetime
+from typing import Dict, List
+
+import boto3
+from boto3.dynamodb.conditions import Attr, Key
+
+from benchmarks.synthetic_corpus import SyntheticCorpus
+from service.lambdas.employer.constants import EmployerConstants
+from tests.helpers.fake_dynamodb import FakeDynamoDB
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+JOBS_PER_EMPLOYER = 20
+JOBS_TABLE_NAME = 'jobs'
+
+
+def _read_all(table, **kwargs) -> Dict:
+    pages, scanned, items = 0, 0, 0
+    while True:
+        response = table.scan(**kwargs) if 'KeyConditionExpression' not in kwargs else table.query(**kwargs)
+        pages += 1
+        scanned += response['ScannedCount']
+        items += response['Count']
+        if 'LastEvaluatedKey' not in response:
+            return {'pages': pages, 'scanned_items': scanned, 'items': items}
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def _bench_size(corpus: SyntheticCorpus, size: int, repeats: int) -> List[Dict]:
+    fake_dynamodb = FakeDynamoDB()
+    fake_table = fake_dynamodb.create_table(JOBS_TABLE_NAME, 'job_id', indexes={
+        EmployerConstants.JOBS_EMPLOYER_INDEX_NAME: ('employer_id', None)})
+    for index in range(size):
+        fake_dynamodb.put(JOBS_TABLE_NAME, dict(corpus.job(index),
+                                                employer_id=f"employer-{index // JOBS_PER_EMPLOYER}"))
+    table = fake_dynamodb.resource().Table(JOBS_TABLE_NAME)
+    employer_id = f"employer-{size // JOBS_PER_EMPLOYER // 2}"
+
+    readers = {
+        'scan': lambda: _read_all(table, FilterExpression=Attr('employer_id').eq(employer_id)),
+        'index_query': lambda: _read_all(table, IndexName=EmployerConstants.JOBS_EMPLOYER_INDEX_NAME,
+                                         KeyConditionExpression=Key('employer_id').eq(employer_id)),
+    }
+    results = []
+    for reader_name, reader in readers.items():
+        best = float('inf')
+        for _ in range(repeats):
+            read_units = fake_table.read_units
+            start = time.perf_counter()
+            stats = reader()
+            best = min(best, time.perf_counter() - start)
+            stats['read_units'] = fake_table.read_units - read_units
+        results.append(dict(stats, benchmark='employer_jobs', reader=reader_name, size=size, seconds=best))
+    return results
+
+
+def run(sizes: List[int], repeats: int, seed: int) -> Dict:
+    corpus = SyntheticCorpus(seed)
+    results = []
+    for size in sizes:
+        results.extend(_bench_size(corpus, size, repeats))
+    return {
+        'environment': {
+            'python': platform.python_version(),
+            'boto3': boto3.__version__,
+            'machine': platform.machine(),
+            'created': datetime.utcnow().isoformat(timespec='seconds') + 'Z'
+        },
+        'config': {'sizes': sizes, 'repeats': repeats, 'seed': seed, 'jobs_per_employer': JOBS_PER_EMPLOYER},
+        'results': results
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--repeats', type=int, default=3, help="each read is timed this many times, best is kept")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', default=os.path.join('benchmarks', 'employer_jobs.json'))
+    args = parser.parse_args()
+
+    report = run(args.sizes, args.repeats, args.seed)
+    with open(args.output, 'w', encoding='utf-8') as output_file:
+        json.dump(report, output_file, indent=2)
+    for result in report['results']:
+        print(f"{result['reader']:>12} size={result['size']:>7} {result['seconds'] * 1000:10.1f} ms "
+              f"pages={result['pages']} scanned={result['scanned_items']} read_units={result['read_units']}")
+
+
+if __name__ == "__main__":
+    main()
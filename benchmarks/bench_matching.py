@@ -0,0 +1,149 @@
+# pylint: disable = print-used
+"""
+Times the stages of the two matchers on synthetic corpora (see synthetic_corpus.py), each stage in isolation:
+
+- get_jobs: scoring and top-k selection over the packed jobs corpus (python loop and numpy kernels), then the
+  serialization of the winners into the search response
+- find_best_match_answers: scoring of the answers records, top-k collection and serialization of the results
+
+    python benchmarks/bench_matching.py --sizes 1000 10000 100000 1000000 --output benchmarks/results.json
+    python benchmarks/check_regression.py benchmarks/baseline.json benchmarks/results.json
+"""
+import sys
+import os
+sys.path.append(os.getcwd())
+import argparse
+import json
+import platform
+import random
+import time
+from datetime import datetime
+from typing import Callable, Dict, List
+
+from benchmarks.synthetic_corpus import SyntheticCorpus
+from service.common.utils import DecimalEncoder
+from service.dao.job_seeker_answers_repository import SearchResult
+from service.matching import AnswerVector, AnswersMatrix, TopKCollector, build_answers_matrix, numpy, \
+    pack_answers, pack_seeker_answers, score
+from service.models.employer.employer_job import EmployerJob, JobSearchResult
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+MAX_RESULTS = 100
+# the corpora are generated and scored chunk by chunk, to bound the memory of the larger sizes
+CHUNK_SIZE = 100_000
+
+
+def _best_of(repeats: int, func: Callable[[], object]) -> float:
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _bench_get_jobs(corpus: SyntheticCorpus, query: AnswerVector, size: int, repeats: int) -> List[Dict]:
+    job_answers: List[AnswerVector] = [vector for chunk in corpus.iter_job_answers(size, CHUNK_SIZE)
+                                       for vector in chunk]
+    results = []
+
+    def _loop_top_k(scores: List[int]):
+        collector = TopKCollector(MAX_RESULTS)
+        for index, item_score in enumerate(scores):
+            collector.add(item_score, index)
+        return collector.results()
+
+    loop_scores = [score(query, candidate) for candidate in job_answers]
+    results.append(('loop', 'scoring', _best_of(repeats, lambda: [score(query, candidate)
+                                                                    for candidate in job_answers])))
+    results.append(('loop', 'top_k', _best_of(repeats, lambda: _loop_top_k(loop_scores))))
+    winners = _loop_top_k(loop_scores)
+
+    matrix = build_answers_matrix(job_answers)
+    if matrix is not None:
+        matrix_scores = matrix.scores(query)
+        results.append(('numpy', 'scoring', _best_of(repeats, lambda: matrix.scores(query))))
+        results.append(('numpy', 'top_k', _best_of(repeats, lambda: AnswersMatrix.top_k_of_scores(matrix_scores,
+                                                                                                 MAX_RESULTS))))
+
+    # the full records of the winners, as read by the batch get
+    winner_items = [corpus.job(index) for _, index in winners]
+
+    def _serialize():
+        search_results = [JobSearchResult(score=item_score, employer_job=EmployerJob.parse_obj(item))
+                          for (item_score, _), item in zip(winners, winner_items)]
+        return json.dumps([search_result.dict() for search_result in search_results], cls=DecimalEncoder)
+
+    results.append(('python', 'serialization', _best_of(repeats, _serialize)))
+    return [{'benchmark': 'get_jobs', 'kernel': kernel, 'size': size, 'stage': stage, 'seconds': seconds}
+            for kernel, stage, seconds in results]
+
+
+def _bench_find_best_match_answers(corpus: SyntheticCorpus, query: AnswerVector, size: int,
+                                   repeats: int) -> List[Dict]:
+    stage_seconds = {'scoring': 0.0, 'top_k': 0.0}
+    collector = TopKCollector(MAX_RESULTS)
+    for chunk in corpus.iter_seeker_items(size, CHUNK_SIZE):
+        stage_seconds['scoring'] += _best_of(repeats, lambda: [score(query, pack_seeker_answers(item))
+                                                               for item in chunk])
+        scores = [score(query, pack_seeker_answers(item)) for item in chunk]
+
+        def _collect(target: TopKCollector):
+            for item_score, item in zip(scores, chunk):
+                target.add(item_score, item)
+
+        stage_seconds['top_k'] += _best_of(repeats, lambda: _collect(TopKCollector(MAX_RESULTS)))
+        _collect(collector)
+
+    def _serialize():
+        search_results = [SearchResult(score=item_score, job_seeker_id=item.get('job_seeker_id'),
+                                       job_seeker_name=item.get('job_seeker_name'))
+                          for item_score, item in collector.results()]
+        return json.dumps([search_result.dict() for search_result in search_results])
+
+    stage_seconds['serialization'] = _best_of(repeats, _serialize)
+    return [{'benchmark': 'find_best_match_answers', 'kernel': 'python', 'size': size, 'stage': stage,
+             'seconds': seconds} for stage, seconds in stage_seconds.items()]
+
+
+def run(sizes: List[int], repeats: int, seed: int) -> Dict:
+    corpus = SyntheticCorpus(seed)
+    query = pack_answers(corpus.random_answers(random.Random(seed + 2)))
+    results = []
+    for size in sizes:
+        results.extend(_bench_get_jobs(corpus, query, size, repeats))
+        results.extend(_bench_find_best_match_answers(corpus, query, size, repeats))
+
+    return {
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': numpy.__version__ if numpy is not None else None,
+            'machine': platform.machine(),
+            'created': datetime.utcnow().isoformat(timespec='seconds') + 'Z'
+        },
+        'config': {'sizes': sizes, 'repeats': repeats, 'seed': seed, 'max_results': MAX_RESULTS},
+        'results': results
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--repeats', type=int, default=3, help="each stage is timed this many times, best is kept")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', default=os.path.join('benchmarks', 'results.json'))
+    args = parser.parse_args()
+
+    report = run(args.sizes, args.repeats, args.seed)
+    with open(args.output, 'w', encoding='utf-8') as output_file:
+        json.dump(report, output_file, indent=2)
+
+    print(f"{'benchmark':<24} {'kernel':<7} {'size':>9} {'stage':<14} {'ms':>10}")
+    for result in report['results']:
+        print(f"{result['benchmark']:<24} {result['kernel']:<7} {result['size']:>9} {result['stage']:<14} "
+              f"{result['seconds'] * 1000:>10.2f}")
+    print(f"results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+# pylint: disable = print-used
+"""
+Loop vs vectorized (numpy) scoring of a packed jobs corpus, at 10k, 100k and 1M jobs.
+
+    python benchmarks/bench_vectorized_scoring.py
+"""
+import sys
+import os
+sys.path.append(os.getcwd())
+import random
+
+from benchmarks.bench_matching import _best_of
+from service.matching import AnswerVector, FULL_MASK, NUM_OF_ANSWERS, build_answers_matrix, top_k
+
+SIZES = [10_000, 100_000, 1_000_000]
+MAX_RESULTS = 100
+REPEATS = 3
+
+
+def main():
+    rnd = random.Random(1)
+    query = AnswerVector(bits=rnd.getrandbits(NUM_OF_ANSWERS), answered=FULL_MASK)
+    print(f"{'jobs':>10} {'loop ms':>10} {'numpy ms':>10} {'speedup':>8}")
+    for size in SIZES:
+        corpus = [AnswerVector(bits=rnd.getrandbits(NUM_OF_ANSWERS), answered=FULL_MASK) for _ in range(size)]
+        matrix = build_answers_matrix(corpus)
+        if matrix is None:
+            print("numpy is not installed")
+            return
+
+        assert top_k(query, corpus, MAX_RESULTS) == top_k(query, corpus, MAX_RESULTS, matrix)
+        loop_seconds = _best_of(REPEATS, lambda: top_k(query, corpus, MAX_RESULTS))
+        numpy_seconds = _best_of(REPEATS, lambda: top_k(query, corpus, MAX_RESULTS, matrix))
+        print(f"{size:>10} {loop_seconds * 1000:>10.1f} {numpy_seconds * 1000:>10.1f} "
+              f"{loop_seconds / numpy_seconds:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
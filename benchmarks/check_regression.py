@@ -0,0 +1,60 @@
+# pylint: disable = print-used
+"""
+Compares a bench_matching.py results file with a stored baseline, and fails (exit code 1) when a stage got slower
+than the tolerance allows.
+
+    python benchmarks/check_regression.py benchmarks/baseline.json benchmarks/results.json --tolerance 0.25
+
+Stages faster than --min-ms in both runs are not compared, their timings are mostly noise. The baseline is only
+meaningful on the machine that produced it, regenerate it with bench_matching.py --output benchmarks/baseline.json
+"""
+import argparse
+import json
+import sys
+from typing import Dict, List, Tuple
+
+Key = Tuple[str, str, int, str]
+
+
+def _load(path: str) -> Dict[Key, float]:
+    with open(path, encoding='utf-8') as results_file:
+        report = json.load(results_file)
+    return {(result['benchmark'], result['kernel'], result['size'], result['stage']): result['seconds']
+            for result in report['results']}
+
+
+def find_regressions(baseline: Dict[Key, float], current: Dict[Key, float], tolerance: float,
+                     min_ms: float) -> List[Tuple[Key, float, float]]:
+    """
+    :return: (key, baseline seconds, current seconds) of the stages slower than baseline * (1 + tolerance)
+    """
+    return [(key, baseline[key], seconds) for key, seconds in sorted(current.items())
+            if key in baseline and max(seconds, baseline[key]) * 1000 >= min_ms
+            and seconds > baseline[key] * (1 + tolerance)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('baseline')
+    parser.add_argument('current')
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed slowdown ratio, 0.25 = 25%%")
+    parser.add_argument('--min-ms', type=float, default=1.0)
+    args = parser.parse_args()
+
+    baseline = _load(args.baseline)
+    current = _load(args.current)
+    missing = sorted(set(baseline) - set(current))
+    if missing:
+        print(f"{len(missing)} baseline stages were not measured, e.g. {missing[0]}")
+
+    regressions = find_regressions(baseline, current, args.tolerance, args.min_ms)
+    for (benchmark, kernel, size, stage), baseline_seconds, seconds in regressions:
+        print(f"REGRESSION {benchmark} {kernel} {size} {stage}: {baseline_seconds * 1000:.2f} ms -> "
+              f"{seconds * 1000:.2f} ms ({seconds / baseline_seconds:.2f}x)")
+    if regressions:
+        sys.exit(1)
+    print(f"no regression in {len(set(baseline) & set(current))} compared stages")
+
+
+if __name__ == "__main__":
+    main()
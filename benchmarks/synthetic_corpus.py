@@ -0,0 +1,82 @@
+"""
+Synthetic jobs and job seekers for the benchmarks, shaped after the real jobs in tests/resources/Jobli_jobs.json:
+every answer is true with the same frequency as in the real jobs, and the other job fields are drawn from the real
+values.
+"""
+import json
+import os
+import random
+import uuid
+from decimal import Decimal
+from typing import Dict, Iterator, List
+
+from service.matching import NUM_OF_ANSWERS, AnswerVector, pack_job_answers
+
+JOBS_TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                  "tests", "resources", "Jobli_jobs.json")
+# share of seekers that did not answer every question
+PARTIAL_SEEKERS_RATIO = 0.05
+
+
+class SyntheticCorpus:
+
+    def __init__(self, seed: int = 1):
+        self.__seed = seed
+        with open(JOBS_TEMPLATE_PATH, encoding="utf-8") as template_file:
+            self.__templates: List[Dict] = json.load(template_file)
+        self.__questions = [{'key': answer['key'], 'question': answer['question']}
+                            for answer in self.__templates[0]['answers']]
+        self.answer_frequencies: List[float] = [
+            sum(bool(template['answers'][i]['answer']) for template in self.__templates) / len(self.__templates)
+            for i in range(NUM_OF_ANSWERS)]
+
+    def random_answers(self, rnd: random.Random) -> List[bool]:
+        return [rnd.random() < frequency for frequency in self.answer_frequencies]
+
+    def iter_job_answers(self, size: int, chunk_size: int) -> Iterator[List[AnswerVector]]:
+        """
+        :return: the packed answers of `size` jobs, in chunks, as the jobs corpus cache holds them
+        """
+        rnd = random.Random(self.__seed)
+        for start in range(0, size, chunk_size):
+            yield [pack_job_answers([{'answer': answer} for answer in self.random_answers(rnd)])
+                   for _ in range(min(chunk_size, size - start))]
+
+    def job(self, index: int) -> Dict:
+        """
+        :return: the full record of the job at `index` (same answers distribution, not the same answers as the
+        packed ones), as the jobs table returns it
+        """
+        rnd = random.Random(self.__seed * 1_000_003 + index)
+        template = rnd.choice(self.__templates)
+        return {
+            'job_id': str(uuid.UUID(int=rnd.getrandbits(128))),
+            'employer_id': str(uuid.UUID(int=rnd.getrandbits(128))),
+            'job_name': template['job_name'],
+            'job_description': template['job_description'],
+            'job_fields': list(rnd.choice(self.__templates)['job_fields']),
+            'job_scope': template['job_scope'],
+            'job_employees_count': Decimal(rnd.choice(self.__templates)['job_employees_count']),
+            'job_experience_needed': template['job_experience_needed'],
+            'job_requirements': list(template.get('job_requirements') or []),
+            'answers': [dict(question, answer=answer)
+                        for question, answer in zip(self.__questions, self.random_answers(rnd))],
+            'created_time': Decimal(1_600_000_000 + index),
+        }
+
+    def iter_seeker_items(self, size: int, chunk_size: int) -> Iterator[List[Dict]]:
+        """
+        :return: `size` job seeker answers records, in chunks, as the single table returns them
+        """
+        rnd = random.Random(self.__seed + 1)
+        for start in range(0, size, chunk_size):
+            chunk = []
+            for index in range(start, min(start + chunk_size, size)):
+                item = {'job_seeker_id': str(uuid.UUID(int=rnd.getrandbits(128))),
+                        'job_seeker_name': f'seeker {index}', 'version': Decimal(0)}
+                partial = rnd.random() < PARTIAL_SEEKERS_RATIO
+                for i, answer in enumerate(self.random_answers(rnd)):
+                    if not partial or rnd.random() < 0.5:
+                        item['a' + str(i + 1)] = answer
+                chunk.append(item)
+            yield chunk
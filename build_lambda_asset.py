@@ -2,6 +2,7 @@ import hashlib
 import os
 import platform
 import shutil
+import sys
 from datetime import datetime
 from pathlib import Path
 from typing import List
@@ -69,7 +70,8 @@ class BuildLambdaAsset:
         shutil.copy(self._requirements_txt.as_posix(), (self._build_dir / 'requirements.txt').as_posix())
 
     def _consume(self) -> None:
-        if platform.system().lower() == 'linux':
+        # the compiled wheels (numpy) must match the lambda runtime, python 3.8 on x86_64
+        if platform.system().lower() == 'linux' and platform.machine() == 'x86_64' and sys.version_info[:2] == (3, 8):
             self._consume_natively()
         else:
             self._consume_using_docker()
@@ -77,10 +79,12 @@ class BuildLambdaAsset:
     @timeit
     def _consume_natively(self) -> None:
         """
-        Build lambda dependencies natively on linux. Should be the same architecture though.
+        Build lambda dependencies natively on linux, with the running python, which has the same version and
+        architecture as the lambda runtime.
         """
         print('Installing lambda runtime dependencies on Linux')
-        if os.system(f"python -m pip install --target {self._build_dir} --requirement {self._requirements_txt}") != 0:
+        command = f"{sys.executable} -m pip install --target {self._build_dir} --requirement {self._requirements_txt}"
+        if os.system(command) != 0:
             raise Exception('Cloud not resolve lambda runtime dependencies')
         print('Finish to install lambda runtime dependencies')
 
@@ -8,7 +8,7 @@ from aws_cdk.aws_apigateway import Resource
 from aws_cdk.core import Duration, CfnResource
 from aws_cdk.aws_iam import Role
 from aws_cdk.aws_lambda import Function
-from aws_cdk import (core, aws_iam as iam, aws_apigateway as apigw, aws_lambda as _lambda, aws_dynamodb)
+from aws_cdk import (core, aws_iam as iam, aws_apigateway as apigw, aws_lambda as _lambda, aws_dynamodb, aws_sqs as sqs)
 
 sys.path.append(os.getcwd())
 
@@ -58,7 +58,8 @@ class JobliServiceEnvironment(core.Construct):
             'jobli-employers',
             partition_key=aws_dynamodb.Attribute(name="employer_id", type=aws_dynamodb.AttributeType.STRING),
             billing_mode=aws_dynamodb.BillingMode.PAY_PER_REQUEST,
-            removal_policy=core.RemovalPolicy.RETAIN
+            removal_policy=core.RemovalPolicy.RETAIN,
+            stream=aws_dynamodb.StreamViewType.NEW_AND_OLD_IMAGES
         )
         self.employers_table.grant_read_write_data(self.service_role)
 
@@ -67,11 +68,20 @@ class JobliServiceEnvironment(core.Construct):
             'jobli-jobs',
             partition_key=aws_dynamodb.Attribute(name="job_id", type=aws_dynamodb.AttributeType.STRING),
             billing_mode=aws_dynamodb.BillingMode.PAY_PER_REQUEST,
-            removal_policy=core.RemovalPolicy.RETAIN
+            removal_policy=core.RemovalPolicy.RETAIN,
+            stream=aws_dynamodb.StreamViewType.NEW_AND_OLD_IMAGES
         )
         self.jobs_table.add_global_secondary_index(
             partition_key=aws_dynamodb.Attribute(name='employer_id', type=aws_dynamodb.AttributeType.STRING),
             index_name='second-index')
+        # jobs by last modified time, for the incremental refresh of the warm jobs corpus cache. Only what the
+        # matching needs is projected, so reading the whole index costs a fraction of a table scan
+        self.jobs_table.add_global_secondary_index(
+            partition_key=aws_dynamodb.Attribute(name='sync_pk', type=aws_dynamodb.AttributeType.STRING),
+            sort_key=aws_dynamodb.Attribute(name='last_modified_time', type=aws_dynamodb.AttributeType.NUMBER),
+            index_name='last-modified-index',
+            projection_type=aws_dynamodb.ProjectionType.INCLUDE,
+            non_key_attributes=['employer_id', 'answer_bits', 'answered_mask', 'deleted', 'top_seekers_cutoff'])
         self.jobs_table.grant_read_write_data(self.service_role)
 
         self.table_job_seekers = aws_dynamodb.Table(
@@ -80,14 +90,25 @@ class JobliServiceEnvironment(core.Construct):
             partition_key=aws_dynamodb.Attribute(name="pk", type=aws_dynamodb.AttributeType.STRING),
             sort_key=aws_dynamodb.Attribute(name="sk", type=aws_dynamodb.AttributeType.STRING),
             billing_mode=aws_dynamodb.BillingMode.PAY_PER_REQUEST,
-            removal_policy=core.RemovalPolicy.RETAIN
+            removal_policy=core.RemovalPolicy.RETAIN,
+            stream=aws_dynamodb.StreamViewType.NEW_AND_OLD_IMAGES
         )
         self.table_job_seekers.add_global_secondary_index(partition_key=aws_dynamodb.Attribute(name='gsi1Pk', type=aws_dynamodb.AttributeType.STRING),
            sort_key=aws_dynamodb.Attribute(name='gsi1Sk', type=aws_dynamodb.AttributeType.STRING),
            index_name='GSI1')
 
+        # seeker top jobs materializations, sharded, with only what a job change needs to find the ones it may enter or
+        # leave projected
+        self.table_job_seekers.add_global_secondary_index(
+            partition_key=aws_dynamodb.Attribute(name='top_jobs_shard', type=aws_dynamodb.AttributeType.STRING),
+            index_name='top-jobs-index',
+            projection_type=aws_dynamodb.ProjectionType.INCLUDE,
+            non_key_attributes=['job_seeker_id', 'answer_bits', 'answered_mask', 'top_jobs_cutoff'])
+
         job_seekers_table_output = core.CfnOutput(self, id="JobSeekersTableName", value=self.table_job_seekers.table_name)
         job_seekers_table_output.override_logical_id('JobSeekersTableName')
+        jobs_table_output = core.CfnOutput(self, id="JobsTableName", value=self.jobs_table.table_name)
+        jobs_table_output.override_logical_id('JobsTableName')
 
         self.table_job_seekers.grant_read_write_data(self.service_role)
 
@@ -100,12 +121,25 @@ class JobliServiceEnvironment(core.Construct):
 
         self.api_authorizer: apigw.CfnAuthorizer = self.__create_api_authorizer(user_pool_arn=user_pool_arn, api=self.rest_api)
 
+        # deleted seekers whose records are still to be removed, in the async seeker delete mode
+        self.seeker_cleanup_queue = sqs.Queue(
+            self, 'SeekerCleanupQueue', visibility_timeout=Duration.seconds(6 * self._API_HANDLER_LAMBDA_TIMEOUT),
+            dead_letter_queue=sqs.DeadLetterQueue(max_receive_count=5,
+                                                  queue=sqs.Queue(self, 'SeekerCleanupDeadLetterQueue')))
+        self.seeker_cleanup_queue.grant_send_messages(self.service_role)
+        self.seeker_cleanup_queue.grant_consume_messages(self.service_role)
+
         self.environment = {
             "STACK_NAME": get_stack_name(),
             "JOBLI_USER_POOL_ARN": user_pool_arn,
             "JOB_SEEKERS_TABLE_NAME": self.table_job_seekers.table_name,
             "EMPLOYERS_TABLE_NAME": self.employers_table.table_name,
-            "JOBS_TABLE_NAME": self.jobs_table.table_name
+            "JOBS_TABLE_NAME": self.jobs_table.table_name,
+            # legacy -> dual (then run deploy/migrate_seeker_collections.py) -> collection
+            "SEEKER_SCHEMA_MODE": "legacy",
+            # sync or async (the records are removed by the seeker cleanup queue consumer)
+            "SEEKER_DELETE_MODE": "sync",
+            "SEEKER_CLEANUP_QUEUE_URL": self.seeker_cleanup_queue.queue_url
         }
 
         # Base Resources API
@@ -118,6 +152,7 @@ class JobliServiceEnvironment(core.Construct):
         jobli_employers_by_id_resource: apigw.Resource = jobli_employers_resource.add_resource("{employer_id}")
         jobli_jobs_resource: apigw.Resource = jobli_employers_by_id_resource.add_resource("jobs")
         jobli_job_id_resource: apigw.Resource = jobli_jobs_resource.add_resource("{job_id}")
+        jobli_job_relevant_seekers_resource: apigw.Resource = jobli_job_id_resource.add_resource("relevant-seekers")
 
         # Seekers API
         seekers_resource: apigw.Resource = api_resource.add_resource("seekers")
@@ -139,7 +174,8 @@ class JobliServiceEnvironment(core.Construct):
         self.__add_lambda_api(lambda_name='AddSeeekerAnswersWithId',
                               handler_method='service.handler.add_seeker_answers_with_id',
                               resource=seekers_id_answers, http_method=HttpMethods.POST,
-                              member_name="add_seeker_answers_with_id_api_lambda")
+                              member_name="add_seeker_answers_with_id_api_lambda",
+                              environment={"JOBS_CORPUS_PRELOAD": "true"})
 
 
         #Without id
@@ -164,11 +200,13 @@ class JobliServiceEnvironment(core.Construct):
         self.__add_lambda_api(lambda_name='GetRelevantJobs',
                               handler_method='service.handler.search_relevant_jobs',
                               resource=relevant_jobs, http_method=HttpMethods.GET,
-                              member_name="search_relevant_jobs_api_lambda")
+                              member_name="search_relevant_jobs_api_lambda",
+                              environment={"JOBS_CORPUS_PRELOAD": "true"})
 
         seeker_answers: apigw.Resource = seeker_resource.add_resource("answers")
         self.__add_lambda_api(lambda_name='AddSeekerAnswers', handler_method='service.handler.add_seeker_answers',
-                              resource=seeker_answers, http_method=HttpMethods.POST, member_name="add_seeker_answers_api_lambda")
+                              resource=seeker_answers, http_method=HttpMethods.POST,
+                              member_name="add_seeker_answers_api_lambda", environment={"JOBS_CORPUS_PRELOAD": "true"})
 
         seeker_experience: apigw.Resource = seeker_resource.add_resource("experience")
         self.__add_lambda_api(lambda_name='AddSeekerExperience', handler_method='service.handler.add_seeker_experience',
@@ -221,19 +259,76 @@ class JobliServiceEnvironment(core.Construct):
         self.__add_lambda_api(lambda_name='UpdateJobliEmployerJobAnswers',
                               handler_method='service.lambdas.employer.update_employer_job_answers.update_employer_job_answers',
                               resource=jobli_job_id_resource, http_method=HttpMethods.PUT, member_name="update_employer_job_answers")
+        self.__add_lambda_api(lambda_name='GetJobliEmployerJobRelevantSeekers',
+                              handler_method='service.lambdas.employer.get_job_relevant_seekers.'
+                                             'get_job_relevant_seekers',
+                              resource=jobli_job_relevant_seekers_resource, http_method=HttpMethods.GET,
+                              member_name="get_job_relevant_seekers")
 
         # User Type REST
         self.__add_lambda_api(lambda_name="SetUserType", handler_method="service.handler.set_user_type",
                               resource=update_type, http_method=HttpMethods.POST, member_name="set_user_type")
 
+        # Jobs stream, keeps the seekers top jobs materializations up to date
+        self.jobs_stream_lambda = self.__create_lambda_function(
+            lambda_name='ProcessJobsStream',
+            handler='service.lambdas.employer.process_jobs_stream.process_jobs_stream',
+            role=self.service_role,
+            environment=self.environment,
+            description='Applies job answer changes to the job seekers top jobs')
+        self.jobs_table.grant_stream_read(self.service_role)
+        self.jobs_stream_lambda.add_event_source_mapping(
+            'JobsStreamMapping', event_source_arn=self.jobs_table.table_stream_arn,
+            starting_position=_lambda.StartingPosition.LATEST, batch_size=100, retry_attempts=3,
+            bisect_batch_on_error=True)
+
+        # Job seekers stream, keeps the jobs top seekers up to date
+        self.seekers_stream_lambda = self.__create_lambda_function(
+            lambda_name='ProcessSeekersStream',
+            handler='service.handler.process_seekers_stream',
+            role=self.service_role,
+            environment=self.environment,
+            description='Applies job seeker answer changes to the jobs top seekers')
+        self.table_job_seekers.grant_stream_read(self.service_role)
+        self.seekers_stream_lambda.add_event_source_mapping(
+            'SeekersStreamMapping', event_source_arn=self.table_job_seekers.table_stream_arn,
+            starting_position=_lambda.StartingPosition.LATEST, batch_size=100, retry_attempts=3,
+            bisect_batch_on_error=True)
+
+        # Employers stream, keeps the employer summary embedded in the jobs up to date
+        self.employers_stream_lambda = self.__create_lambda_function(
+            lambda_name='ProcessEmployersStream',
+            handler='service.lambdas.employer.process_employers_stream.process_employers_stream',
+            role=self.service_role,
+            environment=self.environment,
+            description='Rewrites the employer summary of the employer jobs when the employer changes')
+        self.employers_table.grant_stream_read(self.service_role)
+        self.employers_stream_lambda.add_event_source_mapping(
+            'EmployersStreamMapping', event_source_arn=self.employers_table.table_stream_arn,
+            starting_position=_lambda.StartingPosition.LATEST, batch_size=100, retry_attempts=3,
+            bisect_batch_on_error=True)
+
+        # Seeker cleanup queue consumer, removes the records of the seekers deleted in the async mode
+        self.seeker_cleanup_lambda = self.__create_lambda_function(
+            lambda_name='ProcessSeekerCleanup',
+            handler='service.handler.process_seeker_cleanup',
+            role=self.service_role,
+            environment=self.environment,
+            description='Removes the records of the deleted job seekers')
+        seeker_cleanup_mapping = self.seeker_cleanup_lambda.add_event_source_mapping(
+            'SeekerCleanupMapping', event_source_arn=self.seeker_cleanup_queue.queue_arn, batch_size=10)
+        # only the failed messages of a batch are delivered again
+        seeker_cleanup_mapping.node.default_child.add_property_override('FunctionResponseTypes',
+                                                                        ['ReportBatchItemFailures'])
+
     # pylint: disable = no-value-for-parameter
     def __add_lambda_api(self, lambda_name: str, handler_method: str, resource: Resource, http_method: HttpMethods, member_name: str,
-                         description: str = ''):
+                         description: str = '', environment: dict = None):
         new_api_lambda = \
             self.__create_lambda_function(lambda_name=f'{lambda_name}Api',
                                           handler=handler_method,
                                           role=self.service_role,
-                                          environment=self.environment,
+                                          environment={**self.environment, **(environment or {})},
                                           description=description)
 
         self.__add_resource_method(resource=resource, http_method=http_method.value,
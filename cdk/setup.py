@@ -35,7 +35,8 @@ setup(
         "aws-cdk.core>=1.96.0",
         "aws-cdk.aws-cognito>=1.96.0",
         "aws-cdk.aws_apigateway>=1.96.0",
-        "aws-cdk.aws-dynamodb>=1.96.0"
+        "aws-cdk.aws-dynamodb>=1.96.0",
+        "aws-cdk.aws-sqs>=1.96.0"
     ],
     python_requires=">=3.8",
 )
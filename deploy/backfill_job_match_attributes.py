@@ -0,0 +1,30 @@
+import argparse
+import os
+
+from jobli_service_cdk.service_stack.jobli_construct import get_stack_name
+
+from deploy.stack_outputs import get_stack_output
+from service.dao.constants import EnvVarNames
+from service.dao.jobs_repository import jobs_repository
+from service.lambdas.employer.constants import EmployerConstants
+
+
+def main():
+    # Stores the packed answers and the last-modified-index keys on the jobs written before them, then marks the
+    # backfill done: until then the jobs corpus full loads scan the jobs table instead of reading the index
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-t', '--table-name', help="jobs table")
+    parser.add_argument('-s', '--seekers-table-name', help="job seekers table, where the backfill is marked done")
+    args = parser.parse_args()
+    if args.table_name is None:
+        args.table_name = get_stack_output(get_stack_name(), "JobsTableName")
+    if args.seekers_table_name is None:
+        args.seekers_table_name = get_stack_output(get_stack_name(), "JobSeekersTableName")
+
+    os.environ[EmployerConstants.JOBS_TABLE_NAME] = args.table_name
+    os.environ[EnvVarNames.TABLE_NAME] = args.seekers_table_name
+    print(jobs_repository.backfill_match_attributes())
+
+
+if __name__ == '__main__':
+    main()
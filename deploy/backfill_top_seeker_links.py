@@ -0,0 +1,30 @@
+import argparse
+import os
+
+from jobli_service_cdk.service_stack.jobli_construct import get_stack_name
+
+from deploy.stack_outputs import get_stack_output
+from service.dao.constants import EnvVarNames
+from service.dao.jobs_repository import jobs_repository
+from service.lambdas.employer.constants import EmployerConstants
+
+
+def main():
+    # Writes the seeker reverse index links of the top seekers listed before it existed, so deleted seekers are taken
+    # out of every list. Run it once the lambdas writing the links are deployed, can be run again
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-t', '--table-name', help="jobs table")
+    parser.add_argument('-s', '--seekers-table-name', help="job seekers table, where the links are written")
+    args = parser.parse_args()
+    if args.table_name is None:
+        args.table_name = get_stack_output(get_stack_name(), "JobsTableName")
+    if args.seekers_table_name is None:
+        args.seekers_table_name = get_stack_output(get_stack_name(), "JobSeekersTableName")
+
+    os.environ[EmployerConstants.JOBS_TABLE_NAME] = args.table_name
+    os.environ[EnvVarNames.TABLE_NAME] = args.seekers_table_name
+    print(jobs_repository.backfill_top_seeker_links())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,30 @@
+import argparse
+import os
+
+from jobli_service_cdk.service_stack.jobli_construct import get_stack_name
+
+from deploy.stack_outputs import get_stack_output
+from service.dao.constants import EnvVarNames
+from service.dao.job_seeker_answers_repository import job_seeker_answers_repository
+from service.dao.model.job_seeker import SeekerSchemaMode
+
+
+def main():
+    # Indexes every answers record by its answers pattern, recounts the records per pattern and marks the index
+    # built: until then the seekers searches read every answers record. Run it with the schema mode the lambdas are
+    # deployed with, while no answers are written
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-t', '--table-name')
+    parser.add_argument('--schema-mode', default=SeekerSchemaMode.LEGACY.value,
+                        choices=[mode.value for mode in SeekerSchemaMode])
+    args = parser.parse_args()
+    if args.table_name is None:
+        args.table_name = get_stack_output(get_stack_name(), "JobSeekersTableName")
+
+    os.environ[EnvVarNames.TABLE_NAME] = args.table_name
+    os.environ[EnvVarNames.SEEKER_SCHEMA_MODE] = args.schema_mode
+    print(job_seeker_answers_repository.rebuild_answer_pattern_index())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,29 @@
+import argparse
+import os
+
+from jobli_service_cdk.service_stack.jobli_construct import get_stack_name
+
+from deploy.stack_outputs import get_stack_output
+from service.dao.constants import EnvVarNames
+from service.dao.job_seeker_answers_repository import job_seeker_answers_repository
+from service.dao.model.job_seeker import SeekerSchemaMode
+
+
+def main():
+    # Moves the answers records of the unsharded JOB_SEEKER_ANSWER partition to their shards. The searches read the
+    # unsharded partition too until it is empty. Run it while the lambdas are in the legacy schema mode, before
+    # deploy/build_answer_pattern_index.py and deploy/migrate_seeker_collections.py
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-t', '--table-name')
+    args = parser.parse_args()
+    if args.table_name is None:
+        args.table_name = get_stack_output(get_stack_name(), "JobSeekersTableName")
+
+    os.environ[EnvVarNames.TABLE_NAME] = args.table_name
+    # the shards are the place of the records in the legacy layout
+    os.environ[EnvVarNames.SEEKER_SCHEMA_MODE] = SeekerSchemaMode.LEGACY.value
+    print(job_seeker_answers_repository.migrate_to_shards())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+import argparse
+import os
+
+import boto3
+from jobli_service_cdk.service_stack.jobli_construct import get_stack_name
+
+from service.dao.constants import EnvVarNames
+from service.dao.job_seeker_repository import job_seeker_repository
+from service.dao.model.job_seeker import SeekerSchemaMode
+
+
+def get_job_seekers_table_name(stack_name) -> str:
+    cloudformation = boto3.client('cloudformation')
+    response = cloudformation.describe_stacks(StackName=stack_name)
+    outputs = response['Stacks'][0]['Outputs']
+    for output in outputs:
+        if str(output['OutputKey']) == "JobSeekersTableName":
+            return output['OutputValue']
+    return ""
+
+
+def main():
+    # Moves the experiences and the answers records of every job seeker to the seeker item collection. Run it once
+    # the lambdas are deployed with SEEKER_SCHEMA_MODE=dual, then deploy them with SEEKER_SCHEMA_MODE=collection
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-t', '--table-name')
+    args = parser.parse_args()
+    if args.table_name is None:
+        args.table_name = get_job_seekers_table_name(get_stack_name())
+
+    os.environ[EnvVarNames.TABLE_NAME] = args.table_name
+    os.environ[EnvVarNames.SEEKER_SCHEMA_MODE] = SeekerSchemaMode.DUAL.value
+    print(job_seeker_repository.migrate_to_item_collections())
+
+
+if __name__ == '__main__':
+    main()
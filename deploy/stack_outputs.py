@@ -0,0 +1,11 @@
+import boto3
+
+
+def get_stack_output(stack_name: str, output_key: str) -> str:
+    cloudformation = boto3.client('cloudformation')
+    response = cloudformation.describe_stacks(StackName=stack_name)
+    outputs = response['Stacks'][0]['Outputs']
+    for output in outputs:
+        if str(output['OutputKey']) == output_key:
+            return output['OutputValue']
+    return ""
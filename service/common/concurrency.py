@@ -0,0 +1,89 @@
+import threading
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from typing import Any, Callable, List, Optional, Sequence
+
+from aws_lambda_context import LambdaContext
+from aws_lambda_powertools import Logger
+
+from service.common.exceptions import CallTimeoutError
+from service.common.utils import get_env_int
+from service.dao.constants import EnvVarNames
+
+logger = Logger()
+
+_DEFAULT_MAX_WORKERS = 8
+# time left to the handler to build its (error) response once the calls timed out
+_DEFAULT_TIMEOUT_MARGIN_MILLIS = 500
+_MIN_TIMEOUT_SECONDS = 0.05
+
+_worker = threading.local()
+
+
+class _ConcurrentCalls:
+    """
+    Per container thread pool running independent calls (DynamoDB, Cognito...) of a handler concurrently, so the
+    handler waits for the slowest call instead of the sum of them
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__executor: Optional[ThreadPoolExecutor] = None
+
+    def run(self, calls: Sequence[Callable[[], Any]], context: Optional[LambdaContext] = None) -> List[Any]:
+        """
+        Runs the first call on the calling thread and the others on the pool
+
+        :param context: when given, the pool calls must complete before the invocation gets within
+        CONCURRENT_CALLS_TIMEOUT_MARGIN_MILLIS of its timeout
+        :return: the calls results, in calls order
+        :raises: the error of the first failed call (in calls order), or CallTimeoutError when out of time. Calls
+        still running then are left to complete in the background.
+        """
+        if len(calls) <= 1 or getattr(_worker, 'active', False):
+            # nested calls run in the calling worker, so they can never wait for a worker held by their caller
+            return [call() for call in calls]
+
+        futures = [self.__get_executor().submit(_run_as_worker, call) for call in calls[1:]]
+        try:
+            first_result = calls[0]()
+        except Exception:
+            for future in futures:
+                future.cancel()
+            raise
+
+        done, not_done = wait(futures, timeout=self.__timeout_seconds(context), return_when=FIRST_EXCEPTION)
+        for pending in not_done:
+            pending.cancel()
+        for future in futures:
+            if future in done and future.exception() is not None:
+                raise future.exception()
+        if not_done:
+            raise CallTimeoutError(f"'{len(not_done)}' out of '{len(calls)}' concurrent calls did not complete in time")
+        return [first_result] + [future.result() for future in futures]
+
+    @staticmethod
+    def __timeout_seconds(context: Optional[LambdaContext]) -> Optional[float]:
+        if context is None:
+            return None
+        remaining_millis = context.get_remaining_time_in_millis() - get_env_int(
+            EnvVarNames.CONCURRENT_CALLS_TIMEOUT_MARGIN_MILLIS, _DEFAULT_TIMEOUT_MARGIN_MILLIS)
+        return max(_MIN_TIMEOUT_SECONDS, remaining_millis / 1000)
+
+    def __get_executor(self) -> ThreadPoolExecutor:
+        with self.__lock:
+            if self.__executor is None:
+                self.__executor = ThreadPoolExecutor(
+                    max_workers=get_env_int(EnvVarNames.CONCURRENT_CALLS_MAX_WORKERS, _DEFAULT_MAX_WORKERS),
+                    thread_name_prefix="concurrent-calls")
+            return self.__executor
+
+
+def _run_as_worker(call: Callable[[], Any]) -> Any:
+    _worker.active = True
+    try:
+        return call()
+    finally:
+        _worker.active = False
+
+
+concurrent_calls: _ConcurrentCalls = _ConcurrentCalls()
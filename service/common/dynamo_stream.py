@@ -0,0 +1,42 @@
+from typing import Dict, Optional
+
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+
+INSERT_EVENT = "INSERT"
+MODIFY_EVENT = "MODIFY"
+REMOVE_EVENT = "REMOVE"
+
+_deserializer = TypeDeserializer()
+_serializer = TypeSerializer()
+
+
+def deserialize_image(image: Optional[Dict]) -> Optional[Dict]:
+    """
+    :param image: a stream record NewImage/OldImage, in DynamoDB JSON
+    :return: the item as a python dict, None if there is no image
+    """
+    if image is None:
+        return None
+    return {name: _deserializer.deserialize(value) for name, value in image.items()}
+
+
+def build_stream_record(event_name: str, keys: Dict, new_item: Optional[Dict] = None,
+                        old_item: Optional[Dict] = None) -> Dict:
+    """
+    Builds a synthetic DynamoDB stream record (NEW_AND_OLD_IMAGES view), to drive stream handlers locally
+
+    :param keys: the item key attributes
+    """
+    record = {
+        'eventName': event_name,
+        'eventSource': 'aws:dynamodb',
+        'dynamodb': {
+            'Keys': {name: _serializer.serialize(value) for name, value in keys.items()},
+            'StreamViewType': 'NEW_AND_OLD_IMAGES'
+        }
+    }
+    if new_item is not None:
+        record['dynamodb']['NewImage'] = {name: _serializer.serialize(value) for name, value in new_item.items()}
+    if old_item is not None:
+        record['dynamodb']['OldImage'] = {name: _serializer.serialize(value) for name, value in old_item.items()}
+    return record
@@ -70,3 +70,16 @@ class ResourceNotFoundError(NotFoundError):
     def __init__(self, env_var_name: str):
         self.status_code = 404
         super().__init__(f"Resource not found: '{env_var_name}'")
+
+
+class UnprocessedKeysError(CommonException):
+    def __init__(self, table_name: str, unprocessed_keys: list):
+        super().__init__(f"'{len(unprocessed_keys)}' keys of table '{table_name}' were left unprocessed")
+        self.status_code = 503
+        self.unprocessed_keys = unprocessed_keys
+
+
+class CallTimeoutError(CommonException):
+    def __init__(self, message):
+        self.description = message
+        self.status_code = 504
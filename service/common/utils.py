@@ -40,6 +40,13 @@ def get_env_or_raise(var_name: str) -> str:
     return value
 
 
+def get_env_int(var_name: str, default: int) -> int:
+    value = os.getenv(var_name, None)
+    if value is None:
+        return default
+    return int(value)
+
+
 def get_env_vars_with_prefix(prefix):
     return filter(lambda x: x[0].startswith(prefix), os.environ.items())
 
@@ -0,0 +1,79 @@
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import boto3
+from aws_lambda_powertools import Logger
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+
+from service.common.exceptions import UnprocessedKeysError
+
+logger = Logger()
+
+BATCH_GET_MAX_KEYS = 100
+_MAX_CONCURRENT_CHUNKS = 8
+_MAX_ATTEMPTS = 6
+_BACKOFF_BASE_SECONDS = 0.05
+_BACKOFF_MAX_SECONDS = 1.0
+
+_serializer = TypeSerializer()
+_deserializer = TypeDeserializer()
+
+
+def batch_get(table_name: str, keys: List[Dict], projection: Optional[List[str]] = None,
+              consistent_read: bool = False) -> List[Dict]:
+    """
+    Reads the items of the given keys with BatchGetItem: the keys are split in chunks of 100, read concurrently,
+    and unprocessed keys are retried with jittered exponential backoff
+
+    :param projection: attributes to read, all if not given. The key attributes must be part of it to tell which
+    item belongs to which key
+    :param consistent_read: strongly consistent reads, at twice the read capacity
+    :return: the found items, in no particular order
+    :raises UnprocessedKeysError: if some keys were still unprocessed after all the attempts
+    """
+    # duplicated keys are rejected by BatchGetItem
+    unique_keys = list({tuple(sorted(key.items())): key for key in keys}.values())
+    chunks = [unique_keys[start:start + BATCH_GET_MAX_KEYS]
+              for start in range(0, len(unique_keys), BATCH_GET_MAX_KEYS)]
+    if not chunks:
+        return []
+
+    # the low level client is thread safe, unlike the resource
+    dynamo_client = boto3.client("dynamodb")
+    if len(chunks) == 1:
+        return _get_chunk(dynamo_client, table_name, chunks[0], projection, consistent_read)
+
+    with ThreadPoolExecutor(max_workers=min(len(chunks), _MAX_CONCURRENT_CHUNKS),
+                            thread_name_prefix="batch-get") as executor:
+        chunks_items = executor.map(lambda chunk: _get_chunk(dynamo_client, table_name, chunk, projection,
+                                                             consistent_read), chunks)
+        return [item for chunk_items in chunks_items for item in chunk_items]
+
+
+def _get_chunk(dynamo_client, table_name: str, keys: List[Dict], projection: Optional[List[str]],
+               consistent_read: bool) -> List[Dict]:
+    request = {'Keys': [{name: _serializer.serialize(value) for name, value in key.items()} for key in keys],
+               'ConsistentRead': consistent_read}
+    if projection:
+        request['ProjectionExpression'] = ", ".join(f"#p{i}" for i in range(len(projection)))
+        request['ExpressionAttributeNames'] = {f"#p{i}": name for i, name in enumerate(projection)}
+
+    items: List[Dict] = []
+    for attempt in range(_MAX_ATTEMPTS):
+        if attempt:
+            # full jitter, so throttled concurrent requests do not retry in lockstep
+            time.sleep(random.uniform(0, min(_BACKOFF_MAX_SECONDS, _BACKOFF_BASE_SECONDS * 2 ** attempt)))
+        response = dynamo_client.batch_get_item(RequestItems={table_name: request}, ReturnConsumedCapacity='TOTAL')
+        items.extend({name: _deserializer.deserialize(value) for name, value in item.items()}
+                     for item in response['Responses'].get(table_name, []))
+
+        unprocessed = response.get('UnprocessedKeys', {}).get(table_name)
+        if not unprocessed:
+            return items
+        logger.debug(f"Retrying '{len(unprocessed['Keys'])}' unprocessed keys of table '{table_name}'")
+        request = unprocessed
+
+    raise UnprocessedKeysError(table_name, [{name: _deserializer.deserialize(value) for name, value in key.items()}
+                                            for key in request['Keys']])
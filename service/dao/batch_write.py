@@ -0,0 +1,71 @@
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+import boto3
+from aws_lambda_powertools import Logger
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+
+from service.common.exceptions import UnprocessedKeysError
+
+logger = Logger()
+
+BATCH_WRITE_MAX_ITEMS = 25
+_MAX_CONCURRENT_CHUNKS = 8
+_MAX_ATTEMPTS = 6
+_BACKOFF_BASE_SECONDS = 0.05
+_BACKOFF_MAX_SECONDS = 1.0
+
+_serializer = TypeSerializer()
+_deserializer = TypeDeserializer()
+
+
+def batch_delete(table_name: str, keys: List[Dict]) -> None:
+    """
+    Removes the items of the given keys with BatchWriteItem: the keys are split in chunks of 25, removed
+    concurrently, and unprocessed keys are retried with jittered exponential backoff. Missing items are ignored.
+
+    :raises UnprocessedKeysError: with the keys of every chunk still unprocessed after all the attempts, the other
+    keys were removed
+    """
+    # duplicated keys are rejected by BatchWriteItem
+    unique_keys = list({tuple(sorted(key.items())): key for key in keys}.values())
+    chunks = [unique_keys[start:start + BATCH_WRITE_MAX_ITEMS]
+              for start in range(0, len(unique_keys), BATCH_WRITE_MAX_ITEMS)]
+    if not chunks:
+        return
+
+    # the low level client is thread safe, unlike the resource (and its batch_writer)
+    dynamo_client = boto3.client("dynamodb")
+    if len(chunks) == 1:
+        unprocessed_keys = _delete_chunk(dynamo_client, table_name, chunks[0])
+    else:
+        with ThreadPoolExecutor(max_workers=min(len(chunks), _MAX_CONCURRENT_CHUNKS),
+                                thread_name_prefix="batch-delete") as executor:
+            unprocessed_keys = [key for chunk_keys in executor.map(
+                lambda chunk: _delete_chunk(dynamo_client, table_name, chunk), chunks) for key in chunk_keys]
+
+    if unprocessed_keys:
+        raise UnprocessedKeysError(table_name, unprocessed_keys)
+
+
+def _delete_chunk(dynamo_client, table_name: str, keys: List[Dict]) -> List[Dict]:
+    """
+    :return: the keys still unprocessed after all the attempts
+    """
+    requests = [{'DeleteRequest': {'Key': {name: _serializer.serialize(value) for name, value in key.items()}}}
+                for key in keys]
+    for attempt in range(_MAX_ATTEMPTS):
+        if attempt:
+            # full jitter, so throttled concurrent requests do not retry in lockstep
+            time.sleep(random.uniform(0, min(_BACKOFF_MAX_SECONDS, _BACKOFF_BASE_SECONDS * 2 ** attempt)))
+        response = dynamo_client.batch_write_item(RequestItems={table_name: requests}, ReturnConsumedCapacity='TOTAL')
+
+        requests = response.get('UnprocessedItems', {}).get(table_name)
+        if not requests:
+            return []
+        logger.debug(f"Retrying '{len(requests)}' unprocessed deletes of table '{table_name}'")
+
+    return [{name: _deserializer.deserialize(value) for name, value in request['DeleteRequest']['Key'].items()}
+            for request in requests]
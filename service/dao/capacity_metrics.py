@@ -0,0 +1,240 @@
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from functools import wraps
+from typing import Callable, Dict, List, Tuple
+
+import boto3
+from aws_lambda_context import LambdaContext
+from aws_lambda_powertools import Logger, Metrics
+from aws_lambda_powertools.metrics.base import MetricManager
+
+from service.dao.constants import EnvVarNames
+from service.dao.slow_operations import fingerprint, slow_operation_log
+
+logger = Logger()
+
+DEFAULT_CAPACITY_METRICS_NAMESPACE = "Jobli/DynamoDB"
+
+_READ_OPERATIONS = frozenset({'GetItem', 'BatchGetItem', 'Query', 'Scan', 'TransactGetItems'})
+_WRITE_OPERATIONS = frozenset({'PutItem', 'UpdateItem', 'DeleteItem', 'BatchWriteItem', 'TransactWriteItems'})
+_PAGED_OPERATIONS = frozenset({'Query', 'Scan'})
+
+# keys of the botocore request context carrying the call state from the request to the response hook
+_CONTEXT_START = 'capacity_metrics_start'
+_CONTEXT_TABLE = 'capacity_metrics_table'
+_CONTEXT_WRITTEN_ITEMS = 'capacity_metrics_written_items'
+_CONTEXT_FINGERPRINT = 'capacity_metrics_fingerprint'
+
+Handler = Callable[[Dict, LambdaContext], Dict]
+
+_CALL_METRICS = (('Calls', 'Count'), ('Pages', 'Count'), ('Items', 'Count'), ('ConsumedRCU', 'Count'),
+                 ('ConsumedWCU', 'Count'), ('LatencyMs', 'Milliseconds'))
+_SUMMARY_METRICS = (('Calls', 'Count'), ('ConsumedRCU', 'Count'), ('ConsumedWCU', 'Count'),
+                    ('LatencyMs', 'Milliseconds'))
+
+
+@dataclass
+class OperationStats:
+    calls: int = 0
+    pages: int = 0
+    items: int = 0
+    read_units: float = 0
+    write_units: float = 0
+    latency_ms: float = 0
+
+
+# the handlers are decorated with metrics.log_metrics, which publishes the invocation summary added by flush
+metrics: Metrics = Metrics(namespace=os.getenv(EnvVarNames.CAPACITY_METRICS_NAMESPACE,
+                                               DEFAULT_CAPACITY_METRICS_NAMESPACE))
+
+
+class _CapacityMetrics:
+    """
+    Consumed capacity, items, pages and latency of every DynamoDB call of the process, taken from the botocore
+    events of the default boto3 session once installed, so the resources and clients of the repositories and of the
+    employer lambdas are all covered. The calls are aggregated per (operation, table) and emitted as CloudWatch
+    Embedded Metric Format lines, tagged with the handler, at the end of each tracked invocation, when the calls over
+    the slow operation budgets are logged too.
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__handler = os.getenv('AWS_LAMBDA_FUNCTION_NAME', 'none')
+        self.__stats: Dict[Tuple[str, str], OperationStats] = {}
+        self.__installed = False
+
+    def install(self) -> None:
+        """
+        Instruments the default boto3 session, called by the handler modules before any client or resource is
+        created
+        """
+        with self.__lock:
+            if self.__installed:
+                return
+            self.__installed = True
+        if boto3.DEFAULT_SESSION is None:
+            boto3.setup_default_session()
+        self.register(boto3.DEFAULT_SESSION.events)
+
+    def register(self, events) -> None:
+        """
+        Hooks the capacity accounting into a botocore event emitter, clients created from it afterwards are
+        instrumented
+        """
+        # last, so the conditions of the boto3 resources are already built into expressions
+        events.register_last('before-parameter-build.dynamodb', self.__before_call)
+        events.register('after-call.dynamodb', self.__after_call)
+
+    def track_invocation(self, handler: Handler) -> Handler:
+        """
+        Decorates a lambda handler, inside metrics.log_metrics: its DynamoDB calls are tagged with its name and
+        emitted when it returns, the invocation summary is published by log_metrics
+        """
+
+        @wraps(handler)
+        def _tracked_handler(event: Dict, context: LambdaContext) -> Dict:
+            with self.__lock:
+                self.__handler = handler.__name__
+                self.__stats = {}
+            slow_operation_log.reset()
+            try:
+                return handler(event, context)
+            finally:
+                self.flush()
+
+        return _tracked_handler
+
+    def snapshot(self) -> Dict[Tuple[str, str], OperationStats]:
+        """
+        :return: copy of the stats of the current invocation per (operation, table)
+        """
+        with self.__lock:
+            return {key: OperationStats(**vars(stats)) for key, stats in self.__stats.items()}
+
+    def flush(self) -> None:
+        """
+        Emits the stats of the current invocation, one metric line per (operation, table), adds the summary to
+        `metrics` and starts over
+        """
+        with self.__lock:
+            handler, stats, self.__stats = self.__handler, self.__stats, {}
+        slow_operation_log.flush(handler)
+        total = OperationStats()
+        for (operation, table), operation_stats in sorted(stats.items()):
+            # a line of its own: an embedded metric format line holds a single dimension set
+            _emit({'handler': handler, 'operation': operation, 'table': table}, _metric_values(operation_stats),
+                  _CALL_METRICS)
+            for field in vars(total):
+                setattr(total, field, getattr(total, field) + getattr(operation_stats, field))
+        metrics.add_dimension(name='handler', value=handler)
+        values = _metric_values(total)
+        for name, unit in _SUMMARY_METRICS:
+            metrics.add_metric(name=name, unit=unit, value=values[name])
+        if not stats:
+            return
+        logger.info(f"DynamoDB usage of '{handler}': '{total.calls}' calls, '{total.read_units}' RCU, "
+                    f"'{total.write_units}' WCU, '{round(total.latency_ms, 1)}' ms")
+
+    @staticmethod
+    def __before_call(params: Dict, model, context: Dict, **kwargs) -> None:
+        if model.name not in _READ_OPERATIONS and model.name not in _WRITE_OPERATIONS:
+            return
+        params.setdefault('ReturnConsumedCapacity', 'TOTAL')
+        context[_CONTEXT_START] = time.perf_counter()
+        context[_CONTEXT_TABLE] = _table_name(params)
+        context[_CONTEXT_WRITTEN_ITEMS] = _written_items(model.name, params)
+        context[_CONTEXT_FINGERPRINT] = fingerprint(model.name, context[_CONTEXT_TABLE], params)
+
+    def __after_call(self, parsed: Dict, model, context: Dict, **kwargs) -> None:
+        if _CONTEXT_START not in context:
+            return
+        latency_ms = (time.perf_counter() - context[_CONTEXT_START]) * 1000
+        read_units, write_units = _consumed_units(model.name, parsed.get('ConsumedCapacity'))
+        if model.name in _READ_OPERATIONS:
+            items = _read_items(parsed)
+        else:
+            items = context[_CONTEXT_WRITTEN_ITEMS] - _unprocessed_items(parsed)
+        slow_operation_log.record(context[_CONTEXT_FINGERPRINT], latency_ms, read_units + write_units,
+                                  parsed.get('ScannedCount', items), items)
+
+        with self.__lock:
+            stats = self.__stats.setdefault((model.name, context[_CONTEXT_TABLE]), OperationStats())
+            stats.calls += 1
+            stats.pages += 1 if model.name in _PAGED_OPERATIONS else 0
+            stats.items += items
+            stats.read_units += read_units
+            stats.write_units += write_units
+            stats.latency_ms += latency_ms
+
+
+def _table_name(params: Dict) -> str:
+    if 'TableName' in params:
+        return params['TableName']
+    tables = set(params.get('RequestItems', {}))
+    for transact_item in params.get('TransactItems', []):
+        tables.update(request['TableName'] for request in transact_item.values())
+    return ','.join(sorted(tables)) or 'unknown'
+
+
+def _written_items(operation: str, params: Dict) -> int:
+    if operation == 'BatchWriteItem':
+        return sum(len(requests) for requests in params.get('RequestItems', {}).values())
+    if operation == 'TransactWriteItems':
+        return len(params.get('TransactItems', []))
+    return 1
+
+
+def _read_items(parsed: Dict) -> int:
+    if 'Count' in parsed:
+        return parsed['Count']
+    if 'Item' in parsed:
+        return 1
+    responses = parsed.get('Responses', [])
+    if isinstance(responses, dict):
+        return sum(len(items) for items in responses.values())
+    return sum(1 for response in responses if response.get('Item'))
+
+
+def _unprocessed_items(parsed: Dict) -> int:
+    return sum(len(requests) for requests in parsed.get('UnprocessedItems', {}).values())
+
+
+def _consumed_units(operation: str, consumed_capacity) -> Tuple[float, float]:
+    """
+    :return: the read and the write capacity units of a response, TOTAL only reports CapacityUnits, they are
+    read or write units by the operation
+    """
+    if consumed_capacity is None:
+        return 0, 0
+    entries: List[Dict] = consumed_capacity if isinstance(consumed_capacity, list) else [consumed_capacity]
+    read_units, write_units = 0.0, 0.0
+    for entry in entries:
+        if 'ReadCapacityUnits' in entry or 'WriteCapacityUnits' in entry:
+            read_units += float(entry.get('ReadCapacityUnits', 0))
+            write_units += float(entry.get('WriteCapacityUnits', 0))
+        elif operation in _READ_OPERATIONS:
+            read_units += float(entry.get('CapacityUnits', 0))
+        else:
+            write_units += float(entry.get('CapacityUnits', 0))
+    return read_units, write_units
+
+
+def _metric_values(stats: OperationStats) -> Dict[str, float]:
+    return {'Calls': stats.calls, 'Pages': stats.pages, 'Items': stats.items,
+            'ConsumedRCU': round(stats.read_units, 2), 'ConsumedWCU': round(stats.write_units, 2),
+            'LatencyMs': round(stats.latency_ms, 1)}
+
+
+def _emit(dimensions: Dict[str, str], values: Dict[str, float], metric_units: Tuple[Tuple[str, str], ...]) -> None:
+    line = MetricManager(metric_set={}, dimension_set={}, namespace=metrics.namespace)
+    for name, unit in metric_units:
+        line.add_metric(name=name, unit=unit, value=values[name])
+    for name, value in dimensions.items():
+        line.add_dimension(name=name, value=value)
+    print(json.dumps(line.serialize_metric_set(), separators=(",", ":")))
+
+
+capacity_metrics: _CapacityMetrics = _CapacityMetrics()
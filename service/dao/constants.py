@@ -26,5 +26,28 @@ class EnvVarNames:
 
     DYNAMO_GSI_1: Final = "DYNAMO_GSI_1"
     TABLE_NAME: Final = "JOB_SEEKERS_TABLE_NAME"
-
-
+    # number of concurrent segments of full table scans
+    DYNAMO_SCAN_SEGMENTS: Final = "DYNAMO_SCAN_SEGMENTS"
+    # age after which a seeker top jobs materialization is recomputed on read
+    SEEKER_TOP_JOBS_MAX_AGE_SECONDS: Final = "SEEKER_TOP_JOBS_MAX_AGE_SECONDS"
+    # age after which a memoized match result is recomputed, even if the corpus generation did not change
+    MATCH_CACHE_TTL_SECONDS: Final = "MATCH_CACHE_TTL_SECONDS"
+    # age after which the corpus generation of the match results caches is read again
+    MATCH_GENERATION_CHECK_SECONDS: Final = "MATCH_GENERATION_CHECK_SECONDS"
+    # layout of the job seeker records: legacy, dual (item collection with legacy fallback) or collection
+    SEEKER_SCHEMA_MODE: Final = "SEEKER_SCHEMA_MODE"
+    # per container pool running the independent calls of a handler concurrently
+    CONCURRENT_CALLS_MAX_WORKERS: Final = "CONCURRENT_CALLS_MAX_WORKERS"
+    # time kept by a handler to respond once its concurrent calls timed out
+    CONCURRENT_CALLS_TIMEOUT_MARGIN_MILLIS: Final = "CONCURRENT_CALLS_TIMEOUT_MARGIN_MILLIS"
+    # sync: the seeker records are removed by the delete request, async: by the seeker cleanup queue consumer
+    SEEKER_DELETE_MODE: Final = "SEEKER_DELETE_MODE"
+    # SQS queue of the seekers to clean up, an in-process stand-in is used when not set in local runs, and the records
+    # are removed synchronously when not set in a lambda
+    SEEKER_CLEANUP_QUEUE_URL: Final = "SEEKER_CLEANUP_QUEUE_URL"
+    # CloudWatch namespace of the DynamoDB consumed capacity metrics
+    CAPACITY_METRICS_NAMESPACE: Final = "CAPACITY_METRICS_NAMESPACE"
+    # budgets of a DynamoDB call fingerprint in an invocation, over any of them it is logged as a slow operation
+    SLOW_OP_LATENCY_MILLIS: Final = "SLOW_OP_LATENCY_MILLIS"
+    SLOW_OP_MAX_PAGES: Final = "SLOW_OP_MAX_PAGES"
+    SLOW_OP_MAX_CAPACITY_UNITS: Final = "SLOW_OP_MAX_CAPACITY_UNITS"
@@ -0,0 +1,91 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from aws_lambda_powertools import Logger
+
+from service.common.utils import get_env_int, get_env_or_raise
+from service.dao.batch_get import batch_get
+from service.lambdas.employer.constants import EmployerConstants
+
+logger = Logger()
+
+MAX_ENTRIES = 2048
+_DEFAULT_TTL_SECONDS = 60
+# unknown ids are cached for a shorter time, an employer created in another container shows up quickly
+_DEFAULT_NEGATIVE_TTL_SECONDS = 10
+
+
+class _EmployersCache:
+    """
+    Per container read-through LRU of employer items, expiring after EMPLOYERS_CACHE_TTL_SECONDS. Unknown employer
+    ids are cached as well, for EMPLOYERS_CACHE_NEGATIVE_TTL_SECONDS. Writes made in the same container invalidate
+    their entry, writes made elsewhere are seen once it expires.
+    """
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, clock: Callable[[], float] = time.monotonic):
+        self.__max_entries = max_entries
+        self.__clock = clock
+        self.__lock = threading.Lock()
+        # employer id -> (expiry, item), the item is None for an unknown id
+        self.__entries: 'OrderedDict[str, Tuple[float, Optional[Dict]]]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, employer_id: str) -> Optional[Dict]:
+        """
+        :return: a copy of the employer item, None if the employer does not exist
+        """
+        return self.get_many([employer_id]).get(employer_id)
+
+    def get_many(self, employer_ids: List[str]) -> Dict[str, Dict]:
+        """
+        :return: copies of the employer items found, by employer id. The missing ones are read with a single batch get.
+        """
+        found: Dict[str, Dict] = {}
+        missing: List[str] = []
+        now = self.__clock()
+        with self.__lock:
+            for employer_id in dict.fromkeys(employer_ids):
+                entry = self.__entries.get(employer_id)
+                if entry is None or entry[0] <= now:
+                    missing.append(employer_id)
+                    continue
+                self.__entries.move_to_end(employer_id)
+                self.hits += 1
+                if entry[1] is not None:
+                    found[employer_id] = copy.deepcopy(entry[1])
+            self.misses += len(missing)
+
+        if missing:
+            items = {item['employer_id']: item for item in batch_get(
+                get_env_or_raise(EmployerConstants.EMPLOYERS_TABLE_NAME),
+                [{"employer_id": employer_id} for employer_id in missing])}
+            ttl = get_env_int(EmployerConstants.EMPLOYERS_CACHE_TTL_SECONDS, _DEFAULT_TTL_SECONDS)
+            negative_ttl = get_env_int(EmployerConstants.EMPLOYERS_CACHE_NEGATIVE_TTL_SECONDS,
+                                       _DEFAULT_NEGATIVE_TTL_SECONDS)
+            with self.__lock:
+                for employer_id in missing:
+                    item = items.get(employer_id)
+                    self.__entries[employer_id] = (now + (ttl if item is not None else negative_ttl), item)
+                    self.__entries.move_to_end(employer_id)
+                    if item is not None:
+                        found[employer_id] = copy.deepcopy(item)
+                while len(self.__entries) > self.__max_entries:
+                    self.__entries.popitem(last=False)
+        return found
+
+    def invalidate(self, employer_id: str) -> None:
+        with self.__lock:
+            self.__entries.pop(employer_id, None)
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+employers_cache: _EmployersCache = _EmployersCache()
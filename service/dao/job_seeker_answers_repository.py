@@ -1,14 +1,24 @@
-from typing import List, Dict
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
 
 from aws_lambda_powertools import Logger
 from pydantic import BaseModel
 
-from service.common.exceptions import NotFoundError
-from service.dao.model.job_seeker_answers import JobSeekerAnswers, JOB_SEEKER_ANSWERS_PK, JOB_SEEKER_ANSWERS_SK_PREFIX
+from service.common.exceptions import ConflictError, NotFoundError
+from service.dao.model.job_seeker import SeekerSchemaMode, get_seeker_schema_mode
+from service.dao.model.job_seeker_answers import JobSeekerAnswers, JOB_SEEKER_ANSWERS_SK_PREFIX, \
+    JOB_SEEKER_ANSWERS_COLLECTION_SK, ANSWER_PATTERN_STATS_PK, ANSWER_PATTERN_STATS_SK, PARTIAL_ANSWER_PATTERN, \
+    ANSWER_PATTERN_INDEX_BUILT_SK, ANSWER_PATTERN_INDEX_BUILT_ATTRIBUTE
+from service.dao.match_results_cache import answers_match_cache, bump_generation, ANSWERS_GENERATION
 from service.dao.single_table_service import single_table_service
+from service.matching import AnswerVector, TopKCollector, pack_seeker_answers, pattern_to_str, patterns_by_score, \
+    score
 
 logger = Logger()
 
+T = TypeVar('T')
+
 
 class SearchResult(BaseModel):
     score: int
@@ -22,40 +32,216 @@ class _JobSeekerAnswersRepository:
         self.__single_table_service = single_table_service
 
     def create(self, job_seeker_answers: JobSeekerAnswers, user: str = None) -> None:
+        """
+        :raises ConflictError: if the seeker answers record is in a legacy place (dual schema mode), the put itself
+        is conditioned on no record being in the current place
+        """
         # if not user:
         #     user = SessionContext.get_user_name()
+        if get_seeker_schema_mode() == SeekerSchemaMode.DUAL:
+            written_key = (job_seeker_answers.produce_pk(), job_seeker_answers.produce_sk())
+            for pk, sk in JobSeekerAnswers.build_read_keys(job_seeker_answers.job_seeker_id):
+                if (pk, sk) != written_key and self.__single_table_service.find_by_pk_and_sk(pk, sk):
+                    raise ConflictError(f"JobSeeker with id='{job_seeker_answers.job_seeker_id}' answers already "
+                                        f"exist")
         logger.debug(f"saving file {job_seeker_answers.__str__()} to db")
         self.__single_table_service.create_item(job_seeker_answers, user)
+        self.__single_table_service.increment_counters(
+            JobSeekerAnswers.build_pattern_stats_pk(job_seeker_answers.job_seeker_id), ANSWER_PATTERN_STATS_SK,
+            {job_seeker_answers.produce_pattern(): 1})
+        bump_generation(ANSWERS_GENERATION)
 
     def get_by_seeker_id(self, job_seeker_id: str) -> Dict:
-        result_dict = self.__single_table_service.find_by_pk_and_sk(JobSeekerAnswers.build_pk(),
-                                                                    JobSeekerAnswers.build_sk(job_seeker_id))
-        if not result_dict:
-            raise NotFoundError(f"JobSeeker with id='{job_seeker_id}' answers not found")
-
-        return result_dict
+        for pk, sk in JobSeekerAnswers.build_read_keys(job_seeker_id):
+            result_dict = self.__single_table_service.find_by_pk_and_sk(pk, sk)
+            if result_dict:
+                return result_dict
 
-    def find_best_match_answers(self, answers: List[bool], max_results: int = 100) -> List[SearchResult]:
-
-        scores = []
+        raise NotFoundError(f"JobSeeker with id='{job_seeker_id}' answers not found")
 
+    def find_best_match_answers(self, answers: AnswerVector, max_results: int = 100) -> List[SearchResult]:
         try:
-            results = self.__single_table_service.find_by_pk_and_sk_begins_with(JOB_SEEKER_ANSWERS_PK,
-                                                                                JOB_SEEKER_ANSWERS_SK_PREFIX)
+            return answers_match_cache.get_or_compute(answers, max_results,
+                                                      lambda: self.__find_best_match_answers(answers, max_results))
         except Exception as err:
             logger.error(str(err))
-            return scores
+            return []
+
+    def __find_best_match_answers(self, answers: AnswerVector, max_results: int) -> List[SearchResult]:
+        pattern_counts = self.__read_pattern_counts()
+        if pattern_counts is None:
+            logger.warning("Answers pattern index was not built yet, reading the whole answers partition")
+            collector = self.__scan_best_match_answers(answers, max_results)
+        else:
+            collector = self.__query_best_match_answers(answers, max_results, pattern_counts)
+
+        return [SearchResult(score=item_score,
+                             job_seeker_id=item.get('job_seeker_id'),
+                             job_seeker_name=item.get('job_seeker_name')) for item_score, item in collector.results()]
+
+    def __read_pattern_counts(self) -> Optional[Dict[str, int]]:
+        """
+        :return: the number of answers records per pattern, summed over the stats shards, None until an index
+        rebuild completed
+        """
+        keys = [(pk, ANSWER_PATTERN_STATS_SK) for pk in JobSeekerAnswers.build_pattern_stats_pks()]
+        items = self.__single_table_service.batch_get_by_keys(
+            keys + [(ANSWER_PATTERN_STATS_PK, ANSWER_PATTERN_INDEX_BUILT_SK)])
+        if not any(item.get(ANSWER_PATTERN_INDEX_BUILT_ATTRIBUTE) for item in items):
+            return None
+
+        pattern_counts: Dict[str, int] = {}
+        for item in items:
+            for pattern, count in item.items():
+                if pattern != ANSWER_PATTERN_INDEX_BUILT_ATTRIBUTE:
+                    pattern_counts[pattern] = pattern_counts.get(pattern, 0) + int(count)
+        return pattern_counts
+
+    def __query_best_match_answers(self, answers: AnswerVector, max_results: int,
+                                   pattern_counts: Dict) -> TopKCollector:
+        # Reads the non empty answer patterns in order of decreasing score (increasing Hamming distance from the
+        # given answers) and stops as soon as no remaining pattern can make it into the results
+        collector = TopKCollector(max_results)
+
+        # a record moved to the seeker item collection may briefly be indexed from both places
+        seen = set()
+
+        # partially answered records do not have a pattern of their own, they are scored one by one
+        if pattern_counts.get(PARTIAL_ANSWER_PATTERN, 0) > 0:
+            for item in self.__single_table_service.iter_by_gsi1pk_and_gsi1sk_begins_with(
+                    JobSeekerAnswers.build_gsi1_pk(PARTIAL_ANSWER_PATTERN)):
+                if item['job_seeker_id'] not in seen:
+                    seen.add(item['job_seeker_id'])
+                    collector.add(score(answers, pack_seeker_answers(item)), item)
+
+        for pattern_score, pattern in patterns_by_score(answers):
+            capacity = collector.capacity_for(pattern_score)
+            if capacity <= 0:
+                break
+            pattern_str = pattern_to_str(pattern)
+            if pattern_counts.get(pattern_str, 0) <= 0:
+                continue
+            for item in self.__single_table_service.iter_by_gsi1pk_and_gsi1sk_begins_with(
+                    JobSeekerAnswers.build_gsi1_pk(pattern_str), limit=capacity):
+                if item['job_seeker_id'] not in seen:
+                    seen.add(item['job_seeker_id'])
+                    collector.add(pattern_score, item)
+
+        return collector
+
+    def __scan_best_match_answers(self, answers: AnswerVector, max_results: int) -> TopKCollector:
+        # every partition is read concurrently, keeping only its best max_results answers records, and the
+        # partitions results are merged in partition order
+        def _scan_partition(pk: Optional[str]) -> TopKCollector:
+            partition_collector = TopKCollector(max_results)
+            for item in self.__iter_partition(pk):
+                partition_collector.add(score(answers, pack_seeker_answers(item)), item)
+                if partition_collector.is_complete():
+                    break
+            return partition_collector
+
+        collector = TopKCollector(max_results)
+        seen = set()
+        for partition_collector in self.__fan_out(_scan_partition):
+            for item_score, item in partition_collector.results():
+                if item['job_seeker_id'] not in seen:
+                    seen.add(item['job_seeker_id'])
+                    collector.add(item_score, item)
+        return collector
+
+    def __iter_all_answers(self) -> Iterator[Dict]:
+        seen = set()
+        for items in self.__fan_out(lambda pk: list(self.__iter_partition(pk))):
+            for item in items:
+                if item['job_seeker_id'] not in seen:
+                    seen.add(item['job_seeker_id'])
+                    yield item
 
-        for item in results:
-            score = 0
-            for i in range(1, 10):
-                score += (answers[i - 1] == item.get('a' + str(i)))
-            scores.append(SearchResult(score=score,
-                                       job_seeker_id=item.get('job_seeker_id'),
-                                       job_seeker_name=item.get('job_seeker_name')))
+    def __iter_partition(self, pk: Optional[str]) -> Iterator[Dict]:
+        if pk is None:
+            # the records in the seeker item collections are not grouped in partitions of their own
+            return self.__single_table_service.iter_all_by_sk(JOB_SEEKER_ANSWERS_COLLECTION_SK)
+        return self.__single_table_service.iter_by_pk_and_sk_begins_with(pk, JOB_SEEKER_ANSWERS_SK_PREFIX)
 
-            # in the future it will be better to keep just higher scores up to max_results
-        return sorted(scores, key=lambda x: x.score, reverse=True)[:max_results]
+    @staticmethod
+    def __fan_out(read_partition: Callable[[Optional[str]], T]) -> List[T]:
+        """
+        Runs the read concurrently on every answers partition: the seeker item collections (None) unless in the
+        legacy layout, the shards, then the legacy single partition that holds the records not migrated yet
+
+        :return: the reads results, in partition order
+        """
+        pks: List[Optional[str]] = JobSeekerAnswers.build_shard_pks() + [JobSeekerAnswers.build_legacy_pk()]
+        if get_seeker_schema_mode() != SeekerSchemaMode.LEGACY:
+            pks = [None] + pks
+        with ThreadPoolExecutor(max_workers=len(pks), thread_name_prefix="answers-shards") as executor:
+            return list(executor.map(read_partition, pks))
+
+    def rebuild_answer_pattern_index(self) -> Dict[str, int]:
+        """
+        One-off backfill for answers records written before the pattern index existed: rewrites every record with
+        its GSI1 pattern keys, recounts the records per pattern in every stats shard, then marks the index built so
+        the searches start reading it. Should not run together with answers writes.
+
+        :return: the number of answers records per pattern
+        """
+        records = [JobSeekerAnswers(**item) for item in self.__iter_all_answers()]
+        shard_counts: Dict[str, Counter] = {pk: Counter() for pk in JobSeekerAnswers.build_pattern_stats_pks()}
+        for record in records:
+            shard_counts[JobSeekerAnswers.build_pattern_stats_pk(record.job_seeker_id)][record.produce_pattern()] += 1
+
+        self.__single_table_service.batch_write_items(records, add_creation_time=False, update_last_update_time=False)
+        for pk, counts in shard_counts.items():
+            self.__single_table_service.put_raw_item(pk, ANSWER_PATTERN_STATS_SK, dict(counts))
+        # the single stats item the counts were kept in before sharding
+        self.__single_table_service.remove_item(ANSWER_PATTERN_STATS_PK, ANSWER_PATTERN_STATS_SK)
+        self.__single_table_service.put_raw_item(ANSWER_PATTERN_STATS_PK, ANSWER_PATTERN_INDEX_BUILT_SK,
+                                                 {ANSWER_PATTERN_INDEX_BUILT_ATTRIBUTE: True})
+        pattern_counts = sum(shard_counts.values(), Counter())
+        logger.info(f"Answers pattern index rebuilt for '{len(records)}' records")
+        return dict(pattern_counts)
+
+    def migrate_to_shards(self) -> int:
+        """
+        One-off migration of the answers records from the legacy single partition to their shards. Each record is
+        written to its shard before it is removed from the legacy partition, reads find it in either place
+        meanwhile. Can be run again after a failure.
+
+        :return: number of migrated records
+        """
+        legacy_pk = JobSeekerAnswers.build_legacy_pk()
+        records = [JobSeekerAnswers(**item) for item in self.__single_table_service.iter_by_pk_and_sk_begins_with(
+            legacy_pk, JOB_SEEKER_ANSWERS_SK_PREFIX)]
+
+        self.__single_table_service.batch_write_items(records, add_creation_time=False, update_last_update_time=False)
+        self.__single_table_service.remove_items_by_keys([(legacy_pk, JobSeekerAnswers.build_shard_sk(
+            record.job_seeker_id)) for record in records])
+        logger.info(f"Migrated '{len(records)}' answers records to their shards")
+        return len(records)
+
+    def migrate_to_item_collections(self) -> int:
+        """
+        One-off migration of the answers records from the shards and the legacy single partition to the seeker item
+        collections, to run once in the dual layout. Each record is written to the collection before it is removed
+        from its previous place. Can be run again after a failure.
+
+        :return: number of migrated records
+        """
+        if get_seeker_schema_mode() == SeekerSchemaMode.LEGACY:
+            raise ValueError("Answers records can only be migrated to the item collections in the dual layout")
+
+        keys = []
+        records = []
+        for pk in JobSeekerAnswers.build_shard_pks() + [JobSeekerAnswers.build_legacy_pk()]:
+            for item in self.__single_table_service.iter_by_pk_and_sk_begins_with(pk, JOB_SEEKER_ANSWERS_SK_PREFIX):
+                record = JobSeekerAnswers(**item)
+                records.append(record)
+                keys.append((pk, JobSeekerAnswers.build_shard_sk(record.job_seeker_id)))
+
+        self.__single_table_service.batch_write_items(records, add_creation_time=False, update_last_update_time=False)
+        self.__single_table_service.remove_items_by_keys(keys)
+        logger.info(f"Migrated '{len(records)}' answers records to the seeker item collections")
+        return len(records)
 
     # def read(self, file_id: str) -> Dict:
     #     """
@@ -88,8 +274,33 @@ class _JobSeekerAnswersRepository:
     #
     def delete(self, job_seeker_id: str) -> None:
         logger.info(f"Deleting answers for job seeker id '{job_seeker_id}'")
-        self.__single_table_service.remove_item(JobSeekerAnswers.build_pk(),
-                                                JobSeekerAnswers.build_sk(job_seeker_id))
+        if self.__remove_records(JobSeekerAnswers.build_read_keys(job_seeker_id)):
+            bump_generation(ANSWERS_GENERATION)
+
+    def __remove_records(self, keys: List[Tuple[str, str]]) -> bool:
+        """
+        Removes the answers record from every given place, it is counted once in the pattern stats
+
+        :return: True if a record was removed
+        """
+        removed_item = None
+        for pk, sk in keys:
+            removed_item = self.__single_table_service.remove_item(pk, sk) or removed_item
+        if removed_item:
+            self.__uncount(removed_item)
+        return removed_item is not None
+
+    def record_removed(self, removed_item: Dict) -> None:
+        """
+        Accounts for an answers record removed from all its places by the caller (the seeker cascade delete)
+        """
+        self.__uncount(removed_item)
+        bump_generation(ANSWERS_GENERATION)
+
+    def __uncount(self, removed_item: Dict) -> None:
+        self.__single_table_service.increment_counters(
+            JobSeekerAnswers.build_pattern_stats_pk(removed_item['job_seeker_id']), ANSWER_PATTERN_STATS_SK,
+            {JobSeekerAnswers.build_pattern(pack_seeker_answers(removed_item)): -1})
 
 
 job_seeker_answers_repository: _JobSeekerAnswersRepository = _JobSeekerAnswersRepository()
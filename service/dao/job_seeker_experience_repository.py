@@ -1,9 +1,10 @@
-from typing import List
+from typing import Dict, List
 
 from aws_lambda_powertools import Logger
 
 from service.common.exceptions import NotFoundError
-from service.dao.model.experience import Experience, EXPERIENCE_SK_PREFIX
+from service.dao.model.experience import Experience, EXPERIENCE_LEGACY_PK_PREFIX, EXPERIENCE_SK_PREFIX
+from service.dao.model.job_seeker import SeekerSchemaMode, get_seeker_schema_mode
 from service.dao.single_table_service import single_table_service
 
 logger = Logger()
@@ -22,20 +23,43 @@ class _JobSeekerExperienceRepository:
         return Experience(**dict_ret)
 
     def get_all(self, job_seeker_id: str) -> List[Experience]:
-        dict_list = self.__single_table_service.find_by_pk_and_sk_begins_with(Experience.build_pk(job_seeker_id),
-                                                                              EXPERIENCE_SK_PREFIX)
-        return [Experience(**item) for item in dict_list]
+        experiences: Dict[str, Experience] = {}
+        for pk in Experience.build_read_pks(job_seeker_id):
+            for item in self.__single_table_service.find_by_pk_and_sk_begins_with(pk, EXPERIENCE_SK_PREFIX):
+                experience = Experience(**item)
+                # the first place read holds the latest copy
+                experiences.setdefault(experience.experience_id, experience)
+        return list(experiences.values())
 
     def get(self, job_seeker_id: str, experience_id: str) -> Experience:
-        dict_ret = self.__single_table_service.find_by_pk_and_sk(Experience.build_pk(job_seeker_id),
-                                                                 Experience.build_sk(experience_id))
-        if not dict_ret:
-            raise NotFoundError(f"JobSeeker experience with id='{experience_id}' not found")
-        return Experience(**dict_ret)
+        for pk in Experience.build_read_pks(job_seeker_id):
+            dict_ret = self.__single_table_service.find_by_pk_and_sk(pk, Experience.build_sk(experience_id))
+            if dict_ret:
+                return Experience.from_item(dict_ret)
+        raise NotFoundError(f"JobSeeker experience with id='{experience_id}' not found")
 
     def delete(self, job_seeker_id: str, experience_id: str) -> None:
-        self.__single_table_service.remove_item(pk=Experience.build_pk(job_seeker_id),
-                                                sk=Experience.build_sk(experience_id))
+        for pk in Experience.build_read_pks(job_seeker_id):
+            self.__single_table_service.remove_item(pk=pk, sk=Experience.build_sk(experience_id))
+
+    def migrate_to_item_collections(self) -> int:
+        """
+        One-off migration of the experiences from their legacy partitions to the seeker item collections, to run
+        once in the dual layout. Each experience is written to the collection before it is removed from its legacy
+        partition. Can be run again after a failure.
+
+        :return: number of migrated experiences
+        """
+        if get_seeker_schema_mode() == SeekerSchemaMode.LEGACY:
+            raise ValueError("Experiences can only be migrated to the item collections in the dual layout")
+
+        records = [Experience(**item) for item in
+                   self.__single_table_service.iter_all_by_pk_starts_with(EXPERIENCE_LEGACY_PK_PREFIX)]
+        self.__single_table_service.batch_write_items(records, add_creation_time=False, update_last_update_time=False)
+        self.__single_table_service.remove_items_by_keys([(Experience.build_legacy_pk(record.job_seeker_id),
+                                                           record.produce_sk()) for record in records])
+        logger.info(f"Migrated '{len(records)}' experiences to the seeker item collections")
+        return len(records)
 
     def update(self, experience: Experience, user: str = None) -> None:
         self.__single_table_service.update_item(experience, user)
@@ -1,16 +1,29 @@
-from typing import Dict
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
 
+from aws_lambda_context import LambdaContext
 from aws_lambda_powertools import Logger
 
-from service.common.exceptions import NotFoundError
+from service.common.concurrency import concurrent_calls
+from service.common.exceptions import NotFoundError, UnprocessedKeysError
 from service.dao.job_seeker_answers_repository import job_seeker_answers_repository
 from service.dao.job_seeker_experience_repository import job_seeker_experience_repository
-from service.dao.model.job_seeker import JobSeeker
+from service.dao.jobs_repository import jobs_repository
+from service.dao.model.experience import Experience, EXPERIENCE_SK_PREFIX
+from service.dao.model.job_seeker import JobSeeker, SeekerSchemaMode, get_seeker_schema_mode
+from service.dao.model.job_seeker_answers import JobSeekerAnswers, JOB_SEEKER_ANSWERS_COLLECTION_SK
+from service.dao.model.seeker_top_jobs import SeekerTopJobs
 from service.dao.single_table_service import single_table_service
+from service.dao.update_retry import update_retry
 
 logger = Logger()
 
 
+class SeekerSummary(NamedTuple):
+    profile: Dict
+    experiences: List[Experience]
+    answers: Optional[Dict]
+
+
 class _JobSeekerRepository:
 
     def __init__(self):
@@ -30,22 +43,150 @@ class _JobSeekerRepository:
 
         return job_seeker_record_dict
 
-    def delete(self, job_seeker_id: str) -> None:
-
-        # now remove the related experiences
-        experiences_list = job_seeker_experience_repository.get_all(job_seeker_id)
-        for experience in experiences_list:
-            job_seeker_experience_repository.delete(job_seeker_id=job_seeker_id,
-                                                    experience_id=experience.experience_id)
-
-        self.__single_table_service.remove_item(JobSeeker.build_pk(job_seeker_id),
-                                                JobSeeker.build_sk())
+    def get_summary(self, job_seeker_id: str, context: Optional[LambdaContext] = None) -> SeekerSummary:
+        """
+        :param context: the invocation context, bounding the concurrent reads of the legacy layout
+        :return: the seeker profile, experiences and answers (None if not answered yet). In the item collection
+        layout they are read with a single query.
+        """
+        mode = get_seeker_schema_mode()
+        if mode == SeekerSchemaMode.LEGACY:
+            def _get_answers() -> Optional[Dict]:
+                try:
+                    return job_seeker_answers_repository.get_by_seeker_id(job_seeker_id)
+                except NotFoundError:
+                    return None
+
+            profile, experiences, answers = concurrent_calls.run(
+                [lambda: self.get(job_seeker_id), lambda: job_seeker_experience_repository.get_all(job_seeker_id),
+                 _get_answers], context)
+            return SeekerSummary(profile=profile, experiences=experiences, answers=answers)
+
+        profile = None
+        experiences: Dict[str, Experience] = {}
+        answers = None
+        for sk, item in self.__single_table_service.find_item_collection(JobSeeker.build_pk(job_seeker_id)):
+            if sk == JobSeeker.build_sk():
+                profile = item
+            elif sk.startswith(EXPERIENCE_SK_PREFIX):
+                experience = Experience(**item)
+                experiences[experience.experience_id] = experience
+            elif sk == JOB_SEEKER_ANSWERS_COLLECTION_SK:
+                answers = item
+        if profile is None:
+            raise NotFoundError(f"JobSeeker with id='{job_seeker_id}' not found")
 
-        job_seeker_answers_repository.delete(job_seeker_id)
+        if mode == SeekerSchemaMode.DUAL:
+            # the records not migrated yet are still in their legacy places
+            for item in self.__find_legacy_experiences(job_seeker_id):
+                experience = Experience(**item)
+                experiences.setdefault(experience.experience_id, experience)
+            if answers is None:
+                # the first read key is the item collection one, already read
+                answers = self.__find_answers(JobSeekerAnswers.build_read_keys(job_seeker_id)[1:])
+
+        return SeekerSummary(profile=profile, experiences=list(experiences.values()), answers=answers)
+
+    def delete(self, job_seeker_id: str, context: Optional[LambdaContext] = None) -> None:
+        """
+        Cascade delete of the job seeker: the keys of every seeker record are gathered first, then removed with
+        batched writes while the seeker is removed from the jobs. Can be run again after a partial failure.
+
+        :param context: the invocation context, bounding the concurrent calls
+        :raises UnprocessedKeysError: with the (pk, sk) of the seeker records left
+        """
+        keys, answers = self.__gather_keys(job_seeker_id, context)
+        logger.info(f"Deleting '{len(keys)}' records of job seeker id '{job_seeker_id}'")
+
+        def _remove_records() -> None:
+            try:
+                self.__single_table_service.remove_items_by_keys(keys)
+            except UnprocessedKeysError as err:
+                logger.warning(f"'{len(err.unprocessed_keys)}' out of '{len(keys)}' records of job seeker id "
+                               f"'{job_seeker_id}' were left: {err.unprocessed_keys}")
+                # a run again would not find the answers record anymore to count it out of the pattern stats
+                if answers is not None and \
+                        not set(err.unprocessed_keys) & set(JobSeekerAnswers.build_read_keys(job_seeker_id)):
+                    job_seeker_answers_repository.record_removed(answers)
+                raise
+            if answers is not None:
+                job_seeker_answers_repository.record_removed(answers)
+
+        concurrent_calls.run([_remove_records, lambda: jobs_repository.remove_seeker(job_seeker_id)], context)
+
+    def __gather_keys(self, job_seeker_id: str,
+                      context: Optional[LambdaContext]) -> Tuple[List[Tuple[str, str]], Optional[Dict]]:
+        """
+        :return: (pk, sk) of every place a seeker record may be in, and the seeker answers record if any
+        """
+        # removing a missing item is a no-op, the answers record is removed from every place it may be in
+        keys = JobSeekerAnswers.build_read_keys(job_seeker_id)
+        if get_seeker_schema_mode() == SeekerSchemaMode.LEGACY:
+            experiences, answers = concurrent_calls.run(
+                [lambda: self.__find_legacy_experiences(job_seeker_id),
+                 lambda: self.__find_answers(JobSeekerAnswers.build_read_keys(job_seeker_id))], context)
+            keys += [(JobSeeker.build_pk(job_seeker_id), JobSeeker.build_sk()),
+                     (SeekerTopJobs.build_pk(job_seeker_id), SeekerTopJobs.build_sk())]
+        else:
+            pk = JobSeeker.build_pk(job_seeker_id)
+            collection = self.__single_table_service.find_item_collection(pk)
+            keys += [(pk, sk) for sk, _ in collection]
+            answers = next((item for sk, item in collection if sk == JOB_SEEKER_ANSWERS_COLLECTION_SK), None)
+            experiences = []
+            if get_seeker_schema_mode() == SeekerSchemaMode.DUAL:
+                experiences = self.__find_legacy_experiences(job_seeker_id)
+                if answers is None:
+                    answers = self.__find_answers(JobSeekerAnswers.build_read_keys(job_seeker_id)[1:])
+
+        legacy_pk = Experience.build_legacy_pk(job_seeker_id)
+        keys += [(legacy_pk, Experience.build_sk(item['experience_id'])) for item in experiences]
+        return list(dict.fromkeys(keys)), answers
+
+    def __find_legacy_experiences(self, job_seeker_id: str) -> List[Dict]:
+        return self.__single_table_service.find_by_pk_and_sk_begins_with(Experience.build_legacy_pk(job_seeker_id),
+                                                                         EXPERIENCE_SK_PREFIX)
+
+    def __find_answers(self, keys: List[Tuple[str, str]]) -> Optional[Dict]:
+        """
+        :return: the answers record in the first of the given places it is found in, None if in none of them
+        """
+        for pk, sk in keys:
+            answers = self.__single_table_service.find_by_pk_and_sk(pk, sk)
+            if answers is not None:
+                return answers
+        return None
+
+    def migrate_to_item_collections(self) -> Dict[str, int]:
+        """
+        One-off migration of the experiences and the answers records to the seeker item collections, to run once
+        in the dual layout before switching to the collection layout
+
+        :return: the number of migrated records, per record type
+        """
+        return {'experiences': job_seeker_experience_repository.migrate_to_item_collections(),
+                'answers': job_seeker_answers_repository.migrate_to_item_collections()}
 
     def update(self, job_seeker: JobSeeker, user: str = None) -> None:
         self.__single_table_service.update_item(job_seeker, user)
 
+    def update_with_retry(self, job_seeker_id: str, mutate: Callable[[JobSeeker], None],
+                          user: str = None) -> JobSeeker:
+        """
+        Applies the mutation to the stored profile and updates it, again on a fresh read when a concurrent update
+        won the version condition
+
+        :return: the updated profile
+        :raises NotFoundError: if there is no such job seeker
+        :raises ConflictError: if every attempt conflicted
+        """
+        def _save(job_seeker: JobSeeker) -> None:
+            self.update(job_seeker, user)
+            # a write deferred by a unit of work only conflicts once flushed
+            self.__single_table_service.flush_unit_of_work()
+
+        return update_retry.run(lambda: JobSeeker.from_item(self.get(job_seeker_id)), mutate, _save,
+                                f"JobSeeker '{job_seeker_id}'")
+
     # def read_by_customer_id(self, customer_id: str, file_type: FileType = None) -> List[Dict]:
     #     file_type_str = file_type.value if file_type else ""
     #     ret = self.__single_table_service.find_all_by_gsi1pk_and_gsi1sk_begins_with(
@@ -0,0 +1,248 @@
+import os
+import threading
+import time
+import zlib
+from datetime import datetime
+from decimal import Decimal
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import boto3
+from aws_lambda_powertools import Logger
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+
+from service.common.concurrency import concurrent_calls
+from service.common.utils import get_env_int, get_env_or_raise
+from service.dao.parallel_scan import parallel_scan
+from service.dao.single_table_service import single_table_service
+from service.lambdas.employer.constants import EmployerConstants
+from service.matching import AnswerVector, AnswersMatrix, build_answers_matrix, pack_job_answers
+
+logger = Logger()
+
+# Every job item is written under a sync key and indexed by its last modified time (last-modified-index), so the
+# jobs changed since a given time are read with one query per sync key. The sync keys spread the job writes over
+# JOBS_SYNC_SHARDS index partitions, the shard derived from the job id
+JOBS_SYNC_PK_ATTRIBUTE = "sync_pk"
+JOBS_SYNC_PK = "JOB"
+JOBS_SYNC_SHARDS = 8
+JOBS_LAST_MODIFIED_TIME_ATTRIBUTE = "last_modified_time"
+# deleted jobs are to be kept as tombstones, so warm caches learn about the delete on their next delta refresh. There
+# is no job delete yet: a job delete path must write one (with the sync pk and the last modified time), not remove
+# the item
+JOBS_TOMBSTONE_ATTRIBUTE = "deleted"
+# the packed answers of matchable jobs, the only job attributes (with the keys) projected into last-modified-index
+JOBS_ANSWER_BITS_ATTRIBUTE = "answer_bits"
+JOBS_ANSWERED_MASK_ATTRIBUTE = "answered_mask"
+# the lowest score of the job top seekers once the list is full, -1 before (see jobs_repository), also projected. The
+# top seekers writes touch the last modified time, so the delta refreshes keep the cached cutoffs current
+JOBS_TOP_SEEKERS_CUTOFF_ATTRIBUTE = "top_seekers_cutoff"
+# written by the match attributes backfill (deploy/backfill_job_match_attributes.py) once every job is in
+# last-modified-index. The jobs written before the packed answers are not in the index, so until then the full loads
+# scan the jobs table and pack the answers of the jobs missing them
+JOBS_MATCH_ATTRIBUTES_PK = "JOBS_MATCH_ATTRIBUTES"
+JOBS_MATCH_ATTRIBUTES_BACKFILLED_SK = "BACKFILLED"
+JOBS_MATCH_ATTRIBUTES_BACKFILLED_ATTRIBUTE = "backfilled"
+
+_DEFAULT_MAX_STALENESS_SECONDS = 30
+_DEFAULT_FULL_RELOAD_SECONDS = 900
+# delta refreshes re-read the jobs modified shortly before the previous sync, to cover writers with a skewed clock
+# and the eventually consistent index
+_WATERMARK_OVERLAP_SECONDS = 5
+
+_serializer = TypeSerializer()
+_deserializer = TypeDeserializer()
+
+
+def now_timestamp() -> Decimal:
+    return Decimal(str(datetime.now().timestamp()))
+
+
+def build_jobs_sync_pk(job_id: str) -> str:
+    return f"{JOBS_SYNC_PK}#{zlib.crc32(job_id.encode()) % JOBS_SYNC_SHARDS}"
+
+
+def build_jobs_sync_pks() -> List[str]:
+    # the jobs last written under the single JOBS_SYNC_PK key are only read by the full loads
+    return [f"{JOBS_SYNC_PK}#{shard}" for shard in range(JOBS_SYNC_SHARDS)]
+
+
+def unpack_job_item_answers(item: Dict) -> Optional[AnswerVector]:
+    """
+    :return: the packed answers stored on a job item, or None if the job is not matchable
+    """
+    if item.get(JOBS_ANSWER_BITS_ATTRIBUTE) is None or item.get(JOBS_ANSWERED_MASK_ATTRIBUTE) is None:
+        return None
+    return AnswerVector(bits=int(item[JOBS_ANSWER_BITS_ATTRIBUTE]), answered=int(item[JOBS_ANSWERED_MASK_ATTRIBUTE]))
+
+
+class JobKey(NamedTuple):
+    job_id: str
+    employer_id: Optional[str]
+    # None while the job has no top seekers list
+    top_seekers_cutoff: Optional[int] = None
+
+
+class JobsCorpus:
+    """
+    Immutable snapshot of the jobs corpus: the job keys, their packed answers at the same positions, and the
+    vectorized form of the answers when numpy is available
+    """
+
+    def __init__(self, job_keys: List[JobKey], answers: List[AnswerVector]):
+        self.job_keys = job_keys
+        self.answers = answers
+        self.matrix: Optional[AnswersMatrix] = build_answers_matrix(answers)
+
+
+class _JobsCorpusCache:
+    """
+    The keys, top seekers cutoffs and packed answers of the matchable jobs (the ones holding all answers), kept across
+    warm invocations. Only the narrow last-modified-index projection is read: the corpus is fully loaded once, then
+    refreshed with the jobs modified since the last sync whenever it is older than JOBS_CORPUS_MAX_STALENESS_SECONDS,
+    and fully reloaded every JOBS_CORPUS_FULL_RELOAD_SECONDS.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.__clock = clock
+        self.__lock = threading.Lock()
+        self.__jobs: Dict[str, Tuple[JobKey, AnswerVector]] = {}
+        self.__corpus: Optional[JobsCorpus] = None
+        self.__watermark: Optional[Decimal] = None
+        self.__last_sync: Optional[float] = None
+        self.__last_full_load: Optional[float] = None
+        self.__loader: Optional[threading.Thread] = None
+        self.__backfilled = False
+
+    def preload(self) -> None:
+        """
+        Starts the full corpus load on a background thread when JOBS_CORPUS_PRELOAD is set, meant to be called
+        during lambda init so the first invocation does not pay for it
+        """
+        if os.getenv(EmployerConstants.JOBS_CORPUS_PRELOAD, "").lower() != "true" or self.__loader is not None:
+            return
+        self.__loader = threading.Thread(target=self.__background_load, name="jobs-corpus-preload", daemon=True)
+        self.__loader.start()
+
+    def get_corpus(self) -> JobsCorpus:
+        """
+        :return: a snapshot of the corpus, no staler than JOBS_CORPUS_MAX_STALENESS_SECONDS. The snapshot is shared
+        between invocations and must not be modified.
+        """
+        loader = self.__loader
+        if loader is not None:
+            loader.join()
+
+        with self.__lock:
+            now = self.__clock()
+            if self.__last_full_load is None or \
+                    now - self.__last_full_load >= get_env_int(EmployerConstants.JOBS_CORPUS_FULL_RELOAD_SECONDS,
+                                                               _DEFAULT_FULL_RELOAD_SECONDS):
+                self.__full_load(now)
+            elif now - self.__last_sync >= get_env_int(EmployerConstants.JOBS_CORPUS_MAX_STALENESS_SECONDS,
+                                                       _DEFAULT_MAX_STALENESS_SECONDS):
+                self.__delta_refresh(now)
+
+            # the snapshot (and its matrix) is only rebuilt when the corpus changed
+            if self.__corpus is None:
+                entries = list(self.__jobs.values())
+                self.__corpus = JobsCorpus(job_keys=[job_key for job_key, _ in entries],
+                                           answers=[job_answers for _, job_answers in entries])
+            return self.__corpus
+
+    def __background_load(self) -> None:
+        try:
+            with self.__lock:
+                self.__full_load(self.__clock())
+        except Exception as err:
+            # the first get_corpus call will load the corpus instead
+            logger.exception(f"Jobs corpus preload failed: {str(err)}")
+
+    def __full_load(self, now: float) -> None:
+        watermark = now_timestamp()
+        jobs: Dict[str, Tuple[JobKey, AnswerVector]] = {}
+        if self.__match_attributes_backfilled():
+            items = parallel_scan(self.__jobs_table, IndexName=EmployerConstants.JOBS_LAST_MODIFIED_INDEX_NAME)
+        else:
+            logger.warning("Jobs match attributes were not backfilled yet, scanning the jobs table")
+            items = parallel_scan(self.__jobs_table,
+                                  ProjectionExpression="job_id, employer_id, #a, #b, #m, #d, #c",
+                                  ExpressionAttributeNames={"#a": "answers", "#b": JOBS_ANSWER_BITS_ATTRIBUTE,
+                                                            "#m": JOBS_ANSWERED_MASK_ATTRIBUTE,
+                                                            "#d": JOBS_TOMBSTONE_ATTRIBUTE,
+                                                            "#c": JOBS_TOP_SEEKERS_CUTOFF_ATTRIBUTE})
+        for item in items:
+            self.__apply(jobs, item)
+
+        self.__jobs = jobs
+        self.__corpus = None
+        self.__watermark = watermark
+        self.__last_sync = now
+        self.__last_full_load = now
+        logger.info(f"Jobs corpus loaded with '{len(jobs)}' matchable jobs")
+
+    def __delta_refresh(self, now: float) -> None:
+        watermark = now_timestamp()
+        since = self.__watermark - _WATERMARK_OVERLAP_SECONDS
+        jobs_table_name = get_env_or_raise(EmployerConstants.JOBS_TABLE_NAME)
+        # the shards are queried concurrently, with the low level client: it is thread safe, unlike the resource
+        dynamo_client = boto3.client("dynamodb")
+
+        def _query_shard(sync_pk: str) -> List[Dict]:
+            return [{name: _deserializer.deserialize(value) for name, value in item.items()}
+                    for item in self.__paginate(dynamo_client.query, TableName=jobs_table_name,
+                                                IndexName=EmployerConstants.JOBS_LAST_MODIFIED_INDEX_NAME,
+                                                KeyConditionExpression="#p = :p AND #t >= :t",
+                                                ExpressionAttributeNames={"#p": JOBS_SYNC_PK_ATTRIBUTE,
+                                                                          "#t": JOBS_LAST_MODIFIED_TIME_ATTRIBUTE},
+                                                ExpressionAttributeValues={":p": _serializer.serialize(sync_pk),
+                                                                           ":t": _serializer.serialize(since)})]
+
+        changed = 0
+        for items in concurrent_calls.run([lambda sync_pk=sync_pk: _query_shard(sync_pk)
+                                           for sync_pk in build_jobs_sync_pks()]):
+            for item in items:
+                self.__apply(self.__jobs, item)
+                changed += 1
+        if changed:
+            self.__corpus = None
+
+        self.__watermark = watermark
+        self.__last_sync = now
+        logger.debug(f"Jobs corpus refreshed with '{changed}' jobs modified since '{since}'")
+
+    def __match_attributes_backfilled(self) -> bool:
+        # never unset once written, so no longer read once seen
+        if not self.__backfilled:
+            item = single_table_service.find_by_pk_and_sk(JOBS_MATCH_ATTRIBUTES_PK,
+                                                          JOBS_MATCH_ATTRIBUTES_BACKFILLED_SK) or {}
+            self.__backfilled = bool(item.get(JOBS_MATCH_ATTRIBUTES_BACKFILLED_ATTRIBUTE))
+        return self.__backfilled
+
+    @staticmethod
+    def __apply(jobs: Dict[str, Tuple[JobKey, AnswerVector]], item: Dict) -> None:
+        # a job read from the table before the backfill may only have its answers list
+        job_answers = unpack_job_item_answers(item) or pack_job_answers(item.get('answers'))
+        if item.get(JOBS_TOMBSTONE_ATTRIBUTE) or job_answers is None:
+            jobs.pop(item['job_id'], None)
+        else:
+            cutoff = item.get(JOBS_TOP_SEEKERS_CUTOFF_ATTRIBUTE)
+            jobs[item['job_id']] = (JobKey(job_id=item['job_id'], employer_id=item.get('employer_id'),
+                                           top_seekers_cutoff=None if cutoff is None else int(cutoff)), job_answers)
+
+    @staticmethod
+    def __paginate(operation, **kwargs) -> Iterator[Dict]:
+        while True:
+            response = operation(**kwargs)
+            yield from response.get("Items", [])
+
+            last_evaluated_key = response.get('LastEvaluatedKey')
+            if not last_evaluated_key:
+                return
+            kwargs['ExclusiveStartKey'] = last_evaluated_key
+
+    @staticmethod
+    def __jobs_table():
+        return boto3.resource("dynamodb").Table(get_env_or_raise(EmployerConstants.JOBS_TABLE_NAME))
+
+
+jobs_corpus_cache: _JobsCorpusCache = _JobsCorpusCache()
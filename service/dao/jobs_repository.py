@@ -1,32 +1,369 @@
-from typing import List
+import uuid
+from typing import Dict, List, NamedTuple, Optional, Tuple
 
 import boto3
 from aws_lambda_powertools import Logger
-from pydantic import parse_obj_as
+from boto3.dynamodb.conditions import Attr, Key
+from botocore.exceptions import ClientError
+from pydantic import BaseModel, parse_obj_as
 
 from service.common.utils import get_env_or_raise
+from service.dao.batch_get import batch_get
+from service.dao.job_seeker_answers_repository import job_seeker_answers_repository, SearchResult
+from service.dao.jobs_corpus_cache import jobs_corpus_cache, now_timestamp, build_jobs_sync_pk, \
+    JOBS_SYNC_PK_ATTRIBUTE, JOBS_LAST_MODIFIED_TIME_ATTRIBUTE, JOBS_TOMBSTONE_ATTRIBUTE, JOBS_ANSWER_BITS_ATTRIBUTE, \
+    JOBS_ANSWERED_MASK_ATTRIBUTE, JOBS_MATCH_ATTRIBUTES_PK, JOBS_MATCH_ATTRIBUTES_BACKFILLED_SK, \
+    JOBS_MATCH_ATTRIBUTES_BACKFILLED_ATTRIBUTE, JOBS_TOP_SEEKERS_CUTOFF_ATTRIBUTE, unpack_job_item_answers
+from service.dao.match_results_cache import jobs_match_cache, bump_generation, JOBS_GENERATION
+from service.dao.model.job_top_seeker import JobTopSeekerLink
+from service.dao.parallel_scan import parallel_scan
+from service.dao.single_table_service import single_table_service
 from service.lambdas.employer.constants import EmployerConstants
-from service.models.employer.employer_job import EmployerJob, JobSearchResult
-
-NUM_OF_ANSWERS = 10
+from service.matching import AnswerVector, apply_ranking_change, pack_job_answers, score, top_k
+from service.models.common import Answer
+from service.models.employer.employer_job import EmployerJob, EmployerSummary, JobSearchResult
 
 logger = Logger()
 
+# the best matching seekers of a job are kept on the job item. The cutoff (lowest listed score once the list is
+# full, -1 before, JOBS_TOP_SEEKERS_CUTOFF_ATTRIBUTE) is a top level attribute kept in the warm jobs corpus, so seeker
+# answer changes find the jobs they may enter or leave without reading the lists
+JOBS_TOP_SEEKERS_ATTRIBUTE = "top_seekers"
+DEFAULT_TOP_SEEKERS = 100
+_MAX_TOP_SEEKERS_UPDATE_ATTEMPTS = 3
+
+
+class JobTopSeekers(BaseModel):
+    # best score first
+    top_seekers: List[SearchResult] = []
+    max_results: int
+    # True when top_seekers holds every answers record, so removing one of them leaves nothing to refill
+    exhaustive: bool = False
+    # False once a seeker left the list and only a full recompute can tell which seeker takes its place
+    complete: bool = True
+    # changes on every write, the incremental updates are conditioned on it
+    version: str
+
+    def cutoff(self) -> int:
+        if len(self.top_seekers) < self.max_results:
+            return -1
+        return self.top_seekers[-1].score
+
+
+class SeekerAnswersChange(NamedTuple):
+    job_seeker_id: str
+    job_seeker_name: str
+    answers: AnswerVector
+    # None for a new answers record
+    previous_answers: Optional[AnswerVector]
 
 
 class _JobsRepository:
-    def get_jobs(self, answers: List[bool], max_results: int) -> List[JobSearchResult]:
-        dynamo_resource = boto3.resource("dynamodb")
-        jobs_table = dynamo_resource.Table(get_env_or_raise(EmployerConstants.JOBS_TABLE_NAME))
-        results = parse_obj_as(List[EmployerJob], jobs_table.scan().get("Items", []))
-        jobs = []
-        for item in results:
-            if item.answers is not None and len(item.answers) == NUM_OF_ANSWERS:
-                score = 0
-                for i in range(1, NUM_OF_ANSWERS):
-                    score += (answers[i - 1] == item.answers[i - 1].answer)
-                jobs.append(JobSearchResult(score=score, employer_job=item))
-        return sorted(jobs, key=lambda x: x.score, reverse=True)[:max_results]
+    def get_jobs(self, answers: AnswerVector, max_results: int) -> List[JobSearchResult]:
+        return self.get_ranked_jobs(self.rank_jobs(answers, max_results))
+
+    def rank_jobs(self, answers: AnswerVector, max_results: int) -> List[Tuple[int, str]]:
+        """
+        Scores the cached key-only jobs corpus, no job record is read
+
+        :return: (score, job id) pairs of the best matching jobs, best score first
+        """
+        return jobs_match_cache.get_or_compute(answers, max_results, lambda: self.__rank_jobs(answers, max_results))
+
+    @staticmethod
+    def __rank_jobs(answers: AnswerVector, max_results: int) -> List[Tuple[int, str]]:
+        corpus = jobs_corpus_cache.get_corpus()
+        return [(item_score, corpus.job_keys[index].job_id)
+                for item_score, index in top_k(answers, corpus.answers, max_results, corpus.matrix)]
+
+    def get_ranked_jobs(self, ranking: List[Tuple[int, str]]) -> List[JobSearchResult]:
+        """
+        Reads the full records of ranked jobs, keeping the ranking order
+
+        :param ranking: (score, job id) pairs
+        """
+        items_by_id = self.get_by_ids([job_id for _, job_id in ranking])
+
+        # a job deleted after it was ranked is dropped
+        return [JobSearchResult(score=item_score, employer_job=EmployerJob.parse_obj(items_by_id[job_id]))
+                for item_score, job_id in ranking
+                if job_id in items_by_id and not items_by_id[job_id].get(JOBS_TOMBSTONE_ATTRIBUTE)]
+
+    def get_by_ids(self, job_ids: List[str]) -> Dict[str, Dict]:
+        """
+        :return: the job items found, by job id
+        """
+        items = batch_get(get_env_or_raise(EmployerConstants.JOBS_TABLE_NAME),
+                          [{'job_id': job_id} for job_id in job_ids])
+        return {item['job_id']: item for item in items}
+
+    def get_top_seekers(self, job_id: str) -> Tuple[Optional[Dict], Optional[JobTopSeekers]]:
+        """
+        :return: the job item (without the list) and its top seekers, None if the job or the list does not exist
+        """
+        item = self.__jobs_table().get_item(Key={"job_id": job_id}).get('Item')
+        if item is None or item.get(JOBS_TOMBSTONE_ATTRIBUTE):
+            return None, None
+        top_seekers = item.pop(JOBS_TOP_SEEKERS_ATTRIBUTE, None)
+        return item, JobTopSeekers.parse_obj(top_seekers) if top_seekers else None
+
+    def refresh_top_seekers(self, job_id: str, answers: AnswerVector,
+                            max_results: int = DEFAULT_TOP_SEEKERS) -> JobTopSeekers:
+        """
+        Computes the job top seekers over all the answers records and stores them, replacing the existing ones
+        """
+        results = job_seeker_answers_repository.find_best_match_answers(answers, max_results)
+        top_seekers = JobTopSeekers(top_seekers=results, max_results=max_results,
+                                    exhaustive=len(results) < max_results, version=uuid.uuid4().hex)
+        single_table_service.batch_write_items([JobTopSeekerLink(job_seeker_id=result.job_seeker_id, job_id=job_id)
+                                                for result in results],
+                                               add_creation_time=False, update_last_update_time=False)
+        self.__jobs_table().update_item(
+            Key={
+                "job_id": job_id
+            },
+            UpdateExpression="set #top_seekers=:l, #top_seekers_cutoff=:c, #last_modified_time=:t",
+            ConditionExpression="attribute_exists(job_id)",
+            ExpressionAttributeNames={
+                "#top_seekers": JOBS_TOP_SEEKERS_ATTRIBUTE,
+                "#top_seekers_cutoff": JOBS_TOP_SEEKERS_CUTOFF_ATTRIBUTE,
+                "#last_modified_time": JOBS_LAST_MODIFIED_TIME_ATTRIBUTE
+            },
+            ExpressionAttributeValues={
+                ":l": top_seekers.dict(),
+                ":c": top_seekers.cutoff(),
+                ":t": now_timestamp()
+            }
+        )
+        return top_seekers
+
+    def apply_seeker_answers(self, changes: List[SeekerAnswersChange]) -> int:
+        """
+        Moves changed seekers to their place in the top seekers of the jobs they may enter or leave: the cutoffs are
+        read from the warm jobs corpus, and only the jobs whose cutoff a seeker beats, or beat before, are read and
+        conditionally updated. Jobs without a list yet get one computed when it is first read.
+
+        :return: number of job updates
+        """
+        corpus = jobs_corpus_cache.get_corpus()
+        updated = 0
+        for job_key, job_answers in zip(corpus.job_keys, corpus.answers):
+            cutoff = job_key.top_seekers_cutoff
+            if cutoff is None:
+                continue
+            for change in changes:
+                seeker_score = score(job_answers, change.answers)
+                previous_score = None
+                if change.previous_answers is not None:
+                    previous_score = score(job_answers, change.previous_answers)
+                if not self.__may_change(cutoff, seeker_score, previous_score):
+                    continue
+                if self.__apply_top_seeker(job_key.job_id, change.job_seeker_id,
+                                           SearchResult(score=seeker_score, job_seeker_id=change.job_seeker_id,
+                                                        job_seeker_name=change.job_seeker_name)):
+                    updated += 1
+
+        logger.debug(f"'{len(changes)}' job seeker answer changes applied with '{updated}' job updates")
+        return updated
+
+    @staticmethod
+    def __may_change(cutoff: int, seeker_score: int, previous_score: Optional[int]) -> bool:
+        # a seeker enters a list it beats, and may have to leave or move down a list it was scored into
+        return seeker_score > cutoff or (previous_score is not None and previous_score >= cutoff)
+
+    def remove_seeker(self, job_seeker_id: str) -> int:
+        """
+        Removes a deleted seeker from the top seekers of every job listing it, found with the seeker reverse index
+
+        :return: number of updated jobs
+        """
+        links = single_table_service.find_item_collection(JobTopSeekerLink.build_pk(job_seeker_id))
+        updated = 0
+        for _, link in links:
+            if self.__apply_top_seeker(link['job_id'], job_seeker_id, None):
+                updated += 1
+        single_table_service.remove_items_by_keys([(JobTopSeekerLink.build_pk(job_seeker_id), sk)
+                                                   for sk, _ in links])
+        return updated
+
+    def __apply_top_seeker(self, job_id: str, job_seeker_id: str, result: Optional[SearchResult]) -> bool:
+        # the write is conditioned on the version that was read, a concurrent write is re-read and re-applied
+        linked = False
+        for _ in range(_MAX_TOP_SEEKERS_UPDATE_ATTEMPTS):
+            _, top_seekers = self.get_top_seekers(job_id)
+            if top_seekers is None:
+                return False
+            change = apply_ranking_change(top_seekers.top_seekers, job_seeker_id, result, top_seekers.max_results,
+                                          top_seekers.exhaustive, id_of=lambda top_seeker: top_seeker.job_seeker_id)
+            if change is None:
+                return False
+            if result is not None and not linked and any(top_seeker.job_seeker_id == job_seeker_id
+                                                         for top_seeker in change.items):
+                # before the list, so a listed seeker is always found on delete
+                single_table_service.batch_write_items([JobTopSeekerLink(job_seeker_id=job_seeker_id, job_id=job_id)],
+                                                       add_creation_time=False, update_last_update_time=False)
+                linked = True
+
+            expected_version = top_seekers.version
+            top_seekers.top_seekers = change.items
+            top_seekers.exhaustive = change.exhaustive
+            top_seekers.complete = top_seekers.complete and change.complete
+            top_seekers.version = uuid.uuid4().hex
+            try:
+                self.__jobs_table().update_item(
+                    Key={
+                        "job_id": job_id
+                    },
+                    UpdateExpression="set #top_seekers=:l, #top_seekers_cutoff=:c, #last_modified_time=:t",
+                    ConditionExpression="#top_seekers.version = :v",
+                    ExpressionAttributeNames={
+                        "#top_seekers": JOBS_TOP_SEEKERS_ATTRIBUTE,
+                        "#top_seekers_cutoff": JOBS_TOP_SEEKERS_CUTOFF_ATTRIBUTE,
+                        "#last_modified_time": JOBS_LAST_MODIFIED_TIME_ATTRIBUTE
+                    },
+                    ExpressionAttributeValues={
+                        ":l": top_seekers.dict(),
+                        ":c": top_seekers.cutoff(),
+                        ":v": expected_version,
+                        ":t": now_timestamp()
+                    }
+                )
+                return True
+            except ClientError as err:
+                if err.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    raise
+
+        # left for the recompute on read
+        logger.warning(f"Job seeker '{job_seeker_id}' was not applied to the top seekers of job '{job_id}', "
+                       f"too many concurrent writes")
+        return False
+
+    def create(self, employer_job: EmployerJob) -> None:
+        item = employer_job.dict(exclude_none=True)
+        item[JOBS_SYNC_PK_ATTRIBUTE] = build_jobs_sync_pk(employer_job.job_id)
+        item[JOBS_LAST_MODIFIED_TIME_ATTRIBUTE] = now_timestamp()
+        job_answers = pack_job_answers(employer_job.answers)
+        if job_answers is not None:
+            item[JOBS_ANSWER_BITS_ATTRIBUTE] = job_answers.bits
+            item[JOBS_ANSWERED_MASK_ATTRIBUTE] = job_answers.answered
+        self.__jobs_table().put_item(Item=item)
+        bump_generation(JOBS_GENERATION)
+
+    def update_answers(self, job_id: str, answers: List[Answer]) -> None:
+        update_expression = "set answers=:a, #sync_pk=:s, #last_modified_time=:t"
+        names = {
+            "#sync_pk": JOBS_SYNC_PK_ATTRIBUTE,
+            "#last_modified_time": JOBS_LAST_MODIFIED_TIME_ATTRIBUTE,
+            "#answer_bits": JOBS_ANSWER_BITS_ATTRIBUTE,
+            "#answered_mask": JOBS_ANSWERED_MASK_ATTRIBUTE,
+            "#top_seekers": JOBS_TOP_SEEKERS_ATTRIBUTE,
+            "#top_seekers_cutoff": JOBS_TOP_SEEKERS_CUTOFF_ATTRIBUTE
+        }
+        values = {
+            ":a": [a.dict() for a in answers],
+            ":s": build_jobs_sync_pk(job_id),
+            ":t": now_timestamp()
+        }
+        job_answers = pack_job_answers(answers)
+        if job_answers is not None:
+            update_expression += ", #answer_bits=:b, #answered_mask=:m"
+            values[":b"] = job_answers.bits
+            values[":m"] = job_answers.answered
+            update_expression += " remove #top_seekers, #top_seekers_cutoff"
+        else:
+            update_expression += " remove #answer_bits, #answered_mask, #top_seekers, #top_seekers_cutoff"
+
+        self.__jobs_table().update_item(
+            Key={
+                "job_id": job_id
+            },
+            UpdateExpression=update_expression,
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=values
+        )
+        bump_generation(JOBS_GENERATION)
+
+    def update_employer_summary(self, employer_id: str, summary: EmployerSummary) -> int:
+        """
+        Rewrites the employer summary embedded in every job of the employer, found with the employer id index
+
+        :return: number of updated jobs
+        """
+        jobs_table = self.__jobs_table()
+        query_kwargs = {
+            'IndexName': EmployerConstants.JOBS_EMPLOYER_INDEX_NAME,
+            'KeyConditionExpression': Key('employer_id').eq(employer_id),
+            'FilterExpression': Attr(JOBS_TOMBSTONE_ATTRIBUTE).not_exists(),
+            'ProjectionExpression': 'job_id'
+        }
+        updated = 0
+        while True:
+            response = jobs_table.query(**query_kwargs)
+            for item in response.get('Items', []):
+                try:
+                    # not a match attribute, last_modified_time and the match generation are left as is
+                    jobs_table.update_item(Key={"job_id": item['job_id']},
+                                           UpdateExpression="set employer_summary=:s",
+                                           ConditionExpression=Attr('job_id').exists() &
+                                           Attr(JOBS_TOMBSTONE_ATTRIBUTE).not_exists(),
+                                           ExpressionAttributeValues={":s": summary.dict()})
+                    updated += 1
+                except ClientError as err:
+                    if err.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                        raise
+                    # deleted since the (eventually consistent) index was read
+
+            last_evaluated_key = response.get('LastEvaluatedKey')
+            if not last_evaluated_key:
+                break
+            query_kwargs['ExclusiveStartKey'] = last_evaluated_key
+
+        logger.info(f"Employer summary updated on '{updated}' jobs of employer id '{employer_id}'")
+        return updated
+
+    def backfill_match_attributes(self) -> int:
+        """
+        One-off backfill for jobs written before the packed answers existed: stores the packed answers and the
+        last-modified-index keys on every matchable job missing them, then marks the backfill done so the corpus full
+        loads read the index instead of the table. Can be run again after a failure.
+
+        :return: number of updated jobs
+        """
+        updated = 0
+        for item in parallel_scan(self.__jobs_table, ProjectionExpression="job_id, answers, #b, #m, #d",
+                                  ExpressionAttributeNames={"#b": JOBS_ANSWER_BITS_ATTRIBUTE,
+                                                            "#m": JOBS_ANSWERED_MASK_ATTRIBUTE,
+                                                            "#d": JOBS_TOMBSTONE_ATTRIBUTE}):
+            if item.get(JOBS_TOMBSTONE_ATTRIBUTE) or unpack_job_item_answers(item) is not None \
+                    or pack_job_answers(item.get('answers')) is None:
+                continue
+            self.update_answers(item['job_id'], parse_obj_as(List[Answer], item['answers']))
+            updated += 1
+
+        single_table_service.put_raw_item(JOBS_MATCH_ATTRIBUTES_PK, JOBS_MATCH_ATTRIBUTES_BACKFILLED_SK,
+                                          {JOBS_MATCH_ATTRIBUTES_BACKFILLED_ATTRIBUTE: True})
+        logger.info(f"Match attributes backfilled on '{updated}' jobs")
+        return updated
+
+    def backfill_top_seeker_links(self) -> int:
+        """
+        One-off backfill for the top seekers listed before the seeker reverse index existed
+
+        :return: number of written links
+        """
+        links = []
+        for item in parallel_scan(self.__jobs_table, ProjectionExpression="job_id, #l",
+                                  ExpressionAttributeNames={"#l": JOBS_TOP_SEEKERS_ATTRIBUTE}):
+            links.extend(JobTopSeekerLink(job_seeker_id=top_seeker['job_seeker_id'], job_id=item['job_id'])
+                         for top_seeker in item.get(JOBS_TOP_SEEKERS_ATTRIBUTE, {}).get('top_seekers', []))
+        single_table_service.batch_write_items(links, add_creation_time=False, update_last_update_time=False)
+
+        logger.info(f"'{len(links)}' top seeker links backfilled")
+        return len(links)
+
+    @staticmethod
+    def __jobs_table():
+        return boto3.resource("dynamodb").Table(get_env_or_raise(EmployerConstants.JOBS_TABLE_NAME))
 
 
 jobs_repository: _JobsRepository = _JobsRepository()
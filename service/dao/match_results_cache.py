@@ -0,0 +1,116 @@
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+from aws_lambda_powertools import Logger
+
+from service.common.utils import get_env_int
+from service.dao.constants import EnvVarNames
+from service.dao.single_table_service import single_table_service
+from service.matching import FULL_MASK, AnswerVector
+
+logger = Logger()
+
+# one generation counter item per matching corpus (the sort key), bumped on every write to that corpus, so the writes
+# to one corpus leave the results cached over the other one
+MATCH_GENERATION_PK = "MATCH_GENERATION"
+MATCH_GENERATION_ATTRIBUTE = "generation"
+JOBS_GENERATION = "jobs"
+ANSWERS_GENERATION = "answers"
+
+MAX_ENTRIES = 1024
+# results are also dropped after this age, since the corpus they are computed from may itself lag behind the writes
+# (see the jobs corpus cache staleness bound)
+_DEFAULT_TTL_SECONDS = 30
+# the generation read is reused for this long, so a container reads it about once per invocation at most
+_DEFAULT_GENERATION_CHECK_SECONDS = 1
+
+
+_caches: 'weakref.WeakSet[MatchResultsCache]' = weakref.WeakSet()
+
+
+def bump_generation(generation: str) -> None:
+    # called after the corpus write succeeded, a failure only leaves cached results around until they expire
+    try:
+        single_table_service.increment_counters(MATCH_GENERATION_PK, generation, {MATCH_GENERATION_ATTRIBUTE: 1})
+    except Exception as err:
+        logger.warning(f"Failed to bump the '{generation}' match generation: {str(err)}")
+        return
+    # the container own writes are seen right away, not after the generation check interval
+    for cache in _caches:
+        if cache.generation_name == generation:
+            cache.invalidate_generation()
+
+
+class MatchResultsCache:
+    """
+    Per container LRU of match results keyed by the packed answers (and the number of results), dropped as a whole
+    whenever the corpus generation stored in DynamoDB changes. The generation is read again once the previous read
+    is older than MATCH_GENERATION_CHECK_SECONDS
+    """
+
+    def __init__(self, generation: str, max_entries: int = MAX_ENTRIES, clock: Callable[[], float] = time.monotonic):
+        self.generation_name = generation
+        self.__max_entries = max_entries
+        self.__clock = clock
+        self.__lock = threading.Lock()
+        self.__entries: 'OrderedDict[Hashable, Tuple[float, List]]' = OrderedDict()
+        self.__generation = None
+        # (read time, generation) of the last generation read
+        self.__generation_read: Optional[Tuple[float, int]] = None
+        self.hits = 0
+        self.misses = 0
+        _caches.add(self)
+
+    def invalidate_generation(self) -> None:
+        with self.__lock:
+            self.__generation_read = None
+
+    def get_or_compute(self, answers: AnswerVector, max_results: int, compute: Callable[[], List]) -> List:
+        try:
+            generation = self.__read_generation()
+        except Exception as err:
+            logger.warning(f"Failed to read the '{self.generation_name}' match generation: {str(err)}")
+            return compute()
+
+        key = (answers.bits & answers.answered & FULL_MASK, answers.answered & FULL_MASK, max_results)
+        now = self.__clock()
+        with self.__lock:
+            if generation != self.__generation:
+                self.__entries.clear()
+                self.__generation = generation
+            entry = self.__entries.get(key)
+            if entry is not None and now - entry[0] < get_env_int(EnvVarNames.MATCH_CACHE_TTL_SECONDS,
+                                                                                   _DEFAULT_TTL_SECONDS):
+                self.__entries.move_to_end(key)
+                self.hits += 1
+                return list(entry[1])
+            self.misses += 1
+
+        results = compute()
+        with self.__lock:
+            if generation == self.__generation:
+                self.__entries[key] = (now, list(results))
+                self.__entries.move_to_end(key)
+                while len(self.__entries) > self.__max_entries:
+                    self.__entries.popitem(last=False)
+        return results
+
+    def __read_generation(self) -> int:
+        now = self.__clock()
+        with self.__lock:
+            if self.__generation_read is not None and now - self.__generation_read[0] < get_env_int(
+                    EnvVarNames.MATCH_GENERATION_CHECK_SECONDS, _DEFAULT_GENERATION_CHECK_SECONDS):
+                return self.__generation_read[1]
+
+        item: Dict = single_table_service.find_by_pk_and_sk(MATCH_GENERATION_PK, self.generation_name) or {}
+        generation = int(item.get(MATCH_GENERATION_ATTRIBUTE, 0))
+        with self.__lock:
+            self.__generation_read = (now, generation)
+        return generation
+
+
+jobs_match_cache: MatchResultsCache = MatchResultsCache(JOBS_GENERATION)
+answers_match_cache: MatchResultsCache = MatchResultsCache(ANSWERS_GENERATION)
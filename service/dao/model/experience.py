@@ -1,10 +1,12 @@
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
 from pydantic.main import BaseModel
 
+from service.dao.model.job_seeker import JobSeeker, SeekerSchemaMode, get_seeker_schema_mode
 from service.dao.single_table_service import SingleTableRecord, DATA_DELIMITER
 
-_EXPERIENCE_PK_PREFIX = "EXPERIENCE_BY_JOB_SEEKER_ID" + DATA_DELIMITER
+# partition of the seeker experiences in the legacy layout
+EXPERIENCE_LEGACY_PK_PREFIX = "EXPERIENCE_BY_JOB_SEEKER_ID" + DATA_DELIMITER
 EXPERIENCE_SK_PREFIX = "EXPERIENCE_ID" + DATA_DELIMITER
 
 class Experience(BaseModel, SingleTableRecord):
@@ -28,7 +30,22 @@ class Experience(BaseModel, SingleTableRecord):
 
     @staticmethod
     def build_pk(job_seeker_id: str):
-        return _EXPERIENCE_PK_PREFIX + job_seeker_id
+        if get_seeker_schema_mode() == SeekerSchemaMode.LEGACY:
+            return Experience.build_legacy_pk(job_seeker_id)
+        return JobSeeker.build_pk(job_seeker_id)
+
+    @staticmethod
+    def build_legacy_pk(job_seeker_id: str):
+        return EXPERIENCE_LEGACY_PK_PREFIX + job_seeker_id
+
+    @staticmethod
+    def build_read_pks(job_seeker_id: str) -> List[str]:
+        """
+        :return: the partitions the seeker experiences may be in, in read order
+        """
+        if get_seeker_schema_mode() == SeekerSchemaMode.DUAL:
+            return [JobSeeker.build_pk(job_seeker_id), Experience.build_legacy_pk(job_seeker_id)]
+        return [Experience.build_pk(job_seeker_id)]
 
     @staticmethod
     def build_sk(experience_id: str):
@@ -1,7 +1,10 @@
+import os
+from enum import Enum
 from typing import Dict, List, Optional
 
 from pydantic.main import BaseModel
 
+from service.dao.constants import EnvVarNames
 from service.dao.single_table_service import SingleTableRecord, DATA_DELIMITER
 
 JOB_SEEKER_PK_PREFIX = "JOB_SEEKER" + DATA_DELIMITER
@@ -9,6 +12,22 @@ FILES_PK1_CUSTOMER_ID_PREFIX = "CUSTOMER" + DATA_DELIMITER
 FILES_SK1_TYPE_PREFIX = "TYPE" + DATA_DELIMITER
 
 
+class SeekerSchemaMode(str, Enum):
+    """
+    Layout of the job seeker records. In the item collection layout all the records of a seeker (profile,
+    experiences, answers, top jobs) share the seeker partition key and are told apart by their sort key prefix.
+    """
+    # experiences and answers in their own partitions
+    LEGACY = "legacy"
+    # cutover: writes go to the item collection, reads fall back to the legacy partitions
+    DUAL = "dual"
+    COLLECTION = "collection"
+
+
+def get_seeker_schema_mode() -> SeekerSchemaMode:
+    return SeekerSchemaMode(os.getenv(EnvVarNames.SEEKER_SCHEMA_MODE, SeekerSchemaMode.LEGACY.value))
+
+
 class JobSeeker(BaseModel, SingleTableRecord):
 
     # def __init__(self, **kwargs):
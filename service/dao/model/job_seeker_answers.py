@@ -1,11 +1,32 @@
-from typing import Dict, Optional
+import zlib
+from typing import Dict, List, Optional, Tuple
 
 from pydantic import BaseModel
 
+from service.dao.model.job_seeker import JobSeeker, SeekerSchemaMode, get_seeker_schema_mode
 from service.dao.single_table_service import DATA_DELIMITER, SingleTableRecord
+from service.matching import FULL_MASK, AnswerVector, pack_seeker_answers, pattern_to_str
 
+# answers records are spread over JOB_SEEKER_ANSWERS_SHARDS partitions, the shard derived from the seeker id.
+# Changing the number of shards requires migrating the records
 JOB_SEEKER_ANSWERS_PK = "JOB_SEEKER_ANSWER"
+JOB_SEEKER_ANSWERS_SHARDS = 8
 JOB_SEEKER_ANSWERS_SK_PREFIX = "JOB_SEEKER_ID"
+# sort key of the answers record in the seeker item collection
+JOB_SEEKER_ANSWERS_COLLECTION_SK = "ANSWERS"
+
+# answers records are indexed in GSI1 by their answers pattern, partially answered records share one pattern key
+ANSWER_PATTERN_GSI1_PK_PREFIX = "ANSWER_PATTERN" + DATA_DELIMITER
+PARTIAL_ANSWER_PATTERN = "PARTIAL"
+
+# number of answers records per pattern, so only non empty patterns are queried. The counts are spread over
+# JOB_SEEKER_ANSWERS_SHARDS items, a record counted in the shard of its seeker id, and summed on read
+ANSWER_PATTERN_STATS_PK = "ANSWER_PATTERN_STATS"
+ANSWER_PATTERN_STATS_SK = DATA_DELIMITER
+# written by the index rebuild only (deploy/build_answer_pattern_index.py), once every record is indexed and counted:
+# the counts are not trusted before
+ANSWER_PATTERN_INDEX_BUILT_SK = "INDEX_BUILT"
+ANSWER_PATTERN_INDEX_BUILT_ATTRIBUTE = "index_built"
 
 
 class JobSeekerAnswers(BaseModel, SingleTableRecord):
@@ -36,24 +57,97 @@ class JobSeekerAnswers(BaseModel, SingleTableRecord):
     version: int = 0
 
     @staticmethod
-    def build_pk():
+    def build_pk(job_seeker_id: str):
+        if get_seeker_schema_mode() == SeekerSchemaMode.LEGACY:
+            return JobSeekerAnswers.build_shard_pk(job_seeker_id)
+        return JobSeeker.build_pk(job_seeker_id)
+
+    @staticmethod
+    def build_shard(job_seeker_id: str) -> int:
+        return zlib.crc32(job_seeker_id.encode()) % JOB_SEEKER_ANSWERS_SHARDS
+
+    @staticmethod
+    def build_shard_pk(job_seeker_id: str):
+        return JOB_SEEKER_ANSWERS_PK + DATA_DELIMITER + str(JobSeekerAnswers.build_shard(job_seeker_id))
+
+    @staticmethod
+    def build_shard_pks() -> List[str]:
+        return [JOB_SEEKER_ANSWERS_PK + DATA_DELIMITER + str(shard) for shard in range(JOB_SEEKER_ANSWERS_SHARDS)]
+
+    @staticmethod
+    def build_legacy_pk():
+        # the single partition all the records were written to before sharding
         return JOB_SEEKER_ANSWERS_PK
 
     @staticmethod
     def build_sk(job_seeker_id: str):
+        if get_seeker_schema_mode() == SeekerSchemaMode.LEGACY:
+            return JobSeekerAnswers.build_shard_sk(job_seeker_id)
+        return JOB_SEEKER_ANSWERS_COLLECTION_SK
+
+    @staticmethod
+    def build_shard_sk(job_seeker_id: str):
+        # the sort key in the shards and the legacy partition
         return JOB_SEEKER_ANSWERS_SK_PREFIX + DATA_DELIMITER + job_seeker_id
 
+    @staticmethod
+    def build_read_keys(job_seeker_id: str) -> List[Tuple[str, str]]:
+        """
+        :return: (pk, sk) of the places the seeker answers record may be in, in read order
+        """
+        shard_keys = [(JobSeekerAnswers.build_shard_pk(job_seeker_id), JobSeekerAnswers.build_shard_sk(job_seeker_id)),
+                      # not migrated to its shard yet
+                      (JobSeekerAnswers.build_legacy_pk(), JobSeekerAnswers.build_shard_sk(job_seeker_id))]
+        collection_keys = [(JobSeeker.build_pk(job_seeker_id), JOB_SEEKER_ANSWERS_COLLECTION_SK)]
+        mode = get_seeker_schema_mode()
+        if mode == SeekerSchemaMode.LEGACY:
+            return shard_keys
+        if mode == SeekerSchemaMode.DUAL:
+            return collection_keys + shard_keys
+        return collection_keys
+
+    @staticmethod
+    def is_answers_item(item: Dict) -> bool:
+        """
+        :return: True for an answers record read raw (a stream image), in any of the places it may be in
+        """
+        if item['sk'] == JOB_SEEKER_ANSWERS_COLLECTION_SK:
+            return True
+        return item['pk'].startswith(JOB_SEEKER_ANSWERS_PK) and \
+            item['sk'].startswith(JOB_SEEKER_ANSWERS_SK_PREFIX + DATA_DELIMITER)
+
+    @staticmethod
+    def build_pattern(answers: AnswerVector) -> str:
+        if answers.answered != FULL_MASK:
+            return PARTIAL_ANSWER_PATTERN
+        return pattern_to_str(answers.bits)
+
+    @staticmethod
+    def build_pattern_stats_pk(job_seeker_id: str):
+        return ANSWER_PATTERN_STATS_PK + DATA_DELIMITER + str(JobSeekerAnswers.build_shard(job_seeker_id))
+
+    @staticmethod
+    def build_pattern_stats_pks() -> List[str]:
+        return [ANSWER_PATTERN_STATS_PK + DATA_DELIMITER + str(shard) for shard in range(JOB_SEEKER_ANSWERS_SHARDS)]
+
+    @staticmethod
+    def build_gsi1_pk(pattern: str):
+        return ANSWER_PATTERN_GSI1_PK_PREFIX + pattern
+
+    def produce_pattern(self) -> str:
+        return self.build_pattern(pack_seeker_answers(self.dict()))
+
     def produce_pk(self) -> str:
-        return self.build_pk()
+        return self.build_pk(self.job_seeker_id)
 
     def produce_sk(self) -> str:
         return self.build_sk(self.job_seeker_id)
 
     def produce_gsi1_pk(self) -> Optional[str]:
-        return None
+        return self.build_gsi1_pk(self.produce_pattern())
 
     def produce_gsi1_sk(self) -> Optional[str]:
-        return None
+        return self.build_shard_sk(self.job_seeker_id)
 
     def as_dict(self) -> Dict:
         return self.__dict__
@@ -0,0 +1,38 @@
+from typing import Dict, Optional
+
+from pydantic import BaseModel
+
+from service.dao.single_table_service import DATA_DELIMITER, SingleTableRecord
+
+# reverse index of the jobs top seekers: one item per job a seeker was listed in, under a partition of the seeker, so a
+# deleted seeker is taken out of its lists without scanning the jobs. Written before the seeker enters a list and left
+# when it leaves one, a stale item only costs a job read on delete
+JOB_TOP_SEEKER_PK_PREFIX = "JOB_TOP_SEEKER"
+
+
+class JobTopSeekerLink(BaseModel, SingleTableRecord):
+    job_seeker_id: str
+    job_id: str
+
+    @staticmethod
+    def build_pk(job_seeker_id: str):
+        return JOB_TOP_SEEKER_PK_PREFIX + DATA_DELIMITER + job_seeker_id
+
+    @staticmethod
+    def build_sk(job_id: str):
+        return job_id
+
+    def produce_pk(self) -> str:
+        return self.build_pk(self.job_seeker_id)
+
+    def produce_sk(self) -> str:
+        return self.build_sk(self.job_id)
+
+    def produce_gsi1_pk(self) -> Optional[str]:
+        return None
+
+    def produce_gsi1_sk(self) -> Optional[str]:
+        return None
+
+    def as_dict(self) -> Dict:
+        return self.dict()
@@ -0,0 +1,112 @@
+import zlib
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel
+
+from service.dao.model.job_seeker import JobSeeker
+from service.dao.single_table_service import DATA_DELIMITER, SingleTableRecord
+from service.matching import AnswerVector, apply_ranking_change
+
+SEEKER_TOP_JOBS_SK = "TOP_JOBS"
+# every materialization is also indexed in the sparse top-jobs-index, spread over SEEKER_TOP_JOBS_SHARDS keys by
+# seeker id, with only the seeker answers and the list cutoff projected: a job change reads these narrow entries and
+# reads and writes only the materializations the job may enter or leave
+SEEKER_TOP_JOBS_INDEX_NAME = "top-jobs-index"
+SEEKER_TOP_JOBS_INDEX_PK_ATTRIBUTE = "top_jobs_shard"
+SEEKER_TOP_JOBS_INDEX_PK_PREFIX = "TOP_JOBS"
+SEEKER_TOP_JOBS_SHARDS = 8
+SEEKER_TOP_JOBS_INDEX_ATTRIBUTES = ['job_seeker_id', 'answer_bits', 'answered_mask', 'top_jobs_cutoff']
+
+
+class TopJob(BaseModel):
+    job_id: str
+    score: int
+
+
+class SeekerTopJobs(BaseModel, SingleTableRecord):
+    """
+    The best matching jobs of a job seeker, computed for the seeker answers stored along with them and kept up to
+    date incrementally as jobs change
+    """
+
+    job_seeker_id: str
+    answer_bits: int
+    answered_mask: int
+    max_results: int
+    # best score first
+    top_jobs: List[TopJob] = []
+    # True when top_jobs holds every matchable job, so removing one of them leaves nothing to refill
+    exhaustive: bool = False
+    # False once a job left the list and only a full recompute can tell which job takes its place
+    complete: bool = True
+    computed_time: Decimal
+    # the top-jobs-index key, missing on the materializations written before the index
+    top_jobs_shard: Optional[str]
+    # lowest listed score once the list is full, -1 before
+    top_jobs_cutoff: int = -1
+
+    creationTime: Optional[str]
+    lastUpdateTime: Optional[str]
+    version: int = 0
+
+    @staticmethod
+    def build_pk(job_seeker_id: str):
+        return JobSeeker.build_pk(job_seeker_id)
+
+    @staticmethod
+    def build_sk():
+        return SEEKER_TOP_JOBS_SK
+
+    @staticmethod
+    def build_index_pk(job_seeker_id: str):
+        shard = zlib.crc32(job_seeker_id.encode()) % SEEKER_TOP_JOBS_SHARDS
+        return SEEKER_TOP_JOBS_INDEX_PK_PREFIX + DATA_DELIMITER + str(shard)
+
+    @staticmethod
+    def build_index_pks() -> List[str]:
+        return [SEEKER_TOP_JOBS_INDEX_PK_PREFIX + DATA_DELIMITER + str(shard)
+                for shard in range(SEEKER_TOP_JOBS_SHARDS)]
+
+    @property
+    def answers(self) -> AnswerVector:
+        return AnswerVector(bits=self.answer_bits, answered=self.answered_mask)
+
+    def cutoff(self) -> int:
+        if len(self.top_jobs) < self.max_results:
+            return -1
+        return self.top_jobs[-1].score
+
+    def apply_job(self, job_id: str, job_score: Optional[int]) -> bool:
+        """
+        Moves a changed job to its place in the list
+
+        :param job_score: the job score against the seeker answers, None if the job is deleted or not matchable
+        :return: True if the materialization changed
+        """
+        change = apply_ranking_change(self.top_jobs, job_id,
+                                      None if job_score is None else TopJob(job_id=job_id, score=job_score),
+                                      self.max_results, self.exhaustive, id_of=lambda top_job: top_job.job_id)
+        if change is None:
+            return False
+        self.top_jobs = change.items
+        self.top_jobs_cutoff = self.cutoff()
+        self.exhaustive = change.exhaustive
+        self.complete = self.complete and change.complete
+        return True
+
+    def produce_pk(self) -> str:
+        return self.build_pk(self.job_seeker_id)
+
+    def produce_sk(self) -> str:
+        return self.build_sk()
+
+    def produce_gsi1_pk(self) -> Optional[str]:
+        return None
+
+    def produce_gsi1_sk(self) -> Optional[str]:
+        return None
+
+    def as_dict(self) -> Dict:
+        # an index key can not be written as null
+        return self.dict(exclude={'top_jobs_shard'} if self.top_jobs_shard is None else None)
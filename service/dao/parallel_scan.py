@@ -0,0 +1,103 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List
+
+from aws_lambda_powertools import Logger
+
+from service.common.utils import get_env_int
+from service.dao.constants import EnvVarNames
+
+logger = Logger()
+
+DEFAULT_SCAN_SEGMENTS = 4
+
+# pages waiting for the consumer, per segment, before the segment scans pause
+_PAGES_BUFFERED_PER_SEGMENT = 2
+_PUT_TIMEOUT_SECONDS = 0.1
+
+
+class _SegmentDone:
+    def __init__(self, error: Exception = None):
+        self.error = error
+
+
+def get_scan_segments() -> int:
+    return max(1, get_env_int(EnvVarNames.DYNAMO_SCAN_SEGMENTS, DEFAULT_SCAN_SEGMENTS))
+
+
+def parallel_scan(table_factory: Callable[[], Any], total_segments: int = None, **scan_kwargs) -> Iterator[Dict]:
+    """
+    Scans the table with `total_segments` concurrent segment scans (DynamoDB Segment/TotalSegments) and yields the
+    items as the pages arrive, in no particular order. Stopping the iteration early stops the segment scans.
+
+    :param table_factory: returns a new boto3 dynamodb Table resource. boto3 resources are not thread safe, so every
+    segment scans with its own, all created on the calling thread (the boto3 default session is not thread safe either)
+    :param total_segments: number of segments, DYNAMO_SCAN_SEGMENTS (default 4) if not given
+    :param scan_kwargs: any other scan parameter (FilterExpression, ProjectionExpression...)
+    :raises: the first error raised by any of the segment scans
+    """
+    total_segments = total_segments or get_scan_segments()
+    if total_segments == 1:
+        yield from _scan_segment_pages(table_factory(), scan_kwargs)
+        return
+
+    pages: queue.Queue = queue.Queue(maxsize=total_segments * _PAGES_BUFFERED_PER_SEGMENT)
+    stopped = threading.Event()
+
+    def _put(entry) -> bool:
+        while not stopped.is_set():
+            try:
+                pages.put(entry, timeout=_PUT_TIMEOUT_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _scan(segment_table, segment: int) -> None:
+        try:
+            segment_kwargs = dict(scan_kwargs, Segment=segment, TotalSegments=total_segments)
+            for page in _iter_pages(segment_table, segment_kwargs):
+                if not _put(page):
+                    return
+            _put(_SegmentDone())
+        except Exception as err:
+            _put(_SegmentDone(err))
+
+    segment_tables = [table_factory() for _ in range(total_segments)]
+    executor = ThreadPoolExecutor(max_workers=total_segments, thread_name_prefix="parallel-scan")
+    try:
+        for segment, segment_table in enumerate(segment_tables):
+            executor.submit(_scan, segment_table, segment)
+
+        running = total_segments
+        while running:
+            entry = pages.get()
+            if isinstance(entry, _SegmentDone):
+                if entry.error is not None:
+                    raise entry.error
+                running -= 1
+            else:
+                yield from entry
+    finally:
+        stopped.set()
+        executor.shutdown(wait=False)
+
+
+def _scan_segment_pages(table, scan_kwargs: Dict) -> Iterator[Dict]:
+    for page in _iter_pages(table, dict(scan_kwargs)):
+        yield from page
+
+
+def _iter_pages(table, scan_kwargs: Dict) -> Iterator[List[Dict]]:
+    while True:
+        scan_response = table.scan(**scan_kwargs)
+        yield scan_response.get('Items', [])
+
+        # If the total number of scanned items exceeds the maximum dataset size limit of 1 MB, the scan stops and
+        # results are returned as a LastEvaluatedKey value to continue the scan in a subsequent operation
+        last_evaluated_key = scan_response.get('LastEvaluatedKey')
+        if not last_evaluated_key:
+            return
+        logger.debug(f"Continue to scan for more items, last_evaluated_key: '{last_evaluated_key}'")
+        scan_kwargs['ExclusiveStartKey'] = last_evaluated_key
@@ -0,0 +1,97 @@
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+from typing import Dict, List, Optional
+
+import boto3
+from aws_lambda_context import LambdaContext
+from aws_lambda_powertools import Logger
+
+from service.dao.constants import EnvVarNames
+from service.dao.job_seeker_repository import job_seeker_repository
+
+logger = Logger()
+
+# set by the lambda runtime
+_LAMBDA_FUNCTION_NAME = "AWS_LAMBDA_FUNCTION_NAME"
+
+
+class SeekerDeleteMode(Enum):
+    # the delete request removes the seeker records
+    SYNC = "sync"
+    # the delete request only enqueues the seeker, its records are removed by the cleanup queue consumer
+    ASYNC = "async"
+
+
+def get_seeker_delete_mode() -> SeekerDeleteMode:
+    return SeekerDeleteMode(os.getenv(EnvVarNames.SEEKER_DELETE_MODE, SeekerDeleteMode.SYNC.value))
+
+
+class _SeekerCleanupQueue:
+    """
+    Queue of the deleted job seekers whose records are still to be removed. Backed by SQS when
+    SEEKER_CLEANUP_QUEUE_URL is set, by an in-process worker thread otherwise (local runs and tests). A lambda
+    container is frozen once it responded, so in a lambda without a queue the records are removed synchronously.
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__local_worker: Optional[ThreadPoolExecutor] = None
+
+    def enqueue(self, job_seeker_id: str, context: Optional[LambdaContext] = None) -> None:
+        """
+        :param context: the invocation context, bounding the synchronous delete in a lambda without a queue
+        """
+        queue_url = os.getenv(EnvVarNames.SEEKER_CLEANUP_QUEUE_URL)
+        if queue_url:
+            boto3.client('sqs').send_message(QueueUrl=queue_url,
+                                             MessageBody=json.dumps({'job_seeker_id': job_seeker_id}))
+        elif os.getenv(_LAMBDA_FUNCTION_NAME):
+            logger.warning(f"{EnvVarNames.SEEKER_CLEANUP_QUEUE_URL} is not set, removing the job seeker records now")
+            job_seeker_repository.delete(job_seeker_id, context)
+            return
+        else:
+            self.__get_local_worker().submit(self.__clean_up_locally, job_seeker_id)
+        logger.info(f"Job seeker id '{job_seeker_id}' queued for clean up")
+
+    def consume(self, event: Dict, context: Optional[LambdaContext] = None) -> Dict[str, List[Dict]]:
+        """
+        Removes the records of the job seekers of an SQS batch
+
+        :return: the partial batch response, the messages of the failed clean ups are delivered again
+        """
+        failures = []
+        for record in event['Records']:
+            try:
+                job_seeker_repository.delete(json.loads(record['body'])['job_seeker_id'], context)
+            except Exception as err:  # pylint: disable=broad-except
+                logger.error(f"Failed cleaning up message '{record['messageId']}': {err}")
+                failures.append({'itemIdentifier': record['messageId']})
+        return {'batchItemFailures': failures}
+
+    def drain(self) -> None:
+        """
+        Waits for the clean ups queued in-process
+        """
+        with self.__lock:
+            local_worker, self.__local_worker = self.__local_worker, None
+        if local_worker is not None:
+            local_worker.shutdown(wait=True)
+
+    @staticmethod
+    def __clean_up_locally(job_seeker_id: str) -> None:
+        try:
+            job_seeker_repository.delete(job_seeker_id)
+        except Exception:  # pylint: disable=broad-except
+            logger.exception(f"Failed cleaning up job seeker id '{job_seeker_id}'")
+
+    def __get_local_worker(self) -> ThreadPoolExecutor:
+        with self.__lock:
+            if self.__local_worker is None:
+                self.__local_worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="seeker-cleanup")
+            return self.__local_worker
+
+
+seeker_cleanup_queue: _SeekerCleanupQueue = _SeekerCleanupQueue()
@@ -0,0 +1,127 @@
+from typing import Dict, Optional
+
+from aws_lambda_powertools import Logger
+from botocore.exceptions import ClientError
+
+from service.common.concurrency import concurrent_calls
+from service.common.utils import get_env_int
+from service.dao.constants import EnvVarNames
+from service.dao.jobs_corpus_cache import now_timestamp
+from service.dao.jobs_repository import jobs_repository
+from service.dao.model.seeker_top_jobs import SeekerTopJobs, TopJob, SEEKER_TOP_JOBS_INDEX_NAME, \
+    SEEKER_TOP_JOBS_INDEX_PK_ATTRIBUTE, SEEKER_TOP_JOBS_INDEX_ATTRIBUTES
+from service.dao.single_table_service import single_table_service
+from service.matching import AnswerVector, score
+
+logger = Logger()
+
+DEFAULT_TOP_JOBS = 100
+_DEFAULT_MAX_AGE_SECONDS = 3600
+_MAX_APPLY_ATTEMPTS = 3
+
+
+class _SeekerTopJobsRepository:
+
+    def __init__(self):
+        self.__single_table_service = single_table_service
+
+    def get(self, job_seeker_id: str) -> Optional[SeekerTopJobs]:
+        item = self.__single_table_service.find_by_pk_and_sk(SeekerTopJobs.build_pk(job_seeker_id),
+                                                             SeekerTopJobs.build_sk())
+        return SeekerTopJobs.from_item(item) if item else None
+
+    def get_usable(self, job_seeker_id: str, max_results: int = DEFAULT_TOP_JOBS) -> Optional[SeekerTopJobs]:
+        """
+        :return: the seeker materialization, or None if it is missing, incomplete, too short for `max_results`,
+        older than SEEKER_TOP_JOBS_MAX_AGE_SECONDS or not in the top jobs index (so not kept up to date)
+        """
+        top_jobs = self.get(job_seeker_id)
+        if top_jobs is None or not top_jobs.complete or top_jobs.max_results < max_results or \
+                top_jobs.top_jobs_shard is None:
+            return None
+        age = now_timestamp() - top_jobs.computed_time
+        if age > get_env_int(EnvVarNames.SEEKER_TOP_JOBS_MAX_AGE_SECONDS, _DEFAULT_MAX_AGE_SECONDS):
+            return None
+        return top_jobs
+
+    def refresh(self, job_seeker_id: str, answers: AnswerVector, max_results: int = DEFAULT_TOP_JOBS) \
+            -> SeekerTopJobs:
+        """
+        Computes the seeker top jobs over the whole jobs corpus and stores them, replacing the existing ones
+        """
+        ranking = jobs_repository.rank_jobs(answers, max_results)
+        top_jobs = SeekerTopJobs(job_seeker_id=job_seeker_id,
+                                 answer_bits=answers.bits,
+                                 answered_mask=answers.answered,
+                                 max_results=max_results,
+                                 top_jobs=[TopJob(job_id=job_id, score=item_score) for item_score, job_id in ranking],
+                                 exhaustive=len(ranking) < max_results,
+                                 computed_time=now_timestamp(),
+                                 top_jobs_shard=SeekerTopJobs.build_index_pk(job_seeker_id))
+        top_jobs.top_jobs_cutoff = top_jobs.cutoff()
+        self.__single_table_service.put_item(top_jobs)
+        return top_jobs
+
+    def apply_job_change(self, job_id: str, job_answers: Optional[AnswerVector],
+                         previous_job_answers: Optional[AnswerVector]) -> int:
+        """
+        Moves a created, changed or deleted job to its place in every materialization it may enter or leave. The
+        narrow top jobs index entries are read, shards concurrently, and a materialization is only read and written
+        when the job now scores above its cutoff, or scored at least the cutoff before the change (so may be listed)
+
+        :param job_answers: the job packed answers, None if the job is deleted or not matchable
+        :param previous_job_answers: the job packed answers before the change, None if it was not matchable
+        :return: number of updated materializations
+        """
+
+        def _apply_shard(index_pk: str) -> int:
+            shard_updated = 0
+            for entry in self.__single_table_service.iter_by_index_pk(
+                    SEEKER_TOP_JOBS_INDEX_NAME, SEEKER_TOP_JOBS_INDEX_PK_ATTRIBUTE, index_pk,
+                    SEEKER_TOP_JOBS_INDEX_ATTRIBUTES):
+                if self.__may_change(entry, job_answers, previous_job_answers):
+                    top_jobs = self.get(entry['job_seeker_id'])
+                    if top_jobs is not None and self.__apply_job_change(top_jobs, job_id, job_answers):
+                        shard_updated += 1
+            return shard_updated
+
+        updated = sum(concurrent_calls.run([lambda index_pk=index_pk: _apply_shard(index_pk)
+                                            for index_pk in SeekerTopJobs.build_index_pks()]))
+        logger.debug(f"Job '{job_id}' change applied to '{updated}' top jobs materializations")
+        return updated
+
+    @staticmethod
+    def __may_change(entry: Dict, job_answers: Optional[AnswerVector],
+                     previous_job_answers: Optional[AnswerVector]) -> bool:
+        seeker_answers = AnswerVector(bits=int(entry['answer_bits']), answered=int(entry['answered_mask']))
+        cutoff = int(entry.get('top_jobs_cutoff', -1))
+        return (job_answers is not None and score(seeker_answers, job_answers) > cutoff) or \
+            (previous_job_answers is not None and score(seeker_answers, previous_job_answers) >= cutoff)
+
+    def __apply_job_change(self, top_jobs: SeekerTopJobs, job_id: str, job_answers: Optional[AnswerVector]) -> bool:
+        # the write is conditioned on the version that was read, a concurrent write is re-read and re-applied
+        for _ in range(_MAX_APPLY_ATTEMPTS):
+            job_score = None if job_answers is None else score(top_jobs.answers, job_answers)
+            if not top_jobs.apply_job(job_id, job_score):
+                return False
+            try:
+                self.__single_table_service.update_item(top_jobs)
+                return True
+            except ClientError as err:
+                if err.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    raise
+            top_jobs = self.get(top_jobs.job_seeker_id)
+            if top_jobs is None:
+                return False
+
+        # left for the recompute on read
+        logger.warning(f"Job '{job_id}' change was not applied to the top jobs of job seeker "
+                       f"'{top_jobs.job_seeker_id}', too many concurrent writes")
+        return False
+
+    def delete(self, job_seeker_id: str) -> None:
+        logger.info(f"Deleting top jobs for job seeker id '{job_seeker_id}'")
+        self.__single_table_service.remove_item(SeekerTopJobs.build_pk(job_seeker_id), SeekerTopJobs.build_sk())
+
+
+seeker_top_jobs_repository: _SeekerTopJobsRepository = _SeekerTopJobsRepository()
@@ -1,11 +1,19 @@
+import copy
+import threading
 from abc import abstractmethod
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 
 import boto3
 from aws_lambda_powertools import Logger
 from boto3.dynamodb.conditions import Key, Attr
+from boto3.dynamodb.types import TypeSerializer
+from botocore.exceptions import ClientError
 
+from service.common.exceptions import UnprocessedKeysError
+from service.dao.batch_get import batch_get
+from service.dao.batch_write import batch_delete
 from service.dao.constants import EnvVarNames
+from service.dao.parallel_scan import parallel_scan
 from service.dao.utils import get_env_or_raise, TimeUtils
 
 logger = Logger()
@@ -40,6 +48,27 @@ class SingleTableRecord(object):
     def as_dict(self) -> Dict:
         pass
 
+    @classmethod
+    def from_item(cls, item: Dict):
+        """
+        :return: the record of a stored item, tracking the fields assigned from now on (pydantic records only)
+        """
+        record = cls(**item)
+        record.clear_changes()
+        return record
+
+    def changed_fields(self) -> Optional[Set[str]]:
+        """
+        :return: the fields assigned since the record was built or loaded with from_item, None if not tracked. A
+        field changed in place (e.g. a list append) must be assigned again to be tracked.
+        """
+        # pydantic models keep the fields set on construction and assignment
+        return getattr(self, '__fields_set__', None)
+
+    def clear_changes(self) -> None:
+        if self.changed_fields() is not None:
+            object.__setattr__(self, '__fields_set__', set())
+
 
 _LAST_UPDATE_TIME = "lastUpdateTime"
 _CREATION_TIME = "creationTime"
@@ -47,6 +76,23 @@ _CREATED_BY = "createdBy"
 _LAST_UPDATE_BY = "lastUpdatedBy"
 _VERSION = "version"
 
+# TransactWriteItems limit, a unit of work with more writes is flushed in several transactions
+_MAX_TRANSACTION_WRITES = 100
+
+_serializer = TypeSerializer()
+
+
+def _serialize(python_data: Dict) -> Dict:
+    return {name: _serializer.serialize(value) for name, value in python_data.items()}
+
+
+class _UnitOfWork:
+    def __init__(self):
+        # items read or written in the unit of work by (pk, sk), None for known missing items
+        self.loaded: Dict[Tuple[str, str], Optional[Dict]] = {}
+        # deferred writes by (pk, sk), as TransactWriteItems entries
+        self.pending: List[Tuple[Tuple[str, str], Dict]] = []
+
 
 class _SingleTableService:
 
@@ -55,7 +101,10 @@ class _SingleTableService:
         self.__dynamodb_resource = None
         self.__table_name: str = ""
         self.__table = None
+        self.__dynamodb_client = None
         self.__GSI_1_NAME = None
+        self.__unit_of_work: Optional[_UnitOfWork] = None
+        self.__unit_of_work_lock = threading.RLock()
 
     def __init(self) -> None:
         if self.__initialized:
@@ -77,43 +126,165 @@ class _SingleTableService:
 
         self.__initialized = True
 
+    def begin_unit_of_work(self) -> bool:
+        """
+        Starts caching the items read by (pk, sk) and deferring the records writes and the counters increments
+        until flush_unit_of_work
+
+        :return: False if a unit of work was already started, the caller then takes part in it
+        """
+        with self.__unit_of_work_lock:
+            if self.__unit_of_work is not None:
+                return False
+            self.__unit_of_work = _UnitOfWork()
+            return True
+
+    def flush_unit_of_work(self) -> None:
+        """
+        Writes the deferred writes with a single TransactWriteItems (a plain write if there is only one), with
+        their conditions. Any other access to the table flushes them first.
+
+        :raises ClientError: ConditionalCheckFailedException if a write condition failed, nothing was written then
+        """
+        with self.__unit_of_work_lock:
+            unit_of_work = self.__unit_of_work
+            if unit_of_work is None or not unit_of_work.pending:
+                return
+            writes = [write for _, write in unit_of_work.pending]
+            unit_of_work.pending = []
+            if self.__dynamodb_client is None:
+                # transactions are only available on the low level client
+                self.__dynamodb_client = boto3.client('dynamodb')
+            try:
+                if len(writes) == 1:
+                    (operation, params), = writes[0].items()
+                    if operation == 'Put':
+                        self.__dynamodb_client.put_item(**params)
+                    else:
+                        self.__dynamodb_client.update_item(**params)
+                else:
+                    self.__transact_write(writes)
+            except Exception:
+                # the items written in the unit of work are not what was cached anymore
+                unit_of_work.loaded.clear()
+                raise
+
+    def __transact_write(self, writes: List[Dict]) -> None:
+        try:
+            self.__dynamodb_client.transact_write_items(TransactItems=writes, ReturnConsumedCapacity='TOTAL')
+        except ClientError as err:
+            reasons = err.response.get('CancellationReasons', [])
+            if err.response['Error']['Code'] == 'TransactionCanceledException' and \
+                    any(reason.get('Code') == 'ConditionalCheckFailed' for reason in reasons):
+                # the same error as a failed single conditional write, for the callers handling it
+                raise ClientError({'Error': {'Code': 'ConditionalCheckFailedException',
+                                             'Message': err.response['Error'].get('Message', '')}},
+                                  'TransactWriteItems') from err
+            raise
+
+    def __defer(self, key: Tuple[str, str], write: Dict, item: Optional[Dict]) -> bool:
+        """
+        :param item: the item once written, None if not known
+        :return: False if there is no unit of work to defer the write to
+        """
+        with self.__unit_of_work_lock:
+            unit_of_work = self.__unit_of_work
+            if unit_of_work is None:
+                return False
+            # a transaction can only write an item once
+            if len(unit_of_work.pending) >= _MAX_TRANSACTION_WRITES or \
+                    any(pending_key == key for pending_key, _ in unit_of_work.pending):
+                self.flush_unit_of_work()
+            unit_of_work.pending.append((key, write))
+            if item is None:
+                unit_of_work.loaded.pop(key, None)
+            else:
+                unit_of_work.loaded[key] = item
+            return True
+
+    def __defer_put(self, record_dict: Dict, condition: Optional[str] = None, names: Optional[Dict] = None,
+                    values: Optional[Dict] = None) -> bool:
+        """
+        :return: False if there is no unit of work to defer the write to
+        """
+        put = {'TableName': self.__table_name, 'Item': _serialize(record_dict)}
+        if condition:
+            put['ConditionExpression'] = condition
+            put['ExpressionAttributeNames'] = names
+        if values:
+            put['ExpressionAttributeValues'] = _serialize(values)
+        item = copy.deepcopy(record_dict)
+        self.__clean_single_table_indices_attributes([item])
+        return self.__defer((record_dict[self.__PK], record_dict[self.__SK]), {'Put': put}, item)
+
+    def __flush_before_direct_access(self, keys: List[Tuple[str, str]] = ()) -> None:
+        """
+        Flushes the deferred writes before a direct access to the table, which may change the given items
+        """
+        with self.__unit_of_work_lock:
+            if self.__unit_of_work is not None:
+                self.flush_unit_of_work()
+                for key in keys:
+                    self.__unit_of_work.loaded.pop(key, None)
+
+    def end_unit_of_work(self) -> None:
+        """
+        Drops the unit of work, with its writes not flushed yet
+        """
+        with self.__unit_of_work_lock:
+            self.__unit_of_work = None
+
     def find_by_pk_and_sk_begins_with(self, pk: str, sk_starts_with: str) -> List[Dict]:
+        return list(self.iter_by_pk_and_sk_begins_with(pk, sk_starts_with))
+
+    def iter_by_pk_and_sk_begins_with(self, pk: str, sk_starts_with: str, limit: int = None) -> Iterator[Dict]:
+        """
+        Yields the items page by page, no more than `limit` items if given
+        """
         self.__init()
 
-        query_response = self.__table.query(
-            KeyConditionExpression=Key(self.__PK).eq(pk) & Key(self.__SK).begins_with(
-                sk_starts_with),
-            Select='ALL_ATTRIBUTES',
-            ReturnConsumedCapacity='TOTAL'
-        )
+        return self.__iter_query(limit,
+                                 KeyConditionExpression=Key(self.__PK).eq(pk) & Key(self.__SK).begins_with(
+                                     sk_starts_with),
+                                 Select='ALL_ATTRIBUTES',
+                                 ReturnConsumedCapacity='TOTAL')
 
-        items = query_response["Items"]
-        last_evaluate_key = query_response.get('LastEvaluatedKey')
-        logger.debug(f"Query resulted with '{len(items)}' items, last_evaluate_key: '{last_evaluate_key}'")
-
-        while last_evaluate_key:
-            logger.info(f"Continue to query for more items, last_evaluate_key: '{last_evaluate_key}'")
-            query_response = self.__table.query(
-                KeyConditionExpression=Key(self.__PK).eq(pk) & Key(self.__SK).begins_with(
-                    sk_starts_with),
-                Select='ALL_ATTRIBUTES',
-                ReturnConsumedCapacity='TOTAL',
-                ExclusiveStartKey=last_evaluate_key
-            )
-
-            items.extend(query_response["Items"])
-            last_evaluate_key = query_response.get('LastEvaluatedKey')
-            logger.debug(f"Current items count: '{len(items)}'"
-                         f", last_evaluate_key: '{last_evaluate_key}'")
+    def find_item_collection(self, pk: str) -> List[Tuple[str, Dict]]:
+        """
+        Reads every item of a partition with a single (paginated) query
 
-        if items:
-            self.__clean_single_table_indices_attributes(items)
-            return items
-        else:
-            return []
+        :return: (sk, item) pairs, in sort key order
+        """
+        self.__init()
+
+        items = []
+        for item in self.__iter_query(None, clean=False, KeyConditionExpression=Key(self.__PK).eq(pk),
+                                      Select='ALL_ATTRIBUTES', ReturnConsumedCapacity='TOTAL'):
+            sk = item[self.__SK]
+            self.__clean_single_table_indices_attributes([item])
+            items.append((sk, item))
+        return items
 
     def find_by_pk_and_sk(self, pk: str, sk: str) -> Optional[Dict]:
+        """
+        :return: the item, from the unit of work if already read or written in it
+        """
         self.__init()
+        with self.__unit_of_work_lock:
+            unit_of_work = self.__unit_of_work
+            if unit_of_work is not None:
+                if (pk, sk) in unit_of_work.loaded:
+                    return copy.deepcopy(unit_of_work.loaded[(pk, sk)])
+                if any(pending_key == (pk, sk) for pending_key, _ in unit_of_work.pending):
+                    self.flush_unit_of_work()
+
+        item = self.__get_item(pk, sk)
+        if unit_of_work is not None:
+            with self.__unit_of_work_lock:
+                unit_of_work.loaded.setdefault((pk, sk), copy.deepcopy(item))
+        return item
+
+    def __get_item(self, pk: str, sk: str) -> Optional[Dict]:
         get_item_response = self.__table.get_item(
             Key={
                 self.__PK: pk,
@@ -127,108 +298,129 @@ class _SingleTableService:
             self.__clean_single_table_indices_attributes([item])
             return item
 
-    ###################################################################################################################
-    # TODO: This method was changed to support bulk read but was not tested
-    ###################################################################################################################
+    def batch_get_by_keys(self, keys: List[Tuple[str, str]], projection: Optional[List[str]] = None,
+                          consistent_read: bool = False) -> List[Dict]:
+        """
+        :param keys: (pk, sk) of the items to read
+        :param projection: attributes to read, all if not given
+        :return: the found items, in no particular order
+        """
+        self.__init()
+
+        self.__flush_before_direct_access()
+        if projection:
+            projection = list(dict.fromkeys(projection + [self.__PK, self.__SK]))
+        items = batch_get(self.__table_name, [{self.__PK: pk, self.__SK: sk} for pk, sk in keys], projection,
+                          consistent_read)
+        self.__clean_single_table_indices_attributes(items)
+        return items
+
     def find_all_by_gsi1pk_and_gsi1sk_begins_with(self, gsi_1_pk: str, gsi1sk_starts_with: str) -> Optional[List[Dict]]:
+        items = list(self.iter_by_gsi1pk_and_gsi1sk_begins_with(gsi_1_pk, gsi1sk_starts_with))
+        return items if items else None
+
+    def iter_by_gsi1pk_and_gsi1sk_begins_with(self, gsi_1_pk: str, gsi1sk_starts_with: str = None,
+                                              limit: int = None) -> Iterator[Dict]:
+        """
+        Yields the items page by page, no more than `limit` items if given
+        """
         self.__init()
-        # if not gsi1sk_starts_with:
-        #     gsi1sk_starts_with = ""
 
         if gsi1sk_starts_with:
             condition = Key(self.__GSI1_PK).eq(gsi_1_pk) & Key(self.__GSI1_SK).begins_with(gsi1sk_starts_with)
         else:
             condition = Key(self.__GSI1_PK).eq(gsi_1_pk)
 
-        query_response = self.__table.query(
-            # "sk" is the range key for the main index, and is the partition key for GSI_1
-            IndexName=self.__GSI_1_NAME,
-            KeyConditionExpression=condition,
-            Select='ALL_ATTRIBUTES',
-            ReturnConsumedCapacity='TOTAL'
-        )
-
-        items = query_response["Items"]
-        last_evaluate_key = query_response.get('LastEvaluatedKey')
-        logger.debug(f"Query resulted with '{len(items)}' items, last_evaluate_key: '{last_evaluate_key}'")
-
-        while last_evaluate_key:
-            logger.info(f"Continue to query for more items, last_evaluate_key: '{last_evaluate_key}'")
+        return self.__iter_query(limit,
+                                 # "sk" is the range key for the main index, and is the partition key for GSI_1
+                                 IndexName=self.__GSI_1_NAME,
+                                 KeyConditionExpression=condition,
+                                 Select='ALL_ATTRIBUTES',
+                                 ReturnConsumedCapacity='TOTAL')
 
-            query_response = self.__table.query(
-                # "sk" is the range key for the main index, and is the partition key for GSI_1
-                IndexName=self.__GSI_1_NAME,
-                KeyConditionExpression=condition,
-                Select='ALL_ATTRIBUTES',
-                ReturnConsumedCapacity='TOTAL',
-                ExclusiveStartKey=last_evaluate_key,
-            )
-
-            items.extend(query_response["Items"])
-            last_evaluate_key = query_response.get('LastEvaluatedKey')
-            logger.debug(f"Current items count: '{len(items)}'"
-                         f", last_evaluate_key: '{last_evaluate_key}'")
-
-        if items:
-            self.__clean_single_table_indices_attributes(items)
-            return items
-        else:
-            return None
+    def iter_by_index_pk(self, index_name: str, pk_attribute: str, pk: str,
+                         projection: Optional[List[str]] = None) -> Iterator[Dict]:
+        """
+        Yields the items of a partition of a secondary index other than GSI1, page by page
 
-    def find_all_by_pk_starts_with(self, pk_prefix: str) -> List[Dict]:
+        :param projection: attributes to read, all the projected ones if not given
+        """
         self.__init()
 
-        filter_expression = Key(self.__PK).begins_with(pk_prefix)
-        query_response = self.__table.scan(
-            FilterExpression=filter_expression,
-            Select='ALL_ATTRIBUTES',
-            ReturnConsumedCapacity='TOTAL'
-        )
+        query_args = {'IndexName': index_name, 'KeyConditionExpression': Key(pk_attribute).eq(pk)}
+        if projection:
+            query_args['ProjectionExpression'] = ", ".join(f"#p{i}" for i in range(len(projection)))
+            query_args['ExpressionAttributeNames'] = {f"#p{i}": name for i, name in enumerate(projection)}
+        return self.__iter_query(None, **query_args)
 
-        items = query_response["Items"]
-        last_evaluate_key = query_response.get('LastEvaluatedKey')
-        logger.debug(f"Query resulted with '{len(items)}' items, last_evaluate_key: '{last_evaluate_key}'")
+    def find_all_by_pk_starts_with(self, pk_prefix: str) -> List[Dict]:
+        return list(self.iter_all_by_pk_starts_with(pk_prefix))
 
-        while last_evaluate_key:
-            logger.info(f"Continue to query for more items, last_evaluate_key: '{last_evaluate_key}'")
+    def iter_all_by_pk_starts_with(self, pk_prefix: str, limit: int = None) -> Iterator[Dict]:
+        """
+        Yields the items as the parallel scan pages arrive, no more than `limit` items if given
+        """
+        self.__init()
 
-            query_response = self.__table.query(
-                FilterExpression=filter_expression,
-                Select='ALL_ATTRIBUTES',
-                ReturnConsumedCapacity='TOTAL',
-                ExclusiveStartKey=last_evaluate_key
-            )
+        return self.__iter_scan(limit,
+                                FilterExpression=Key(self.__PK).begins_with(pk_prefix),
+                                Select='ALL_ATTRIBUTES',
+                                ReturnConsumedCapacity='TOTAL')
 
-            items.extend(query_response["Items"])
-            last_evaluate_key = query_response.get('LastEvaluatedKey')
-            logger.debug(f"Current items count: '{len(items)}'"
-                         f", last_evaluate_key: '{last_evaluate_key}'")
+    def iter_all_by_sk(self, sk: str, limit: int = None) -> Iterator[Dict]:
+        """
+        Yields the items having the given sort key, in any partition, as the parallel scan pages arrive
+        """
+        self.__init()
 
-        if items:
-            self.__clean_single_table_indices_attributes(items)
-            return items
-        else:
-            return []
+        return self.__iter_scan(limit,
+                                FilterExpression=Key(self.__SK).eq(sk),
+                                Select='ALL_ATTRIBUTES',
+                                ReturnConsumedCapacity='TOTAL')
 
     def scan_by_filter(self, filter_expression) -> List[Dict]:
-        self.__init()
-
-        scan_response = self.__table.scan(
-            FilterExpression=filter_expression
-        )
-        files = scan_response['Items']
+        return list(self.iter_by_filter(filter_expression))
 
-        # If the total number of scanned items exceeds the maximum dataset size limit of 1 MB, the scan stops and
-        # results are returned to the user as a LastEvaluatedKey value to continue the scan in a subsequent operation
-        while scan_response.get('LastEvaluatedKey'):
-            scan_response = self.__table.scan(
-                ExclusiveStartKey=scan_response.get('LastEvaluatedKey'),
-                FilterExpression=filter_expression
-            )
-            files.extend(scan_response['Items'])
+    def iter_by_filter(self, filter_expression, limit: int = None) -> Iterator[Dict]:
+        """
+        Yields the items as the parallel scan pages arrive, no more than `limit` items if given
+        """
+        self.__init()
 
-        self.__clean_single_table_indices_attributes(files)
-        return files
+        return self.__iter_scan(limit, FilterExpression=filter_expression)
+
+    def __iter_query(self, limit: Optional[int], clean: bool = True, **query_args) -> Iterator[Dict]:
+        self.__flush_before_direct_access()
+        while limit is None or limit > 0:
+            if limit is not None:
+                query_args['Limit'] = limit
+            query_response = self.__table.query(**query_args)
+            items = query_response["Items"]
+            if clean:
+                self.__clean_single_table_indices_attributes(items)
+            yield from items
+
+            if limit is not None:
+                limit -= len(items)
+            last_evaluate_key = query_response.get('LastEvaluatedKey')
+            if not last_evaluate_key:
+                return
+            logger.debug(f"Continue to query for more items, last_evaluate_key: '{last_evaluate_key}'")
+            query_args['ExclusiveStartKey'] = last_evaluate_key
+
+    def __iter_scan(self, limit: Optional[int], **scan_args) -> Iterator[Dict]:
+        # a scan Limit bounds the items read before filtering, not the items returned, so the iteration is just
+        # stopped after `limit` items (which stops the segment scans)
+        if limit is not None and limit <= 0:
+            return
+        self.__flush_before_direct_access()
+        count = 0
+        for item in parallel_scan(lambda: boto3.resource('dynamodb').Table(self.__table_name), **scan_args):
+            self.__clean_single_table_indices_attributes([item])
+            yield item
+            count += 1
+            if limit is not None and count >= limit:
+                return
 
     # need to add update item and remove item
     def create_item(self, record: SingleTableRecord, user: str = None) -> Dict:
@@ -250,6 +442,9 @@ class _SingleTableService:
         record_dict[_CREATED_BY] = user
         record_dict[_LAST_UPDATE_BY] = user
 
+        if self.__defer_put(record_dict, "attribute_not_exists(#pk)", {'#pk': self.__PK}):
+            return record_dict
+
         # now save the items
         # logger.info(f"save dict: {str(record_dict)}")
 
@@ -258,6 +453,29 @@ class _SingleTableService:
 
         return record_dict
 
+    def put_item(self, record: SingleTableRecord, user: str = None) -> Dict:
+        """
+        Unconditionally writes the record, replacing any existing record under the same keys
+        """
+        self.__init()
+
+        now = TimeUtils.get_time_iso8601()
+        record_dict = record.as_dict()
+
+        # set mandatory index keys
+        self.__set_index_keys(record, record_dict)
+
+        record_dict[_CREATION_TIME] = now
+        record_dict[_LAST_UPDATE_TIME] = now
+
+        record_dict[_CREATED_BY] = user
+        record_dict[_LAST_UPDATE_BY] = user
+
+        if not self.__defer_put(record_dict):
+            self.__table.put_item(Item=record_dict)
+
+        return record_dict
+
     def add_raw_item(self, record: SingleTableRecord) -> Dict:
         self.__init()
 
@@ -265,6 +483,7 @@ class _SingleTableService:
 
         # set mandatory index keys
         self.__set_index_keys(record, record_dict)
+        self.__flush_before_direct_access([(record_dict[self.__PK], record_dict[self.__SK])])
 
         # now save the items
         self.__table.put_item(Item=record_dict,
@@ -296,25 +515,120 @@ class _SingleTableService:
 
         # logger.info(f"updating record: {str(record_dict)}")
 
+        changed_fields = record.changed_fields()
+        if changed_fields is not None:
+            self.__update_changed_attributes(record_dict, changed_fields, prev_version)
+            record.clear_changes()
+            return record_dict
+
+        if self.__defer_put(record_dict, "#v = :v", {'#v': _VERSION}, {':v': prev_version}):
+            return record_dict
+
         # now save the items
         self.__table.put_item(Item=record_dict,
                               ConditionExpression=Attr(_VERSION).eq(prev_version))
 
         return record_dict
 
-    def remove_item(self, pk: str, sk: str) -> None:
+    def __update_changed_attributes(self, record_dict: Dict, changed_fields: Set[str], prev_version: int) -> None:
+        """
+        Writes only the changed attributes of the record, along with its index keys and update attributes, under
+        the version condition
+        """
+        attribute_names = [name for name in record_dict if name in changed_fields or name in (
+            _LAST_UPDATE_TIME, _LAST_UPDATE_BY, _VERSION, self.__GSI1_PK, self.__GSI1_SK)]
+        names = {f"#a{i}": name for i, name in enumerate(attribute_names)}
+        values = {f":a{i}": record_dict[name] for i, name in enumerate(attribute_names)}
+        names['#v'] = _VERSION
+        values[':v'] = prev_version
+        update_expression = "SET " + ", ".join(f"#a{i} = :a{i}" for i in range(len(attribute_names)))
+        key = (record_dict[self.__PK], record_dict[self.__SK])
+
+        with self.__unit_of_work_lock:
+            unit_of_work = self.__unit_of_work
+            if unit_of_work is not None:
+                # the unit of work knows the updated item only if it already knew the item
+                item = unit_of_work.loaded.get(key)
+                if item is not None:
+                    item = dict(item, **{name: copy.deepcopy(record_dict[name]) for name in attribute_names
+                                         if name not in (self.__GSI1_PK, self.__GSI1_SK)})
+                if self.__defer(key, {'Update': {'TableName': self.__table_name,
+                                                 'Key': _serialize({self.__PK: key[0], self.__SK: key[1]}),
+                                                 'UpdateExpression': update_expression,
+                                                 'ConditionExpression': "#v = :v",
+                                                 'ExpressionAttributeNames': names,
+                                                 'ExpressionAttributeValues': _serialize(values)}}, item):
+                    return
+
+        self.__table.update_item(
+            Key={
+                self.__PK: key[0],
+                self.__SK: key[1]
+            },
+            UpdateExpression=update_expression,
+            ConditionExpression="#v = :v",
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=values
+        )
+
+    def remove_item(self, pk: str, sk: str) -> Optional[Dict]:
+        """
+        :return: the removed item, or None if there was no such item
+        """
         self.__init()
+        self.__flush_before_direct_access([(pk, sk)])
 
-        # todo: check ret val
-        self.__table.delete_item(
+        delete_item_response = self.__table.delete_item(
             Key={
                 self.__PK: pk,
                 self.__SK: sk
-            }
+            },
+            ReturnValues='ALL_OLD'
         )
+        return delete_item_response.get('Attributes')
+
+    def increment_counters(self, pk: str, sk: str, counters: Dict[str, int]) -> None:
+        """
+        Atomically adds the given deltas to numeric attributes of an item, creating the item and the attributes
+        if missing
+        """
+        self.__init()
+
+        names = {f"#c{i}": name for i, name in enumerate(counters)}
+        values = {f":c{i}": delta for i, delta in enumerate(counters.values())}
+        update_expression = "ADD " + ", ".join(f"#c{i} :c{i}" for i in range(len(counters)))
+        if self.__defer((pk, sk), {'Update': {'TableName': self.__table_name,
+                                              'Key': _serialize({self.__PK: pk, self.__SK: sk}),
+                                              'UpdateExpression': update_expression,
+                                              'ExpressionAttributeNames': names,
+                                              'ExpressionAttributeValues': _serialize(values)}}, None):
+            return
+
+        self.__table.update_item(
+            Key={
+                self.__PK: pk,
+                self.__SK: sk
+            },
+            UpdateExpression=update_expression,
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=values
+        )
+
+    def put_raw_item(self, pk: str, sk: str, item: Dict) -> None:
+        """
+        Unconditionally writes a non record item (counters, stats) under the given keys
+        """
+        self.__init()
+        self.__flush_before_direct_access([(pk, sk)])
+
+        item = dict(item)
+        item[self.__PK] = pk
+        item[self.__SK] = sk
+        self.__table.put_item(Item=item)
 
     def remove_items(self, *, items: List[SingleTableRecord]) -> None:
         self.__init()
+        self.__flush_before_direct_access([(item.produce_pk(), item.produce_sk()) for item in items])
 
         with self.__table.batch_writer() as batch:
             for item in items:
@@ -325,12 +639,27 @@ class _SingleTableService:
                     }
                 )
 
+    def remove_items_by_keys(self, keys: List[Tuple[str, str]]) -> None:
+        """
+        :param keys: (pk, sk) of the items to remove
+        :raises UnprocessedKeysError: with the (pk, sk) of the items left, the others were removed
+        """
+        self.__init()
+        self.__flush_before_direct_access(keys)
+
+        try:
+            batch_delete(self.__table_name, [{self.__PK: pk, self.__SK: sk} for pk, sk in keys])
+        except UnprocessedKeysError as err:
+            raise UnprocessedKeysError(self.__table_name, [(key[self.__PK], key[self.__SK])
+                                                           for key in err.unprocessed_keys]) from err
+
     def batch_write_items(self, records: List[SingleTableRecord],
                           add_creation_time: bool = True,
                           update_last_update_time: bool = True) -> \
             List[Dict]:
 
         self.__init()
+        self.__flush_before_direct_access([(record.produce_pk(), record.produce_sk()) for record in records])
 
         dict_list: List[Dict] = list()
         now = TimeUtils.get_time_iso8601()
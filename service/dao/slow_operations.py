@@ -0,0 +1,115 @@
+import os
+import re
+import threading
+from dataclasses import dataclass
+from typing import Dict
+
+from aws_lambda_powertools import Logger
+
+from service.dao.constants import EnvVarNames
+
+logger = Logger()
+
+DEFAULT_SLOW_OP_LATENCY_MILLIS = 200
+DEFAULT_SLOW_OP_MAX_PAGES = 5
+DEFAULT_SLOW_OP_MAX_CAPACITY_UNITS = 50
+
+_VALUE_PLACEHOLDER = re.compile(r':[A-Za-z0-9_]+')
+_NAME_PLACEHOLDER = re.compile(r'#[A-Za-z0-9_]+')
+
+
+def fingerprint(operation: str, table: str, params: Dict) -> str:
+    """
+    :return: the parameter-free shape of a DynamoDB call: operation, table, index and the key condition and filter
+    expressions with the attribute names resolved and the values replaced by '?'
+    """
+    names = params.get('ExpressionAttributeNames', {})
+    shape = []
+    if 'KeyConditionExpression' in params:
+        shape.append(f"key {_expression_shape(params['KeyConditionExpression'], names)}")
+    elif 'Key' in params:
+        shape.append(f"key {','.join(sorted(params['Key']))}")
+    if 'FilterExpression' in params:
+        shape.append(f"filter {_expression_shape(params['FilterExpression'], names)}")
+    if 'ConditionExpression' in params:
+        shape.append(f"condition {_expression_shape(params['ConditionExpression'], names)}")
+    if 'Segment' in params:
+        shape.append(f"segments {params.get('TotalSegments')}")
+    if operation == 'Scan' and 'FilterExpression' not in params:
+        shape.append("full")
+    return f"{operation} {table}[{params.get('IndexName', '-')}] {' '.join(shape)}".rstrip()
+
+
+def _expression_shape(expression, names: Dict[str, str]) -> str:
+    if not isinstance(expression, str):
+        # not built into an expression string yet (a boto3 condition object), its class is its shape
+        return type(expression).__name__
+    resolved = _NAME_PLACEHOLDER.sub(lambda match: names.get(match.group(0), match.group(0)), expression)
+    return _VALUE_PLACEHOLDER.sub('?', resolved)
+
+
+@dataclass
+class FingerprintStats:
+    # a call per page for Query and Scan
+    pages: int = 0
+    latency_ms: float = 0
+    max_latency_ms: float = 0
+    capacity_units: float = 0
+    scanned_items: int = 0
+    returned_items: int = 0
+
+
+class _SlowOperationLog:
+    """
+    Per invocation stats of the DynamoDB calls by fingerprint, logging the fingerprints over the latency, page count
+    or consumed capacity budget when the invocation ends
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__stats: Dict[str, FingerprintStats] = {}
+
+    def record(self, call_fingerprint: str, latency_ms: float, capacity_units: float, scanned_items: int,
+               returned_items: int) -> None:
+        with self.__lock:
+            stats = self.__stats.setdefault(call_fingerprint, FingerprintStats())
+            stats.pages += 1
+            stats.latency_ms += latency_ms
+            stats.max_latency_ms = max(stats.max_latency_ms, latency_ms)
+            stats.capacity_units += capacity_units
+            stats.scanned_items += scanned_items
+            stats.returned_items += returned_items
+
+    def reset(self) -> None:
+        with self.__lock:
+            self.__stats = {}
+
+    def flush(self, handler: str) -> Dict[str, FingerprintStats]:
+        """
+        Logs the fingerprints of the invocation over budget and starts over
+
+        :return: the stats of the fingerprints over budget
+        """
+        with self.__lock:
+            stats, self.__stats = self.__stats, {}
+        latency_budget = float(os.getenv(EnvVarNames.SLOW_OP_LATENCY_MILLIS, DEFAULT_SLOW_OP_LATENCY_MILLIS))
+        pages_budget = int(os.getenv(EnvVarNames.SLOW_OP_MAX_PAGES, DEFAULT_SLOW_OP_MAX_PAGES))
+        capacity_budget = float(os.getenv(EnvVarNames.SLOW_OP_MAX_CAPACITY_UNITS,
+                                          DEFAULT_SLOW_OP_MAX_CAPACITY_UNITS))
+
+        slow_operations = {}
+        for call_fingerprint, fingerprint_stats in stats.items():
+            if fingerprint_stats.max_latency_ms <= latency_budget and fingerprint_stats.pages <= pages_budget \
+                    and fingerprint_stats.capacity_units <= capacity_budget:
+                continue
+            slow_operations[call_fingerprint] = fingerprint_stats
+            logger.warning(f"Slow DynamoDB operation '{call_fingerprint}' in '{handler}': "
+                           f"'{fingerprint_stats.pages}' pages, '{round(fingerprint_stats.latency_ms, 1)}' ms "
+                           f"(slowest page '{round(fingerprint_stats.max_latency_ms, 1)}' ms), "
+                           f"'{round(fingerprint_stats.capacity_units, 2)}' capacity units, "
+                           f"'{fingerprint_stats.scanned_items}' items scanned for "
+                           f"'{fingerprint_stats.returned_items}' returned")
+        return slow_operations
+
+
+slow_operation_log: _SlowOperationLog = _SlowOperationLog()
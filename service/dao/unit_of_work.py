@@ -0,0 +1,24 @@
+from contextlib import contextmanager
+from typing import Iterator
+
+from service.dao.single_table_service import single_table_service
+
+
+@contextmanager
+def unit_of_work() -> Iterator[None]:
+    """
+    Request scoped unit of work of the single table: in it, an item is read at most once by (pk, sk), and the
+    records writes and the counters increments are flushed together at the end, with their version conditions. The
+    writes are dropped if the block raises. A nested unit of work takes part in the enclosing one.
+
+    :raises ClientError: ConditionalCheckFailedException when flushing if a write condition failed, nothing was
+    written then
+    """
+    started = single_table_service.begin_unit_of_work()
+    try:
+        yield
+        if started:
+            single_table_service.flush_unit_of_work()
+    finally:
+        if started:
+            single_table_service.end_unit_of_work()
@@ -0,0 +1,78 @@
+import random
+import threading
+import time
+from typing import Callable, TypeVar
+
+from aws_lambda_powertools import Logger
+from botocore.exceptions import ClientError
+
+from service.common.exceptions import ConflictError
+
+logger = Logger()
+
+R = TypeVar('R')
+
+MAX_UPDATE_ATTEMPTS = 5
+_BACKOFF_BASE_SECONDS = 0.02
+_BACKOFF_MAX_SECONDS = 0.5
+
+
+class _UpdateRetry:
+    """
+    Read, mutate and conditional write loop of the optimistic (version) updates, counting the conflicts per
+    container
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        # conditional writes that lost to a concurrent write
+        self.conflicts = 0
+        # updates that succeeded after at least one conflict
+        self.retried_updates = 0
+        # updates that gave up after MAX_UPDATE_ATTEMPTS conflicts
+        self.failed_updates = 0
+
+    def run(self, load: Callable[[], R], mutate: Callable[[R], None], save: Callable[[R], None], name: str) -> R:
+        """
+        Applies the mutation to a freshly loaded record and saves it, again from a new read whenever the save
+        condition fails, with jittered exponential backoff
+
+        :param save: the conditional write, must raise the ConditionalCheckFailedException ClientError on conflict
+        :return: the saved record
+        :raises ConflictError: if every attempt conflicted
+        """
+        for attempt in range(MAX_UPDATE_ATTEMPTS):
+            if attempt:
+                # full jitter, so the concurrent writers do not retry in lockstep
+                time.sleep(random.uniform(0, min(_BACKOFF_MAX_SECONDS, _BACKOFF_BASE_SECONDS * 2 ** attempt)))
+            record = load()
+            mutate(record)
+            try:
+                save(record)
+            except ClientError as err:
+                if err.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    raise
+                with self.__lock:
+                    self.conflicts += 1
+                logger.debug(f"Update of '{name}' conflicted with a concurrent write, attempt '{attempt + 1}'")
+                continue
+
+            if attempt:
+                with self.__lock:
+                    self.retried_updates += 1
+                logger.info(f"Update of '{name}' succeeded after '{attempt}' conflicts")
+            return record
+
+        with self.__lock:
+            self.failed_updates += 1
+        logger.warning(f"Update of '{name}' gave up after '{MAX_UPDATE_ATTEMPTS}' conflicts")
+        raise ConflictError(f"'{name}' is being updated concurrently, try again")
+
+    def reset_counters(self) -> None:
+        with self.__lock:
+            self.conflicts = 0
+            self.retried_updates = 0
+            self.failed_updates = 0
+
+
+update_retry: _UpdateRetry = _UpdateRetry()
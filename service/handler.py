@@ -3,43 +3,58 @@ import uuid
 from datetime import datetime
 from decimal import Decimal
 from http import HTTPStatus
-from typing import List
+from typing import List, Optional
 
 import boto3
 from aws_lambda_context import LambdaContext
 from aws_lambda_powertools import Logger
 from aws_lambda_powertools.logging import logger
 from aws_lambda_powertools.utilities.data_classes import APIGatewayProxyEvent
-from botocore.exceptions import ClientError
 from mypy_boto3_cognito_idp import CognitoIdentityProviderClient
 from mypy_boto3_cognito_idp.type_defs import AttributeTypeTypeDef
 from pydantic import ValidationError
 
-from service.common.exceptions import NotFoundError
-from service.common.utils import get_env_or_raise
+from service.common.concurrency import concurrent_calls
+from service.common.dynamo_stream import deserialize_image
+from service.common.exceptions import ConflictError, NotFoundError
+from service.dao.capacity_metrics import capacity_metrics, metrics
+from service.dao.employers_cache import employers_cache
 from service.dao.job_seeker_answers_repository import job_seeker_answers_repository, SearchResult
 from service.dao.job_seeker_experience_repository import job_seeker_experience_repository
-from service.dao.job_seeker_repository import job_seeker_repository
-from service.dao.jobs_repository import jobs_repository
+from service.dao.job_seeker_repository import job_seeker_repository, SeekerSummary
+from service.dao.jobs_corpus_cache import jobs_corpus_cache
+from service.dao.jobs_repository import jobs_repository, SeekerAnswersChange
 from service.dao.model.experience import Experience
 from service.dao.model.job_seeker import JobSeeker
 from service.dao.model.job_seeker_answers import JobSeekerAnswers
+from service.dao.model.seeker_top_jobs import SeekerTopJobs
+from service.dao.seeker_cleanup_queue import seeker_cleanup_queue, get_seeker_delete_mode, SeekerDeleteMode
+from service.dao.seeker_top_jobs_repository import seeker_top_jobs_repository
+from service.dao.unit_of_work import unit_of_work
 from service.dtos.job_seeker_answer_dto import JobSeekerAnswerDto
 from service.dtos.job_seeker_experience_dto import JobSeekerExperienceDto
 from service.dtos.job_seeker_profile_dto import JobSeekerProfileDto
 from service.dtos.jobli_dto import JobliDto
 from service.dtos.jobli_dto import UpdateUserTypeDto
-from service.lambdas.employer.constants import EmployerConstants
+from service.matching import AnswerVector, pack_answers, pack_seeker_answers
 from service.models.employer.employer_job import JobSearchResult
 from service.models.job_seeker_resource import JobSeekerResource
 from service.dao.model.job_seeker_answers import JobSeekerAnswers
 from service.models.jobli import Jobli
 
 logger = Logger()
+capacity_metrics.install()
+
+_RELEVANT_JOBS_LIMIT = 100
+
+# start loading the jobs corpus during lambda init (only where JOBS_CORPUS_PRELOAD is set)
+jobs_corpus_cache.preload()
 
 
 # PUT /api/seeker/profile
 @logger.inject_lambda_context(log_event=True)
+@metrics.log_metrics
+@capacity_metrics.track_invocation
 def create_or_update_seeker_profile(event: dict, context: LambdaContext) -> dict:
     try:
         event: APIGatewayProxyEvent = APIGatewayProxyEvent(event)
@@ -47,15 +62,19 @@ def create_or_update_seeker_profile(event: dict, context: LambdaContext) -> dict
 
         profile_dto: JobSeekerProfileDto = JobSeekerProfileDto.parse_raw(event["body"])
 
-        try:
-            # try to update job seeker. If does not exists, create it.
-            job_seeker: JobSeeker = JobSeeker(**job_seeker_repository.get(user_id))
-            return __update_seeker_profile(profile_dto=profile_dto, job_seeker=job_seeker)
-        except NotFoundError as err:
-            return __create_seeker_profile(user_id=user_id, profile_dto=profile_dto)
+        with unit_of_work():
+            try:
+                # try to update job seeker. If does not exists, create it.
+                job_seeker_repository.update_with_retry(
+                    user_id, lambda job_seeker: __apply_seeker_profile(profile_dto, job_seeker))
+                return _build_response(http_status=HTTPStatus.OK, body="")
+            except NotFoundError as err:
+                return __create_seeker_profile(user_id=user_id, profile_dto=profile_dto)
 
     except (ValidationError, TypeError) as err:
         return _build_error_response(err, HTTPStatus.BAD_REQUEST)
+    except ConflictError as err:
+        return _build_error_response(err, HTTPStatus.CONFLICT)
     except Exception as err:
         return _build_error_response(err)
 
@@ -80,7 +99,7 @@ def __create_seeker_profile(user_id: str, profile_dto: JobSeekerProfileDto) -> d
     return _build_response(http_status=HTTPStatus.OK, body="")
 
 
-def __update_seeker_profile(profile_dto: JobSeekerProfileDto, job_seeker: JobSeeker) -> dict:
+def __apply_seeker_profile(profile_dto: JobSeekerProfileDto, job_seeker: JobSeeker) -> None:
     # convert to model
     job_seeker.full_name = profile_dto.full_name
 
@@ -92,14 +111,11 @@ def __update_seeker_profile(profile_dto: JobSeekerProfileDto, job_seeker: JobSee
     job_seeker.hobbies = profile_dto.hobbies
     job_seeker.job_ambitions = profile_dto.job_ambitions
 
-    job_seeker_repository.update(job_seeker)
-
-    # return resource
-    return _build_response(http_status=HTTPStatus.OK, body="")
-
 
 # GET /api/seeker/profile
 @logger.inject_lambda_context(log_event=True)
+@metrics.log_metrics
+@capacity_metrics.track_invocation
 def get_seeker_profile(event: dict, context: LambdaContext) -> dict:
     try:
         event: APIGatewayProxyEvent = APIGatewayProxyEvent(event)
@@ -121,19 +137,27 @@ def get_seeker_profile(event: dict, context: LambdaContext) -> dict:
 
 # DELETE /api/seeker
 @logger.inject_lambda_context(log_event=True)
+@metrics.log_metrics
+@capacity_metrics.track_invocation
 def delete_seeker(event: dict, context: LambdaContext) -> dict:
     try:
         event: APIGatewayProxyEvent = APIGatewayProxyEvent(event)
         user_id = event.request_context.authorizer.claims["sub"]
 
-        job_seeker_repository.delete(user_id)
-
         user_name = event.request_context.authorizer.claims["cognito:username"]
         userpool_id = str(event.request_context.authorizer.claims["iss"]).split("/")[-1]
         logger.info(f"user id: {user_id}")
 
         client: CognitoIdentityProviderClient = boto3.client("cognito-idp")
-        client.admin_delete_user_attributes(UserPoolId=userpool_id, Username=user_name, UserAttributeNames=["custom:user_type"])
+        if get_seeker_delete_mode() == SeekerDeleteMode.ASYNC:
+            remove_records = lambda: seeker_cleanup_queue.enqueue(user_id, context)
+        else:
+            remove_records = lambda: job_seeker_repository.delete(user_id, context)
+        concurrent_calls.run([
+            remove_records,
+            lambda: client.admin_delete_user_attributes(UserPoolId=userpool_id, Username=user_name,
+                                                        UserAttributeNames=["custom:user_type"])
+        ], context)
 
         return _build_response(http_status=HTTPStatus.OK, body='{}')
     except (ValidationError, TypeError) as err:
@@ -142,62 +166,80 @@ def delete_seeker(event: dict, context: LambdaContext) -> dict:
         return _build_error_response(err)
 
 
+# seeker cleanup queue (SQS) consumer, removes the records of the seekers deleted in the async delete mode
+@logger.inject_lambda_context(log_event=True)
+@metrics.log_metrics
+@capacity_metrics.track_invocation
+def process_seeker_cleanup(event: dict, context: LambdaContext) -> dict:
+    return seeker_cleanup_queue.consume(event, context)
+
+
+# DynamoDB stream of the job seekers table, keeps the jobs top seekers up to date
+@logger.inject_lambda_context
+@metrics.log_metrics
+@capacity_metrics.track_invocation
+def process_seekers_stream(event: dict, context: LambdaContext) -> dict:
+    # errors are raised, so the batch is retried by the stream event source; applying a change twice is harmless.
+    # Removed answers records are left to the seeker delete, a record moved between places is removed and re-added
+    changes = {}
+    for record in event.get('Records', []):
+        new_item = deserialize_image(record['dynamodb'].get('NewImage'))
+        if new_item is None or not JobSeekerAnswers.is_answers_item(new_item):
+            continue
+        old_item = deserialize_image(record['dynamodb'].get('OldImage'))
+        answers = pack_seeker_answers(new_item)
+        previous_answers = None if old_item is None else pack_seeker_answers(old_item)
+        if answers == previous_answers:
+            continue
+        # the last change of a seeker in the batch wins, its previous answers are the first ones
+        first_change = changes.get(new_item['job_seeker_id'])
+        changes[new_item['job_seeker_id']] = SeekerAnswersChange(
+            job_seeker_id=new_item['job_seeker_id'], job_seeker_name=new_item['job_seeker_name'], answers=answers,
+            previous_answers=previous_answers if first_change is None else first_change.previous_answers)
+
+    updated = jobs_repository.apply_seeker_answers(list(changes.values())) if changes else 0
+    logger.info(f"Applied '{len(changes)}' job seeker answer changes out of '{len(event.get('Records', []))}' "
+                f"stream records, '{updated}' job updates")
+    return {'applied': len(changes), 'updated': updated}
+
+
 # GET /api/seeker/relevant-jobs
 @logger.inject_lambda_context(log_event=True)
+@metrics.log_metrics
+@capacity_metrics.track_invocation
 def search_relevant_jobs(event: dict, context: LambdaContext) -> dict:
     try:
         event: APIGatewayProxyEvent = APIGatewayProxyEvent(event)
         user_id = event.request_context.authorizer.claims["sub"]
 
-        job_seeker_answers: JobSeekerAnswers = JobSeekerAnswers(
-            **job_seeker_answers_repository.get_by_seeker_id(user_id))
-
-        answers_arr = [job_seeker_answers.a1,
-                       job_seeker_answers.a2,
-                       job_seeker_answers.a3,
-                       job_seeker_answers.a4,
-                       job_seeker_answers.a5,
-                       job_seeker_answers.a6,
-                       job_seeker_answers.a7,
-                       job_seeker_answers.a8,
-                       job_seeker_answers.a9,
-                       job_seeker_answers.a10]
-
-        search_results: List[JobSearchResult] = jobs_repository.get_jobs(answers_arr, 100)
+        # the precomputed top jobs in the common case, recomputed over the jobs corpus when missing or stale
+        top_jobs: Optional[SeekerTopJobs] = seeker_top_jobs_repository.get_usable(user_id, _RELEVANT_JOBS_LIMIT)
+        if top_jobs is None:
+            job_seeker_answers: JobSeekerAnswers = JobSeekerAnswers(
+                **job_seeker_answers_repository.get_by_seeker_id(user_id))
+            top_jobs = seeker_top_jobs_repository.refresh(user_id, pack_seeker_answers(job_seeker_answers.dict()),
+                                                          _RELEVANT_JOBS_LIMIT)
 
-        dynamo_resource = boto3.resource("dynamodb")
-        employer_table_name = get_env_or_raise(EmployerConstants.EMPLOYERS_TABLE_NAME)
-
-        employer_ids = [item.employer_job.employer_id for item in search_results]
-        employer_ids = list(dict.fromkeys(employer_ids))
+        search_results: List[JobSearchResult] = jobs_repository.get_ranked_jobs(
+            [(top_job.score, top_job.job_id) for top_job in top_jobs.top_jobs[:_RELEVANT_JOBS_LIMIT]])
 
         for item in search_results:
             item.employer_job.created_time = int(item.employer_job.created_time)
 
-        employer_keys = [{"employer_id": employer_id} for employer_id in employer_ids]
+        # jobs embed the summary of their employer, only jobs created before that are joined with the employers
+        employer_ids = list(dict.fromkeys(item.employer_job.employer_id for item in search_results
+                                          if item.employer_job.employer_summary is None))
+        employers_dict = employers_cache.get_many(employer_ids) if employer_ids else {}
+        for item in search_results:
+            if item.employer_job.employer_summary is not None:
+                item.employer = item.employer_job.employer_summary.to_employer(item.employer_job.employer_id)
+                continue
+            item.employer = employers_dict.get(item.employer_job.employer_id)
+            if item.employer:
+                item.employer['created_time'] = int(item.employer['created_time'])
 
-        if len(employer_keys) > 0:
-            try:
-                response = dynamo_resource.batch_get_item(
-                    RequestItems={
-                        employer_table_name: {
-                            'Keys': employer_keys,
-                            'ConsistentRead': True
-                        }
-                    },
-                    ReturnConsumedCapacity='TOTAL'
-                )
-            except ClientError as err:
-                logger.exception(err.response['Error']['Message'])
-                return _build_error_response(err, HTTPStatus.INTERNAL_SERVER_ERROR)
-            else:
-                employers_list = response['Responses'][employer_table_name]
-                employers_dict = {x['employer_id']: x for x in employers_list}
-                for item in search_results:
-                    item.employer = employers_dict.get(item.employer_job.employer_id)
-                    item.employer['created_time'] = int(item.employer['created_time'])
-
-        search_results = [item.dict() for item in search_results]
+        # the embedded summary is served as the employer
+        search_results = [item.dict(exclude={'employer_job': {'employer_summary'}}) for item in search_results]
 
         # return resource
         return _build_response(http_status=HTTPStatus.OK, body=json.dumps(search_results))
@@ -212,6 +254,8 @@ def search_relevant_jobs(event: dict, context: LambdaContext) -> dict:
 
 # POST /api/seekers/answers
 @logger.inject_lambda_context(log_event=True)
+@metrics.log_metrics
+@capacity_metrics.track_invocation
 def add_seeker_answers(event: dict, context: LambdaContext) -> dict:
     try:
         answer_dto_list: List[JobSeekerAnswerDto] = [JobSeekerAnswerDto.parse_obj(item) for item in
@@ -220,23 +264,11 @@ def add_seeker_answers(event: dict, context: LambdaContext) -> dict:
         event: APIGatewayProxyEvent = APIGatewayProxyEvent(event)
         user_id = event.request_context.authorizer.claims["sub"]
 
-        job_seeker: JobSeeker = JobSeeker(**job_seeker_repository.get(user_id))
-
-        job_seeker_answers: JobSeekerAnswers = JobSeekerAnswers(job_seeker_id=user_id,
-                                                                job_seeker_name=job_seeker.full_name)
-
-        job_seeker_answers.a1 = answer_dto_list[0].answer
-        job_seeker_answers.a2 = answer_dto_list[1].answer
-        job_seeker_answers.a3 = answer_dto_list[2].answer
-        job_seeker_answers.a4 = answer_dto_list[3].answer
-        job_seeker_answers.a5 = answer_dto_list[4].answer
-        job_seeker_answers.a6 = answer_dto_list[5].answer
-        job_seeker_answers.a7 = answer_dto_list[6].answer
-        job_seeker_answers.a8 = answer_dto_list[7].answer
-        job_seeker_answers.a9 = answer_dto_list[8].answer
-        job_seeker_answers.a10 = answer_dto_list[9].answer
-
-        job_seeker_answers_repository.create(job_seeker_answers=job_seeker_answers)
+        # the answers record, its pattern count and the answers generation are written in one transaction
+        with unit_of_work():
+            job_seeker: JobSeeker = JobSeeker(**job_seeker_repository.get(user_id))
+            job_seeker_answers = __save_seeker_answers(user_id, job_seeker.full_name, answer_dto_list)
+        _update_materialized_matches(job_seeker_answers)
 
         # return resource
         return _build_response(http_status=HTTPStatus.CREATED, body="")
@@ -244,12 +276,16 @@ def add_seeker_answers(event: dict, context: LambdaContext) -> dict:
         return _build_error_response(err, HTTPStatus.BAD_REQUEST)
     except NotFoundError as err:
         return _build_error_response(err, HTTPStatus.NOT_FOUND)
+    except ConflictError as err:
+        return _build_error_response(err, HTTPStatus.CONFLICT)
     except Exception as err:
         return _build_error_response(err)
 
 
 # POST /api/seekers/experience
 @logger.inject_lambda_context(log_event=True)
+@metrics.log_metrics
+@capacity_metrics.track_invocation
 def add_seeker_experience(event: dict, context: LambdaContext) -> dict:
     try:
         event: APIGatewayProxyEvent = APIGatewayProxyEvent(event)
@@ -281,6 +317,8 @@ def add_seeker_experience(event: dict, context: LambdaContext) -> dict:
 
 # GET /api/seekers/experience
 @logger.inject_lambda_context(log_event=True)
+@metrics.log_metrics
+@capacity_metrics.track_invocation
 def list_seeker_experience(event: dict, context: LambdaContext) -> dict:
     try:
 
@@ -299,6 +337,8 @@ def list_seeker_experience(event: dict, context: LambdaContext) -> dict:
 
 # GET /api/seekers/experience/{experience_id}
 @logger.inject_lambda_context(log_event=True)
+@metrics.log_metrics
+@capacity_metrics.track_invocation
 def get_seeker_experience_by_id(event: dict, context: LambdaContext) -> dict:
     try:
         experience_id = event["pathParameters"]["experience_id"]
@@ -319,6 +359,8 @@ def get_seeker_experience_by_id(event: dict, context: LambdaContext) -> dict:
 
 # PUT /api/seekers/languages
 @logger.inject_lambda_context(log_event=True)
+@metrics.log_metrics
+@capacity_metrics.track_invocation
 def add_seeker_languages(event: dict, context: LambdaContext) -> dict:
     try:
         languages_list: List[str] = json.loads(event["body"])
@@ -326,39 +368,39 @@ def add_seeker_languages(event: dict, context: LambdaContext) -> dict:
         event: APIGatewayProxyEvent = APIGatewayProxyEvent(event)
         user_id = event.request_context.authorizer.claims["sub"]
 
-        job_seeker: JobSeeker = JobSeeker(**job_seeker_repository.get(user_id))
-
-        job_seeker.languages = languages_list
+        def _set_languages(job_seeker: JobSeeker) -> None:
+            job_seeker.languages = languages_list
 
-        job_seeker_repository.update(job_seeker)
+        with unit_of_work():
+            job_seeker_repository.update_with_retry(user_id, _set_languages)
 
         # return resource
         return _build_response(http_status=HTTPStatus.NO_CONTENT, body="")
     except (ValidationError, TypeError) as err:
         return _build_error_response(err, HTTPStatus.BAD_REQUEST)
+    except ConflictError as err:
+        return _build_error_response(err, HTTPStatus.CONFLICT)
     except Exception as err:
         return _build_error_response(err)
 
 
 # GET /api/seeker/summary
 @logger.inject_lambda_context(log_event=True)
+@metrics.log_metrics
+@capacity_metrics.track_invocation
 def get_seeker_summary(event: dict, context: LambdaContext) -> dict:
     try:
         event: APIGatewayProxyEvent = APIGatewayProxyEvent(event)
         user_id = event.request_context.authorizer.claims["sub"]
 
-        # convert to model
-        job_seeker: JobSeeker = JobSeeker(**job_seeker_repository.get(user_id))
+        summary: SeekerSummary = job_seeker_repository.get_summary(user_id, context)
 
-        job_seeker_experience_list: List[Experience] = job_seeker_experience_repository.get_all(user_id)
+        # convert to model
+        job_seeker: JobSeeker = JobSeeker(**summary.profile)
 
-        job_seeker_answers = None
+        job_seeker_experience_list: List[Experience] = summary.experiences
 
-        try:
-            job_seeker_answers: JobSeekerAnswers = \
-                JobSeekerAnswers(**job_seeker_answers_repository.get_by_seeker_id(user_id))
-        except NotFoundError:
-            pass
+        job_seeker_answers = JobSeekerAnswers(**summary.answers) if summary.answers else None
 
         # TODO convert to resource
         resource: JobSeekerResource = JobSeekerResource(profile=job_seeker,
@@ -374,15 +416,14 @@ def get_seeker_summary(event: dict, context: LambdaContext) -> dict:
 
 # GET /api/list-relevant-seekers/
 @logger.inject_lambda_context(log_event=True)
+@metrics.log_metrics
+@capacity_metrics.track_invocation
 def list_relevant_seekers(event: dict, context: LambdaContext) -> dict:
     try:
         answer_dto_list: List[JobSeekerAnswerDto] = [JobSeekerAnswerDto.parse_obj(item) for item in
                                                      json.loads(event["body"])]
 
-        employer_answers: List[bool] = [answer_dto_list[0].answer, answer_dto_list[1].answer, answer_dto_list[2].answer,
-                                        answer_dto_list[3].answer, answer_dto_list[4].answer, answer_dto_list[5].answer,
-                                        answer_dto_list[6].answer, answer_dto_list[7].answer, answer_dto_list[8].answer,
-                                        answer_dto_list[9].answer]
+        employer_answers: AnswerVector = pack_answers([answer_dto.answer for answer_dto in answer_dto_list])
 
         # list seekers models
         results: List[SearchResult] = job_seeker_answers_repository.find_best_match_answers(employer_answers)
@@ -397,31 +438,59 @@ def list_relevant_seekers(event: dict, context: LambdaContext) -> dict:
         return _build_error_response(err)
 
 
+def __save_seeker_answers(job_seeker_id: str, job_seeker_name: str,
+                          answer_dto_list: List[JobSeekerAnswerDto]) -> JobSeekerAnswers:
+    job_seeker_answers: JobSeekerAnswers = JobSeekerAnswers(job_seeker_id=job_seeker_id,
+                                                            job_seeker_name=job_seeker_name)
+    job_seeker_answers.a1 = answer_dto_list[0].answer
+    job_seeker_answers.a2 = answer_dto_list[1].answer
+    job_seeker_answers.a3 = answer_dto_list[2].answer
+    job_seeker_answers.a4 = answer_dto_list[3].answer
+    job_seeker_answers.a5 = answer_dto_list[4].answer
+    job_seeker_answers.a6 = answer_dto_list[5].answer
+    job_seeker_answers.a7 = answer_dto_list[6].answer
+    job_seeker_answers.a8 = answer_dto_list[7].answer
+    job_seeker_answers.a9 = answer_dto_list[8].answer
+    job_seeker_answers.a10 = answer_dto_list[9].answer
+
+    # create only, the put is conditioned on no answers record being there
+    job_seeker_answers_repository.create(job_seeker_answers=job_seeker_answers)
+    return job_seeker_answers
+
+
 # region api with {id}
 
 # PUT /api/seekers/{id}/profile
 @logger.inject_lambda_context(log_event=True)
+@metrics.log_metrics
+@capacity_metrics.track_invocation
 def create_or_update_seeker_profile_with_id(event: dict, context: LambdaContext) -> dict:
     try:
         job_seeker_id = event["pathParameters"]["id"]
 
         profile_dto: JobSeekerProfileDto = JobSeekerProfileDto.parse_raw(event["body"])
 
-        try:
-            # try to update job seeker. If does not exists, create it.
-            job_seeker: JobSeeker = JobSeeker(**job_seeker_repository.get(job_seeker_id))
-            return __update_seeker_profile(profile_dto=profile_dto, job_seeker=job_seeker)
-        except NotFoundError as err:
-            return __create_seeker_profile(user_id=job_seeker_id, profile_dto=profile_dto)
+        with unit_of_work():
+            try:
+                # try to update job seeker. If does not exists, create it.
+                job_seeker_repository.update_with_retry(
+                    job_seeker_id, lambda job_seeker: __apply_seeker_profile(profile_dto, job_seeker))
+                return _build_response(http_status=HTTPStatus.OK, body="")
+            except NotFoundError as err:
+                return __create_seeker_profile(user_id=job_seeker_id, profile_dto=profile_dto)
 
     except (ValidationError, TypeError) as err:
         return _build_error_response(err, HTTPStatus.BAD_REQUEST)
+    except ConflictError as err:
+        return _build_error_response(err, HTTPStatus.CONFLICT)
     except Exception as err:
         return _build_error_response(err)
 
 
 # GET /api/seekers/{id}/profile
 @logger.inject_lambda_context(log_event=True)
+@metrics.log_metrics
+@capacity_metrics.track_invocation
 def get_seeker_profile_with_id(event: dict, context: LambdaContext) -> dict:
     try:
         job_seeker_id = event["pathParameters"]["id"]
@@ -442,6 +511,8 @@ def get_seeker_profile_with_id(event: dict, context: LambdaContext) -> dict:
 
 # POST /api/seekers/{id}/answers
 @logger.inject_lambda_context(log_event=True)
+@metrics.log_metrics
+@capacity_metrics.track_invocation
 def add_seeker_answers_with_id(event: dict, context: LambdaContext) -> dict:
     try:
         answer_dto_list: List[JobSeekerAnswerDto] = [JobSeekerAnswerDto.parse_obj(item) for item in
@@ -449,23 +520,11 @@ def add_seeker_answers_with_id(event: dict, context: LambdaContext) -> dict:
 
         job_seeker_id = event["pathParameters"]["id"]
 
-        job_seeker: JobSeeker = JobSeeker(**job_seeker_repository.get(job_seeker_id))
-
-        job_seeker_answers: JobSeekerAnswers = JobSeekerAnswers(job_seeker_id=job_seeker_id,
-                                                                job_seeker_name=job_seeker.full_name)
-
-        job_seeker_answers.a1 = answer_dto_list[0].answer
-        job_seeker_answers.a2 = answer_dto_list[1].answer
-        job_seeker_answers.a3 = answer_dto_list[2].answer
-        job_seeker_answers.a4 = answer_dto_list[3].answer
-        job_seeker_answers.a5 = answer_dto_list[4].answer
-        job_seeker_answers.a6 = answer_dto_list[5].answer
-        job_seeker_answers.a7 = answer_dto_list[6].answer
-        job_seeker_answers.a8 = answer_dto_list[7].answer
-        job_seeker_answers.a9 = answer_dto_list[8].answer
-        job_seeker_answers.a10 = answer_dto_list[9].answer
-
-        job_seeker_answers_repository.create(job_seeker_answers=job_seeker_answers)
+        # the answers record, its pattern count and the answers generation are written in one transaction
+        with unit_of_work():
+            job_seeker: JobSeeker = JobSeeker(**job_seeker_repository.get(job_seeker_id))
+            job_seeker_answers = __save_seeker_answers(job_seeker_id, job_seeker.full_name, answer_dto_list)
+        _update_materialized_matches(job_seeker_answers)
 
         # return resource
         return _build_response(http_status=HTTPStatus.CREATED, body="")
@@ -473,6 +532,8 @@ def add_seeker_answers_with_id(event: dict, context: LambdaContext) -> dict:
         return _build_error_response(err, HTTPStatus.BAD_REQUEST)
     except NotFoundError as err:
         return _build_error_response(err, HTTPStatus.NOT_FOUND)
+    except ConflictError as err:
+        return _build_error_response(err, HTTPStatus.CONFLICT)
     except Exception as err:
         return _build_error_response(err)
 
@@ -483,6 +544,8 @@ def add_seeker_answers_with_id(event: dict, context: LambdaContext) -> dict:
 
 # POST /api/users/type
 @logger.inject_lambda_context(log_event=True)
+@metrics.log_metrics
+@capacity_metrics.track_invocation
 def set_user_type(event: dict, context: LambdaContext) -> dict:
     try:
         event: APIGatewayProxyEvent = APIGatewayProxyEvent(event)
@@ -505,6 +568,20 @@ def set_user_type(event: dict, context: LambdaContext) -> dict:
 # endregion
 
 
+def _update_materialized_matches(job_seeker_answers: JobSeekerAnswers) -> None:
+    # the answers are already stored, a failure here only costs a later search a recompute. The jobs top seekers
+    # are updated off the request path, from the job seekers table stream (process_seekers_stream)
+    answers = pack_seeker_answers(job_seeker_answers.dict())
+    try:
+        seeker_top_jobs_repository.refresh(job_seeker_answers.job_seeker_id, answers, _RELEVANT_JOBS_LIMIT)
+    except Exception as err:
+        logger.exception(f"Failed to materialize top jobs: {str(err)}")
+        try:
+            seeker_top_jobs_repository.delete(job_seeker_answers.job_seeker_id)
+        except Exception as delete_err:
+            logger.exception(f"Failed to drop outdated top jobs: {str(delete_err)}")
+
+
 def _build_response(http_status: HTTPStatus, body: str) -> dict:
     return {'statusCode': http_status,
             'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}, 'body': body}
@@ -3,20 +3,25 @@ from http import HTTPStatus
 from aws_lambda_context import LambdaContext
 from pydantic import ValidationError
 from aws_lambda_powertools import Logger
-from service.models.employer.employer_job import EmployerJob
+from service.dao.capacity_metrics import capacity_metrics, metrics
+from service.models.employer.employer_job import EmployerJob, EmployerSummary
 from service.models.employer.employer import Employer
-from service.common.utils import get_env_or_raise
+from service.dao.employers_cache import employers_cache
+from service.dao.jobs_repository import jobs_repository
+from service.matching import pack_job_answers
 from service.lambdas.employer.constants import EmployerConstants
 import uuid
-import boto3
 from datetime import datetime
 from decimal import Decimal
 
 logger = Logger()
+capacity_metrics.install()
 
 
 # POST /api/employers/{employer_id}/jobs
 @logger.inject_lambda_context(log_event=True)
+@metrics.log_metrics
+@capacity_metrics.track_invocation
 def add_employer_job(event: dict, context: LambdaContext) -> dict:
     try:
         if 'pathParameters' not in event or not event['pathParameters'] \
@@ -28,16 +33,21 @@ def add_employer_job(event: dict, context: LambdaContext) -> dict:
         employer_job.job_id = str(uuid.uuid4())
         employer_job.employer_id = event["pathParameters"]["employer_id"]
         employer_job.created_time = Decimal(datetime.now().timestamp())
-        dynamo_resource = boto3.resource("dynamodb")
-        employers_table = dynamo_resource.Table(get_env_or_raise(EmployerConstants.EMPLOYERS_TABLE_NAME))
-        jobs_table = dynamo_resource.Table(get_env_or_raise(EmployerConstants.JOBS_TABLE_NAME))
         # Check if employer id exists, will throw exception if not
-        Employer.parse_obj(employers_table.get_item(
-            Key={"employer_id": employer_job.employer_id}).get('Item', {}))
-        jobs_table.put_item(Item=employer_job.dict(exclude_none=True))
+        employer = Employer.parse_obj(employers_cache.get(employer_job.employer_id) or {})
+        # shown with the job in searches, kept up to date by the employers stream
+        employer_job.employer_summary = EmployerSummary.of(employer)
+        jobs_repository.create(employer_job)
+        job_answers = pack_job_answers(employer_job.answers)
+        if job_answers is not None:
+            try:
+                jobs_repository.refresh_top_seekers(employer_job.job_id, job_answers)
+            except Exception as err:
+                # the job is already stored, its top seekers are computed on their first read instead
+                logger.exception(f"Failed to compute the job top seekers: {str(err)}")
         return {'statusCode': HTTPStatus.CREATED,
                 'headers': EmployerConstants.HEADERS,
-                'body': employer_job.json(exclude_none=True)}
+                'body': employer_job.json(exclude_none=True, exclude={'employer_summary'})}
     except (ValidationError, TypeError) as err:
         return {'statusCode': HTTPStatus.BAD_REQUEST,
                 'headers': EmployerConstants.HEADERS,
@@ -4,6 +4,16 @@ from typing import Final
 class EmployerConstants:
     EMPLOYERS_TABLE_NAME: Final = "EMPLOYERS_TABLE_NAME"
     JOBS_TABLE_NAME: Final = "JOBS_TABLE_NAME"
+    JOBS_LAST_MODIFIED_INDEX_NAME: Final = "last-modified-index"
+    # jobs by employer id
+    JOBS_EMPLOYER_INDEX_NAME: Final = "second-index"
+    # warm container jobs corpus cache settings (env var names)
+    JOBS_CORPUS_PRELOAD: Final = "JOBS_CORPUS_PRELOAD"
+    JOBS_CORPUS_MAX_STALENESS_SECONDS: Final = "JOBS_CORPUS_MAX_STALENESS_SECONDS"
+    JOBS_CORPUS_FULL_RELOAD_SECONDS: Final = "JOBS_CORPUS_FULL_RELOAD_SECONDS"
+    # warm container employers cache settings (env var names)
+    EMPLOYERS_CACHE_TTL_SECONDS: Final = "EMPLOYERS_CACHE_TTL_SECONDS"
+    EMPLOYERS_CACHE_NEGATIVE_TTL_SECONDS: Final = "EMPLOYERS_CACHE_NEGATIVE_TTL_SECONDS"
     LIMITS_PER_EMPLOYER_PAGE: Final = 100
     HEADERS = {
         'Content-Type': 'application/json',
@@ -3,8 +3,10 @@ from http import HTTPStatus
 from aws_lambda_context import LambdaContext
 from pydantic import ValidationError
 from aws_lambda_powertools import Logger
+from service.dao.capacity_metrics import capacity_metrics, metrics
 from service.models.employer.employer import Employer
 from service.common.utils import get_env_or_raise
+from service.dao.employers_cache import employers_cache
 from service.lambdas.employer.constants import EmployerConstants
 import uuid
 import boto3
@@ -12,10 +14,13 @@ from datetime import datetime
 from decimal import Decimal
 
 logger = Logger()
+capacity_metrics.install()
 
 
 # POST /api/jobli/employers
 @logger.inject_lambda_context(log_event=True)
+@metrics.log_metrics
+@capacity_metrics.track_invocation
 def create_employer(event: dict, context: LambdaContext) -> dict:
     try:
         if 'body' not in event or not event['body']:
@@ -28,6 +33,7 @@ def create_employer(event: dict, context: LambdaContext) -> dict:
         dynamo_resource = boto3.resource("dynamodb")
         employers_table = dynamo_resource.Table(get_env_or_raise(EmployerConstants.EMPLOYERS_TABLE_NAME))
         employers_table.put_item(Item=employer.dict(exclude_none=True))
+        employers_cache.invalidate(employer.employer_id)
         return {'statusCode': HTTPStatus.CREATED,
                 'headers': EmployerConstants.HEADERS,
                 'body': employer.json(exclude_none=True)}
@@ -2,6 +2,7 @@ from http import HTTPStatus
 
 from aws_lambda_context import LambdaContext
 from pydantic import ValidationError
+from service.dao.capacity_metrics import capacity_metrics, metrics
 from service.common.utils import get_env_or_raise
 from service.models.employer.employer import Employer
 from service.lambdas.employer.constants import EmployerConstants
@@ -9,10 +10,13 @@ from aws_lambda_powertools import Logger
 import boto3
 
 logger = Logger()
+capacity_metrics.install()
 
 
 # GET /api/employers/{employer_id}
 @logger.inject_lambda_context(log_event=True)
+@metrics.log_metrics
+@capacity_metrics.track_invocation
 def get_employer_by_id(event: dict, context: LambdaContext) -> dict:
     try:
         if 'pathParameters' not in event or not event['pathParameters'] \
@@ -2,6 +2,7 @@ from http import HTTPStatus
 
 from aws_lambda_context import LambdaContext
 from pydantic import ValidationError
+from service.dao.capacity_metrics import capacity_metrics, metrics
 from service.common.utils import get_env_or_raise
 from service.models.employer.employer_job import EmployerJob
 from service.lambdas.employer.constants import EmployerConstants
@@ -9,10 +10,13 @@ from aws_lambda_powertools import Logger
 import boto3
 
 logger = Logger()
+capacity_metrics.install()
 
 
 # GET /api/employers/{employer_id}/jobs/{job_id}
 @logger.inject_lambda_context(log_event=True)
+@metrics.log_metrics
+@capacity_metrics.track_invocation
 def get_employer_job_by_id(event: dict, context: LambdaContext) -> dict:
     try:
         if 'pathParameters' not in event or not event['pathParameters'] \
@@ -28,7 +32,7 @@ def get_employer_job_by_id(event: dict, context: LambdaContext) -> dict:
             Key={"employer_id": employer_id, 'job_id': job_id}).get('Item', {}))
         return {'statusCode': HTTPStatus.OK,
                 'headers': EmployerConstants.HEADERS,
-                'body': job.json(exclude_none=True)}
+                'body': job.json(exclude_none=True, exclude={'employer_summary'})}
     except (ValidationError, TypeError) as err:
         return {'statusCode': HTTPStatus.BAD_REQUEST,
                 'headers': EmployerConstants.HEADERS,
@@ -3,6 +3,7 @@ from http import HTTPStatus
 from aws_lambda_context import LambdaContext
 from pydantic import ValidationError
 from aws_lambda_powertools import Logger
+from service.dao.capacity_metrics import capacity_metrics, metrics
 from service.models.employer.employer_job_filter import EmployerJobFilter
 from service.models.employer.employer_job import EmployerJob
 from pydantic import parse_obj_as
@@ -14,10 +15,13 @@ import boto3
 import json
 
 logger = Logger()
+capacity_metrics.install()
 
 
 # GET /api/employers/{employer_id}/jobs
 @logger.inject_lambda_context(log_event=True)
+@metrics.log_metrics
+@capacity_metrics.track_invocation
 def get_employer_jobs(event: dict, context: LambdaContext) -> dict:
     try:
         if 'pathParameters' not in event or not event['pathParameters'] \
@@ -47,7 +51,8 @@ def get_employer_jobs(event: dict, context: LambdaContext) -> dict:
             result_items = parse_obj_as(List[EmployerJob], jobs_table.scan(**args).get("Items", []))
         return {'statusCode': HTTPStatus.OK,
                 'headers': EmployerConstants.HEADERS,
-                'body': json.dumps({"jobs": [e.json(exclude_none=True) for e in result_items]})}
+                'body': json.dumps({"jobs": [e.json(exclude_none=True, exclude={'employer_summary'})
+                                              for e in result_items]})}
     except (ValidationError, TypeError) as err:
         return {'statusCode': HTTPStatus.BAD_REQUEST,
                 'headers': EmployerConstants.HEADERS,
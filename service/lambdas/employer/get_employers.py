@@ -3,6 +3,7 @@ from http import HTTPStatus
 from aws_lambda_context import LambdaContext
 from pydantic import ValidationError
 from aws_lambda_powertools import Logger
+from service.dao.capacity_metrics import capacity_metrics, metrics
 from service.models.employer.employer_filter import EmployerFilter
 from service.models.employer.employer import Employer
 from pydantic import parse_obj_as
@@ -14,10 +15,13 @@ import boto3
 import json
 
 logger = Logger()
+capacity_metrics.install()
 
 
 # GET /api/employers
 @logger.inject_lambda_context(log_event=True)
+@metrics.log_metrics
+@capacity_metrics.track_invocation
 def get_employers(event: dict, context: LambdaContext) -> dict:
     try:
         dynamo_resource = boto3.resource("dynamodb")
@@ -0,0 +1,57 @@
+from http import HTTPStatus
+
+from aws_lambda_context import LambdaContext
+from aws_lambda_powertools import Logger
+from pydantic import ValidationError
+import json
+
+from service.dao.capacity_metrics import capacity_metrics, metrics
+from service.dao.jobs_corpus_cache import unpack_job_item_answers
+from service.dao.jobs_repository import jobs_repository
+from service.lambdas.employer.constants import EmployerConstants
+
+logger = Logger()
+capacity_metrics.install()
+
+
+# GET /api/employers/{employer_id}/jobs/{job_id}/relevant-seekers
+@logger.inject_lambda_context(log_event=True)
+@metrics.log_metrics
+@capacity_metrics.track_invocation
+def get_job_relevant_seekers(event: dict, context: LambdaContext) -> dict:
+    try:
+        if 'pathParameters' not in event or not event['pathParameters'] \
+                or 'employer_id' not in event['pathParameters'] or 'job_id' not in event['pathParameters']:
+            return {'statusCode': HTTPStatus.BAD_REQUEST,
+                    'headers': EmployerConstants.HEADERS,
+                    'body': "Missing employer id/job id path params"}
+        employer_id = event['pathParameters']['employer_id']
+        job_id = event['pathParameters']['job_id']
+
+        job_item, top_seekers = jobs_repository.get_top_seekers(job_id)
+        if job_item is None or job_item.get('employer_id') != employer_id:
+            return {'statusCode': HTTPStatus.NOT_FOUND,
+                    'headers': EmployerConstants.HEADERS,
+                    'body': f"Job '{job_id}' of employer '{employer_id}' not found"}
+
+        job_answers = unpack_job_item_answers(job_item)
+        if job_answers is None:
+            # the job does not hold all the answers yet, nobody matches it
+            results = []
+        else:
+            # the list is computed on the first read, and recomputed once a removed seeker left it incomplete
+            if top_seekers is None or not top_seekers.complete:
+                top_seekers = jobs_repository.refresh_top_seekers(job_id, job_answers)
+            results = [result.dict() for result in top_seekers.top_seekers]
+
+        return {'statusCode': HTTPStatus.OK,
+                'headers': EmployerConstants.HEADERS,
+                'body': json.dumps(results)}
+    except (ValidationError, TypeError) as err:
+        return {'statusCode': HTTPStatus.BAD_REQUEST,
+                'headers': EmployerConstants.HEADERS,
+                'body': str(err)}
+    except Exception as err:
+        return {'statusCode': HTTPStatus.INTERNAL_SERVER_ERROR,
+                'headers': EmployerConstants.HEADERS,
+                'body': str(err)}
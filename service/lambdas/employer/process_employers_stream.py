@@ -0,0 +1,41 @@
+from typing import Dict, Optional
+
+from aws_lambda_context import LambdaContext
+from aws_lambda_powertools import Logger
+
+from service.common.dynamo_stream import deserialize_image
+from service.dao.capacity_metrics import capacity_metrics, metrics
+from service.dao.jobs_repository import jobs_repository
+from service.models.employer.employer import Employer
+from service.models.employer.employer_job import EmployerSummary
+
+logger = Logger()
+capacity_metrics.install()
+
+
+def _summary(item: Optional[Dict]) -> Optional[EmployerSummary]:
+    if item is None:
+        return None
+    return EmployerSummary.of(Employer.parse_obj(item))
+
+
+# DynamoDB stream of the employers table
+@logger.inject_lambda_context
+@metrics.log_metrics
+@capacity_metrics.track_invocation
+def process_employers_stream(event: dict, context: LambdaContext) -> dict:
+    # errors are raised, so the batch is retried by the stream event source; rewriting a summary twice is harmless
+    updated_jobs = 0
+    for record in event.get('Records', []):
+        new_item = deserialize_image(record['dynamodb'].get('NewImage'))
+        old_item = deserialize_image(record['dynamodb'].get('OldImage'))
+        summary = _summary(new_item)
+        # a new employer has no jobs yet, a deleted one keeps the summaries its jobs were listed with
+        if new_item is None or old_item is None or summary == _summary(old_item):
+            continue
+
+        updated_jobs += jobs_repository.update_employer_summary(new_item['employer_id'], summary)
+
+    logger.info(f"Updated the employer summary of '{updated_jobs}' jobs out of "
+                f"'{len(event.get('Records', []))}' stream records")
+    return {'updated_jobs': updated_jobs}
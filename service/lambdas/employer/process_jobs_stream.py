@@ -0,0 +1,41 @@
+from typing import Dict, Optional
+
+from aws_lambda_context import LambdaContext
+from aws_lambda_powertools import Logger
+
+from service.common.dynamo_stream import deserialize_image
+from service.dao.capacity_metrics import capacity_metrics, metrics
+from service.dao.jobs_corpus_cache import JOBS_TOMBSTONE_ATTRIBUTE, unpack_job_item_answers
+from service.dao.seeker_top_jobs_repository import seeker_top_jobs_repository
+from service.matching import AnswerVector
+
+logger = Logger()
+capacity_metrics.install()
+
+
+def _matchable_answers(item: Optional[Dict]) -> Optional[AnswerVector]:
+    if item is None or item.get(JOBS_TOMBSTONE_ATTRIBUTE):
+        return None
+    return unpack_job_item_answers(item)
+
+
+# DynamoDB stream of the jobs table
+@logger.inject_lambda_context
+@metrics.log_metrics
+@capacity_metrics.track_invocation
+def process_jobs_stream(event: dict, context: LambdaContext) -> dict:
+    # errors are raised, so the batch is retried by the stream event source; applying a change twice is harmless
+    applied = 0
+    for record in event.get('Records', []):
+        new_item = deserialize_image(record['dynamodb'].get('NewImage'))
+        old_item = deserialize_image(record['dynamodb'].get('OldImage'))
+        job_answers, previous_job_answers = _matchable_answers(new_item), _matchable_answers(old_item)
+        if job_answers == previous_job_answers:
+            continue
+
+        job_id = (new_item or old_item)['job_id']
+        seeker_top_jobs_repository.apply_job_change(job_id, job_answers, previous_job_answers)
+        applied += 1
+
+    logger.info(f"Applied '{applied}' job answer changes out of '{len(event.get('Records', []))}' stream records")
+    return {'applied': applied}
@@ -3,17 +3,22 @@ from http import HTTPStatus
 from aws_lambda_context import LambdaContext
 from pydantic import ValidationError
 from aws_lambda_powertools import Logger
+from service.dao.capacity_metrics import capacity_metrics, metrics
 from service.models.employer.employer import Employer
 from service.common.utils import get_env_or_raise
+from service.dao.employers_cache import employers_cache
 from service.lambdas.employer.constants import EmployerConstants
 from typing import Dict
 import boto3
 
 logger = Logger()
+capacity_metrics.install()
 
 
 # PUT /api/employers/{employer_id}
 @logger.inject_lambda_context(log_event=True)
+@metrics.log_metrics
+@capacity_metrics.track_invocation
 def update_employer(event: dict, context: LambdaContext) -> dict:
     try:
         if 'pathParameters' not in event or not event['pathParameters'] \
@@ -56,6 +61,7 @@ def update_employer(event: dict, context: LambdaContext) -> dict:
             },
             ReturnValues="UPDATED_NEW"
         )
+        employers_cache.invalidate(employer_id)
 
         return {'statusCode': HTTPStatus.OK,
                 'headers': EmployerConstants.HEADERS,
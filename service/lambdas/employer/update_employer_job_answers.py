@@ -3,8 +3,11 @@ from http import HTTPStatus
 from aws_lambda_context import LambdaContext
 from pydantic import ValidationError
 from aws_lambda_powertools import Logger
+from service.dao.capacity_metrics import capacity_metrics, metrics
 from service.models.employer.employer_job import EmployerJob
 from service.common.utils import get_env_or_raise
+from service.dao.jobs_repository import jobs_repository
+from service.matching import pack_job_answers
 from service.models.common import Answer
 from service.lambdas.employer.constants import EmployerConstants
 import boto3
@@ -12,10 +15,13 @@ from pydantic import parse_raw_as
 from typing import List
 
 logger = Logger()
+capacity_metrics.install()
 
 
 # PUT /api/employers/{employer_id}/jobs/{job_id}
 @logger.inject_lambda_context(log_event=True)
+@metrics.log_metrics
+@capacity_metrics.track_invocation
 def update_employer_job_answers(event: dict, context: LambdaContext) -> dict:
     try:
         if 'pathParameters' not in event or not event['pathParameters'] \
@@ -37,15 +43,14 @@ def update_employer_job_answers(event: dict, context: LambdaContext) -> dict:
                     'headers': EmployerConstants.HEADERS,
                     'body': "Given employer id does not match job id"}
         stored_job.answers = employer_answers
-        jobs_table.update_item(Key={
-                "job_id": job_id
-            },
-            UpdateExpression="set answers=:a",
-            ExpressionAttributeValues={
-                ":a": [a.dict() for a in stored_job.answers],
-            },
-            ReturnValues="UPDATED_NEW"
-        )
+        jobs_repository.update_answers(job_id, stored_job.answers)
+        job_answers = pack_job_answers(stored_job.answers)
+        if job_answers is not None:
+            try:
+                jobs_repository.refresh_top_seekers(job_id, job_answers)
+            except Exception as err:
+                # the job is already stored, its top seekers are computed on their first read instead
+                logger.exception(f"Failed to compute the job top seekers: {str(err)}")
         return {'statusCode': HTTPStatus.CREATED,
                 'headers': EmployerConstants.HEADERS,
                 'body': stored_job.json(exclude_none=True)}
@@ -0,0 +1,257 @@
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+try:
+    import numpy
+except ImportError:  # numpy is optional, the python loop kernel is used without it
+    numpy = None
+
+NUM_OF_ANSWERS = 10
+FULL_MASK = (1 << NUM_OF_ANSWERS) - 1
+
+# popcount of every possible answer pattern, indexed by the pattern itself
+_POPCOUNT: List[int] = [bin(pattern).count("1") for pattern in range(1 << NUM_OF_ANSWERS)]
+
+
+class AnswerVector(NamedTuple):
+    """
+    The ten yes/no answers packed into two integers: bit i of `bits` holds answer i + 1 and bit i of `answered`
+    tells whether that answer was given at all.
+    """
+    bits: int
+    answered: int
+
+
+def pack_answers(answers: Sequence[Optional[bool]]) -> AnswerVector:
+    bits = 0
+    answered = 0
+    for i, answer in enumerate(answers[:NUM_OF_ANSWERS]):
+        if answer is None:
+            continue
+        answered |= 1 << i
+        if answer:
+            bits |= 1 << i
+    return AnswerVector(bits=bits, answered=answered)
+
+
+def pack_seeker_answers(item: Dict) -> AnswerVector:
+    """
+    :param item: a job seeker answers record (model dict or raw dynamo item) holding the answers as a1..a10
+    """
+    return pack_answers([item.get('a' + str(i)) for i in range(1, NUM_OF_ANSWERS + 1)])
+
+
+def pack_job_answers(answers: Optional[Sequence]) -> Optional[AnswerVector]:
+    """
+    :param answers: the `answers` list of an employer job, as `Answer` models or raw dicts
+    :return: the packed answers, or None if the job does not hold exactly NUM_OF_ANSWERS answers
+    """
+    if answers is None or len(answers) != NUM_OF_ANSWERS:
+        return None
+    return pack_answers([answer.get('answer') if isinstance(answer, dict) else answer.answer for answer in answers])
+
+
+def score(query: AnswerVector, candidate: AnswerVector) -> int:
+    """
+    Number of questions both sides answered, and answered the same way (XNOR over the common answered bits).
+
+    This changed the ranking of the matchers before the kernel, which compared answers 1-9 only and counted a
+    question neither side answered as a match: answer 10 now counts, a question unanswered on either side does not.
+    """
+    return _POPCOUNT[~(query.bits ^ candidate.bits) & query.answered & candidate.answered & FULL_MASK]
+
+
+def patterns_by_score(query: AnswerVector) -> List[Tuple[int, int]]:
+    """
+    :return: (score, pattern) for every fully answered pattern, best score first. For a fully answered query this is
+    the order of increasing Hamming distance from the query.
+    """
+    scored = [(score(query, AnswerVector(bits=pattern, answered=FULL_MASK)), pattern)
+              for pattern in range(1 << NUM_OF_ANSWERS)]
+    return sorted(scored, key=lambda x: x[0], reverse=True)
+
+
+def pattern_to_str(pattern: int) -> str:
+    """
+    :return: the pattern as '0'/'1' characters, in question order (answer 1 first)
+    """
+    return format(pattern, f'0{NUM_OF_ANSWERS}b')[::-1]
+
+
+class TopKCollector:
+    """
+    Keeps the best `max_results` items seen so far in one bucket per possible score. Ties are broken by arrival
+    order, so the kept items are exactly what `sorted(items, key=score, reverse=True)[:max_results]` would return,
+    while never holding more than `max_results` items (plus one counter per score).
+    """
+
+    def __init__(self, max_results: int, max_score: int = NUM_OF_ANSWERS):
+        self.__max_results = max_results
+        self.__max_score = max_score
+        self.__buckets: List[List[Any]] = [[] for _ in range(max_score + 1)]
+        self.__score_counts: List[int] = [0] * (max_score + 1)
+        self.__size = 0
+
+    def accepts(self, item_score: int) -> bool:
+        """
+        :return: True if an item with the given score would be kept, so callers can skip building it otherwise
+        """
+        if self.__size < self.__max_results:
+            return True
+        return self.__max_results > 0 and item_score > self.__lowest_score()
+
+    def add(self, item_score: int, item: Any) -> bool:
+        self.__score_counts[item_score] += 1
+        if not self.accepts(item_score):
+            return False
+
+        self.__buckets[item_score].append(item)
+        self.__size += 1
+        if self.__size > self.__max_results:
+            self.__buckets[self.__lowest_score()].pop()
+            self.__size -= 1
+        return True
+
+    def capacity_for(self, item_score: int) -> int:
+        """
+        :return: how many more items with the given score can still be kept
+        """
+        return self.__max_results - sum(len(bucket) for bucket in self.__buckets[item_score:])
+
+    def is_complete(self) -> bool:
+        """
+        :return: True once `max_results` perfect scores were collected, no later item can make it anymore
+        """
+        return len(self.__buckets[self.__max_score]) >= self.__max_results
+
+    @property
+    def score_counts(self) -> List[int]:
+        """
+        :return: how many items were offered per score, including the ones that were not kept
+        """
+        return list(self.__score_counts)
+
+    def results(self) -> List[Tuple[int, Any]]:
+        """
+        :return: (score, item) pairs, best score first
+        """
+        return [(item_score, item) for item_score in range(self.__max_score, -1, -1)
+                for item in self.__buckets[item_score]]
+
+    def __lowest_score(self) -> int:
+        return next(item_score for item_score, bucket in enumerate(self.__buckets) if bucket)
+
+
+class RankingChange(NamedTuple):
+    items: List[Any]
+    exhaustive: bool
+    complete: bool
+
+
+def apply_ranking_change(ranking: List[Any], item_id: str, item: Optional[Any], max_results: int, exhaustive: bool,
+                         id_of: Callable[[Any], str]) -> Optional[RankingChange]:
+    """
+    Moves a changed item to its place in a materialized top `max_results` ranking, without the full corpus
+
+    :param ranking: the ranked items (having a `score`), best score first
+    :param item: the changed item with its new score, None if it left the corpus
+    :param exhaustive: True when the ranking holds the whole corpus
+    :return: the updated ranking, or None if unchanged. The ranking is no longer complete when one of its items
+    dropped below items that were left out of it, only a full recompute can tell which ones.
+    """
+    previous = [ranked for ranked in ranking if id_of(ranked) == item_id]
+    remaining = [ranked for ranked in ranking if id_of(ranked) != item_id]
+
+    if previous and not exhaustive:
+        # the items left out score no more than the lowest ranked score, so the item keeps its place only if it
+        # still reaches that score
+        if item is None or item.score < ranking[-1].score:
+            return RankingChange(items=remaining, exhaustive=False, complete=False)
+    elif not previous:
+        if item is None:
+            return None
+        if len(ranking) >= max_results and item.score <= ranking[-1].score:
+            return None
+
+    if item is not None:
+        position = next((i for i, ranked in enumerate(remaining) if ranked.score < item.score), len(remaining))
+        remaining.insert(position, item)
+    if len(remaining) > max_results:
+        remaining = remaining[:max_results]
+        exhaustive = False
+    return RankingChange(items=remaining, exhaustive=exhaustive, complete=True)
+
+
+class AnswersMatrix:
+    """
+    A corpus of packed answers held as two contiguous uint16 numpy arrays, scored all at once with a vectorized
+    XNOR + popcount and a partition based top-k selection
+    """
+
+    # popcount of every possible answer pattern, indexed by the pattern itself
+    _POPCOUNT_TABLE = None
+
+    def __init__(self, vectors: Sequence[AnswerVector]):
+        if AnswersMatrix._POPCOUNT_TABLE is None:
+            AnswersMatrix._POPCOUNT_TABLE = numpy.array(_POPCOUNT, dtype=numpy.uint8)
+        self.bits = numpy.fromiter((vector.bits for vector in vectors), dtype=numpy.uint16, count=len(vectors))
+        self.answered = numpy.fromiter((vector.answered for vector in vectors), dtype=numpy.uint16,
+                                       count=len(vectors))
+
+    def __len__(self) -> int:
+        return len(self.bits)
+
+    def scores(self, query: AnswerVector) -> 'numpy.ndarray':
+        common = self.answered & numpy.uint16(query.answered & FULL_MASK)
+        return self._POPCOUNT_TABLE[~(self.bits ^ numpy.uint16(query.bits)) & common]
+
+    def top_k(self, query: AnswerVector, max_results: int) -> List[Tuple[int, int]]:
+        """
+        :return: (score, index) pairs, best score first and ties in index order, same as the python loop kernel
+        """
+        return self.top_k_of_scores(self.scores(query), max_results)
+
+    @staticmethod
+    def top_k_of_scores(scores: 'numpy.ndarray', max_results: int) -> List[Tuple[int, int]]:
+        """
+        :return: (score, index) pairs of the best `max_results` scores, best score first and ties in index order
+        """
+        if max_results <= 0 or len(scores) == 0:
+            return []
+
+        if max_results >= len(scores):
+            selected = numpy.arange(len(scores))
+        else:
+            # the max_results-th best score; everything above it is kept, and the first ones (by index) equal to it
+            threshold = numpy.partition(scores, len(scores) - max_results)[len(scores) - max_results]
+            above = numpy.flatnonzero(scores > threshold)
+            at_threshold = numpy.flatnonzero(scores == threshold)[:max_results - len(above)]
+            selected = numpy.sort(numpy.concatenate((above, at_threshold)))
+
+        ordered = selected[numpy.argsort(-scores[selected].astype(numpy.int16), kind='stable')]
+        return [(int(scores[index]), int(index)) for index in ordered]
+
+
+def build_answers_matrix(vectors: Sequence[AnswerVector]) -> Optional[AnswersMatrix]:
+    """
+    :return: the vectorized form of the given answers, or None when numpy is not available
+    """
+    if numpy is None:
+        return None
+    return AnswersMatrix(vectors)
+
+
+def top_k(query: AnswerVector, candidates: Sequence[AnswerVector], max_results: int,
+          matrix: Optional[AnswersMatrix] = None) -> List[Tuple[int, int]]:
+    """
+    :param matrix: the vectorized form of the candidates, scored in one pass when given
+    :return: (score, candidate index) pairs, best score first and ties in candidates order
+    """
+    if matrix is not None:
+        return matrix.top_k(query, max_results)
+
+    collector = TopKCollector(max_results)
+    for index, candidate in enumerate(candidates):
+        collector.add(score(query, candidate), index)
+        if collector.is_complete():
+            break
+    return collector.results()
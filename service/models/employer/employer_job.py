@@ -5,7 +5,7 @@ from typing import List, Optional
 
 from pydantic import BaseModel, Field
 
-from service.models.common import Answer
+from service.models.common import Address, Answer
 from service.models.employer.employer import Employer
 
 
@@ -15,6 +15,23 @@ class JobScope(str, Enum):
     TimeBased = "time_based"
 
 
+class EmployerSummary(BaseModel):
+    business_name: Optional[str] = Field(description="Name of the business")
+    city: Optional[str] = Field(description="City of the business")
+    business_website: Optional[str] = Field(description="Website of the business")
+
+    @classmethod
+    def of(cls, employer: Employer) -> 'EmployerSummary':
+        return cls(business_name=employer.business_name,
+                   city=employer.business_address.city if employer.business_address else None,
+                   business_website=str(employer.business_website) if employer.business_website else None)
+
+    def to_employer(self, employer_id: str) -> Employer:
+        return Employer(employer_id=employer_id, business_name=self.business_name,
+                        business_address=Address(city=self.city) if self.city else None,
+                        business_website=self.business_website)
+
+
 class EmployerJob(BaseModel):
     job_id: Optional[str] = Field(description="Job ID")
     employer_id: Optional[str] = Field(description="Related employer ID")
@@ -29,6 +46,8 @@ class EmployerJob(BaseModel):
     job_salary: Optional[int] = Field(description="Optional job salary")
     job_experience_needed: Optional[str] = Field(description="Experience needed for the job")
     created_time: Optional[Decimal] = Field(description="Creation time of the employer job")
+    employer_summary: Optional[EmployerSummary] = Field(description="Employer details shown with the job, kept in "
+                                                                    "sync with the employer by its stream")
 
 
 class JobSearchResult(BaseModel):
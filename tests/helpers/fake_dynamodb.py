@@ -0,0 +1,960 @@
+"""
+In-process stand-in of DynamoDB for the unit tests and the benchmarks, no network and no deployed stack needed.
+
+The real boto3 resources and clients are used: their requests are answered by the fake tables from the botocore
+'before-call' event, after the boto3 conditions and types were serialized, so the DAO and the handlers run unchanged
+and the consumed capacity metrics see the simulated capacity. The subset of the API the project uses is implemented:
+
+- GetItem, PutItem, UpdateItem and DeleteItem, with condition expressions and ReturnValues
+- Query (on the table or a GSI) and Scan, with filter and projection expressions, Limit, Select, Segment and
+  TotalSegments, ExclusiveStartKey and the 1 MB page size
+- BatchGetItem, BatchWriteItem (so the resource batch_writer) and TransactWriteItems
+
+    fake_dynamodb = FakeDynamoDB()
+    fake_dynamodb.create_table('seekers', 'pk', 'sk', indexes={'GSI1': ('gsi1Pk', 'gsi1Sk')})
+    fake_dynamodb.install(monkeypatch)
+"""
+import copy
+import hashlib
+import math
+import re
+import threading
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import boto3
+from boto3.dynamodb.types import Binary, TypeDeserializer, TypeSerializer
+from botocore.awsrequest import AWSResponse
+
+from service.dao.capacity_metrics import capacity_metrics
+
+MAX_PAGE_BYTES = 1024 * 1024
+MAX_BATCH_GET_KEYS = 100
+MAX_BATCH_WRITE_ITEMS = 25
+MAX_TRANSACT_ITEMS = 100
+
+_READ_UNIT_BYTES = 4096
+_WRITE_UNIT_BYTES = 1024
+
+# key of the botocore request context carrying the request parameters to the 'before-call' event
+_CONTEXT_PARAMS = 'fake_dynamodb_params'
+
+_serializer = TypeSerializer()
+_deserializer = TypeDeserializer()
+
+Item = Dict[str, Any]
+ItemKey = Tuple[Any, Any]
+
+
+class FakeDynamoDBError(Exception):
+    def __init__(self, code: str, message: str, **extra):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.extra = extra
+
+
+def _validation_error(message: str) -> FakeDynamoDBError:
+    return FakeDynamoDBError('ValidationException', message)
+
+
+class _Missing:
+    def __repr__(self):
+        return 'MISSING'
+
+
+_MISSING = _Missing()
+
+
+# -- expressions ------------------------------------------------------------------------------------------------------
+
+_TOKEN = re.compile(r'\s*(?:(?P<name>#[A-Za-z0-9_]+)|(?P<value>:[A-Za-z0-9_]+)|(?P<number>\d+)|'
+                    r'(?P<word>[A-Za-z_][A-Za-z0-9_]*)|(?P<op><>|<=|>=|[=<>(),.\[\]+\-]))')
+_KEYWORDS = {'AND', 'OR', 'NOT', 'BETWEEN', 'IN', 'SET', 'REMOVE', 'ADD', 'DELETE'}
+
+
+def _tokenize(expression: str) -> List[Tuple[str, str]]:
+    tokens, position = [], 0
+    expression = expression.rstrip()
+    while position < len(expression):
+        match = _TOKEN.match(expression, position)
+        if match is None or match.end() == position:
+            raise _validation_error(f"Invalid expression, syntax error at '{expression[position:]}'")
+        kind = match.lastgroup
+        text = match.group(kind)
+        if kind == 'word' and text.upper() in _KEYWORDS:
+            kind, text = 'keyword', text.upper()
+        tokens.append((kind, text))
+        position = match.end()
+    return tokens
+
+
+class _Parser:
+    """
+    Recursive descent parser of the condition and update expressions, into tuples:
+    ('path', elements), ('value', placeholder), ('size', path), ('cmp', op, a, b), ('between', a, low, high),
+    ('in', a, operands), ('and', a, b), ('or', a, b), ('not', a), ('func', name, args), and the update actions
+    ('SET', path, operand), ('REMOVE', path), ('ADD', path, operand), ('DELETE', path, operand)
+    """
+
+    def __init__(self, expression: str, names: Dict[str, str]):
+        self.__tokens = _tokenize(expression)
+        self.__names = names
+        self.__position = 0
+
+    def parse_condition(self) -> tuple:
+        condition = self.__or()
+        self.__expect_end()
+        return condition
+
+    def parse_update(self) -> List[tuple]:
+        actions = []
+        while not self.__at_end():
+            clause = self.__take('keyword')
+            while True:
+                if clause == 'SET':
+                    path = self.__path()
+                    self.__take('op', '=')
+                    actions.append(('SET', path, self.__set_value()))
+                elif clause == 'REMOVE':
+                    actions.append(('REMOVE', self.__path()))
+                elif clause in ('ADD', 'DELETE'):
+                    actions.append((clause, self.__path(), self.__operand()))
+                else:
+                    raise _validation_error(f"Invalid UpdateExpression, unexpected '{clause}'")
+                if not self.__accept('op', ','):
+                    break
+        if not actions:
+            raise _validation_error("Invalid UpdateExpression, the expression is empty")
+        return actions
+
+    def parse_paths(self) -> List[tuple]:
+        paths = [self.__path()]
+        while self.__accept('op', ','):
+            paths.append(self.__path())
+        self.__expect_end()
+        return paths
+
+    def __or(self) -> tuple:
+        condition = self.__and()
+        while self.__accept('keyword', 'OR'):
+            condition = ('or', condition, self.__and())
+        return condition
+
+    def __and(self) -> tuple:
+        condition = self.__not()
+        while self.__accept('keyword', 'AND'):
+            condition = ('and', condition, self.__not())
+        return condition
+
+    def __not(self) -> tuple:
+        if self.__accept('keyword', 'NOT'):
+            return 'not', self.__not()
+        return self.__comparison()
+
+    def __comparison(self) -> tuple:
+        if self.__accept('op', '('):
+            condition = self.__or()
+            self.__take('op', ')')
+            return condition
+        kind, text = self.__peek()
+        if kind == 'word' and text in ('attribute_exists', 'attribute_not_exists', 'attribute_type', 'begins_with',
+                                       'contains'):
+            self.__position += 1
+            return 'func', text, self.__arguments()
+        operand = self.__operand()
+        if self.__accept('keyword', 'BETWEEN'):
+            low = self.__operand()
+            self.__take('keyword', 'AND')
+            return 'between', operand, low, self.__operand()
+        if self.__accept('keyword', 'IN'):
+            return 'in', operand, self.__arguments()
+        kind, text = self.__peek()
+        if kind == 'op' and text in ('=', '<>', '<', '<=', '>', '>='):
+            self.__position += 1
+            return 'cmp', text, operand, self.__operand()
+        raise _validation_error(f"Invalid ConditionExpression, unexpected '{text}'")
+
+    def __arguments(self) -> List[tuple]:
+        self.__take('op', '(')
+        arguments = [self.__set_value()]
+        while self.__accept('op', ','):
+            arguments.append(self.__set_value())
+        self.__take('op', ')')
+        return arguments
+
+    def __set_value(self) -> tuple:
+        value = self.__set_operand()
+        for operator in ('+', '-'):
+            if self.__accept('op', operator):
+                return operator, value, self.__set_operand()
+        return value
+
+    def __set_operand(self) -> tuple:
+        kind, text = self.__peek()
+        if kind == 'word' and text in ('if_not_exists', 'list_append'):
+            self.__position += 1
+            return (text, *self.__arguments())
+        return self.__operand()
+
+    def __operand(self) -> tuple:
+        kind, text = self.__peek()
+        if kind == 'value':
+            self.__position += 1
+            return 'value', text
+        if kind == 'word' and text == 'size':
+            self.__position += 1
+            self.__take('op', '(')
+            path = self.__path()
+            self.__take('op', ')')
+            return 'size', path
+        return self.__path()
+
+    def __path(self) -> tuple:
+        elements = [self.__attribute_name()]
+        while True:
+            if self.__accept('op', '.'):
+                elements.append(self.__attribute_name())
+            elif self.__accept('op', '['):
+                elements.append(int(self.__take('number')))
+                self.__take('op', ']')
+            else:
+                return 'path', tuple(elements)
+
+    def __attribute_name(self) -> str:
+        kind, text = self.__peek()
+        self.__position += 1
+        if kind == 'name':
+            if text not in self.__names:
+                raise _validation_error(f"An expression attribute name used in the document path is not "
+                                        f"defined; attribute name: {text}")
+            return self.__names[text]
+        if kind == 'word':
+            return text
+        raise _validation_error(f"Invalid expression, expected an attribute name, found '{text}'")
+
+    def __peek(self) -> Tuple[str, str]:
+        return self.__tokens[self.__position] if self.__position < len(self.__tokens) else ('end', '')
+
+    def __accept(self, kind: str, text: str) -> bool:
+        if self.__peek() == (kind, text):
+            self.__position += 1
+            return True
+        return False
+
+    def __take(self, kind: str, text: Optional[str] = None) -> str:
+        token_kind, token_text = self.__peek()
+        if token_kind != kind or (text is not None and token_text != text):
+            raise _validation_error(f"Invalid expression, expected '{text or kind}', found '{token_text}'")
+        self.__position += 1
+        return token_text
+
+    def __at_end(self) -> bool:
+        return self.__position >= len(self.__tokens)
+
+    def __expect_end(self) -> None:
+        if not self.__at_end():
+            raise _validation_error(f"Invalid expression, unexpected '{self.__peek()[1]}'")
+
+
+@lru_cache(maxsize=1024)
+def _parse(kind: str, expression: str, names: Tuple[Tuple[str, str], ...]):
+    parser = _Parser(expression, dict(names))
+    if kind == 'condition':
+        return parser.parse_condition()
+    if kind == 'update':
+        return parser.parse_update()
+    return parser.parse_paths()
+
+
+def _parsed(kind: str, expression: str, names: Optional[Dict[str, str]]):
+    return _parse(kind, expression, tuple(sorted((names or {}).items())))
+
+
+def _get_path(item: Item, elements: Tuple) -> Any:
+    value = item
+    for element in elements:
+        if isinstance(element, int):
+            if not isinstance(value, list) or element >= len(value):
+                return _MISSING
+            value = value[element]
+        else:
+            if not isinstance(value, dict) or element not in value:
+                return _MISSING
+            value = value[element]
+    return value
+
+
+def _set_path(item: Item, elements: Tuple, value: Any) -> None:
+    parent = _get_path(item, elements[:-1]) if len(elements) > 1 else item
+    last = elements[-1]
+    if isinstance(last, int) and isinstance(parent, list):
+        if last < len(parent):
+            parent[last] = value
+        else:
+            parent.append(value)
+    elif isinstance(last, str) and isinstance(parent, dict):
+        parent[last] = value
+    else:
+        raise _validation_error("The document path provided in the update expression is invalid for update")
+
+
+def _remove_path(item: Item, elements: Tuple) -> None:
+    parent = _get_path(item, elements[:-1]) if len(elements) > 1 else item
+    last = elements[-1]
+    if isinstance(last, int) and isinstance(parent, list) and last < len(parent):
+        del parent[last]
+    elif isinstance(last, str) and isinstance(parent, dict):
+        parent.pop(last, None)
+
+
+def _comparable(a: Any, b: Any) -> bool:
+    return (isinstance(a, Decimal) and isinstance(b, Decimal)) or (isinstance(a, str) and isinstance(b, str)) \
+        or (isinstance(a, (bytes, Binary)) and isinstance(b, (bytes, Binary)))
+
+
+_COMPARISONS: Dict[str, Callable[[Any, Any], bool]] = {
+    '<': lambda a, b: a < b, '<=': lambda a, b: a <= b, '>': lambda a, b: a > b, '>=': lambda a, b: a >= b}
+
+_TYPE_CODES = {str: 'S', Decimal: 'N', bytes: 'B', Binary: 'B', bool: 'BOOL', type(None): 'NULL', list: 'L',
+               dict: 'M'}
+
+
+def _type_code(value: Any) -> str:
+    if isinstance(value, set):
+        first = next(iter(value))
+        return {str: 'SS', Decimal: 'NS'}.get(type(first), 'BS')
+    return _TYPE_CODES.get(type(value), '')
+
+
+class _Evaluator:
+    def __init__(self, values: Optional[Dict[str, Any]]):
+        self.__values = values or {}
+
+    def operand(self, node: tuple, item: Item) -> Any:
+        kind = node[0]
+        if kind == 'path':
+            return _get_path(item, node[1])
+        if kind == 'value':
+            if node[1] not in self.__values:
+                raise _validation_error(f"An expression attribute value used in expression is not defined; "
+                                        f"attribute value: {node[1]}")
+            return self.__values[node[1]]
+        if kind == 'size':
+            value = _get_path(item, node[1][1])
+            return _MISSING if value is _MISSING else Decimal(len(value))
+        if kind == 'if_not_exists':
+            value = self.operand(node[1], item)
+            return self.operand(node[2], item) if value is _MISSING else value
+        if kind == 'list_append':
+            return list(self.operand(node[1], item)) + list(self.operand(node[2], item))
+        if kind in ('+', '-'):
+            left, right = self.operand(node[1], item), self.operand(node[2], item)
+            if not isinstance(left, Decimal) or not isinstance(right, Decimal):
+                raise _validation_error("An operand in the update expression has an incorrect data type")
+            return left + right if kind == '+' else left - right
+        raise _validation_error(f"Invalid operand '{kind}'")
+
+    def matches(self, node: tuple, item: Item) -> bool:
+        kind = node[0]
+        if kind == 'and':
+            return self.matches(node[1], item) and self.matches(node[2], item)
+        if kind == 'or':
+            return self.matches(node[1], item) or self.matches(node[2], item)
+        if kind == 'not':
+            return not self.matches(node[1], item)
+        if kind == 'cmp':
+            left, right = self.operand(node[2], item), self.operand(node[3], item)
+            if node[1] == '=':
+                return left is not _MISSING and left == right
+            if node[1] == '<>':
+                return left != right
+            return _comparable(left, right) and _COMPARISONS[node[1]](left, right)
+        if kind == 'between':
+            value, low, high = (self.operand(operand, item) for operand in node[1:])
+            return _comparable(value, low) and _comparable(value, high) and low <= value <= high
+        if kind == 'in':
+            value = self.operand(node[1], item)
+            return value is not _MISSING and any(value == self.operand(option, item) for option in node[2])
+        if kind == 'func':
+            return self.__function(node[1], node[2], item)
+        raise _validation_error(f"Invalid condition '{kind}'")
+
+    def __function(self, name: str, arguments: List[tuple], item: Item) -> bool:
+        value = self.operand(arguments[0], item)
+        if name == 'attribute_exists':
+            return value is not _MISSING
+        if name == 'attribute_not_exists':
+            return value is _MISSING
+        argument = self.operand(arguments[1], item)
+        if name == 'attribute_type':
+            return value is not _MISSING and _type_code(value) == argument
+        if name == 'begins_with':
+            return _comparable(value, argument) and not isinstance(value, Decimal) and value.startswith(argument)
+        # contains
+        if isinstance(value, str):
+            return isinstance(argument, str) and argument in value
+        return isinstance(value, (set, list)) and argument in value
+
+
+# -- items ------------------------------------------------------------------------------------------------------------
+
+def _value_size(value: Any) -> int:
+    if isinstance(value, str):
+        return len(value.encode('utf-8'))
+    if isinstance(value, Decimal):
+        return len(value.as_tuple().digits) // 2 + 2
+    if isinstance(value, (bytes, Binary)):
+        return len(bytes(value))
+    if isinstance(value, (set, list)):
+        return 3 + sum(_value_size(element) + 1 for element in value)
+    if isinstance(value, dict):
+        return 3 + sum(len(name.encode('utf-8')) + _value_size(element) + 1 for name, element in value.items())
+    return 1
+
+
+def item_size(item: Item) -> int:
+    """
+    :return: the approximate DynamoDB size in bytes of an item, attribute names included
+    """
+    return sum(len(name.encode('utf-8')) + _value_size(value) for name, value in item.items())
+
+
+def _units(size: int, unit_bytes: int) -> int:
+    return max(1, math.ceil(size / unit_bytes))
+
+
+def _order_value(value: Any) -> Tuple:
+    # keys are compared by type first, so a missing range key sorts first
+    if value is None or value is _MISSING:
+        return 0, ''
+    if isinstance(value, Binary):
+        return 3, bytes(value)
+    return (1 if isinstance(value, Decimal) else 2), value
+
+
+def _hash_order(value: Any) -> str:
+    return hashlib.md5(repr(_order_value(value)).encode('utf-8')).hexdigest()
+
+
+class FakeTable:
+    """
+    Items of a fake table by key, with the partitions of the table and of its global secondary indexes
+    """
+
+    def __init__(self, name: str, hash_key: str, range_key: Optional[str] = None,
+                 indexes: Optional[Dict[str, Tuple[str, Optional[str]]]] = None,
+                 projections: Optional[Dict[str, List[str]]] = None):
+        """
+        :param indexes: the hash and range keys of the global secondary indexes by name
+        :param projections: the non key attributes projected into an index, all attributes when not set
+        """
+        self.name = name
+        self.hash_key = hash_key
+        self.range_key = range_key
+        self.indexes: Dict[str, Tuple[str, Optional[str]]] = dict(indexes or {})
+        self.projections: Dict[str, List[str]] = dict(projections or {})
+        self.items: Dict[ItemKey, Item] = {}
+        self.__partitions: Dict[Optional[str], Dict[Any, Set[ItemKey]]] = {None: {}}
+        for index_name in self.indexes:
+            self.__partitions[index_name] = {}
+        # simulated capacity consumed by the requests
+        self.read_units = 0.0
+        self.write_units = 0.0
+
+    def key_of(self, item: Item) -> ItemKey:
+        if self.hash_key not in item or (self.range_key is not None and self.range_key not in item):
+            raise _validation_error("One of the required keys was not given a value")
+        return item[self.hash_key], item.get(self.range_key) if self.range_key else None
+
+    def key_attributes(self, key: ItemKey) -> Item:
+        attributes = {self.hash_key: key[0]}
+        if self.range_key is not None:
+            attributes[self.range_key] = key[1]
+        return attributes
+
+    def validate_key(self, key: Item) -> ItemKey:
+        if set(key) != set(self.key_attributes((None, None))):
+            raise _validation_error("The provided key element does not match the schema")
+        return self.key_of(key)
+
+    def get(self, key: ItemKey) -> Optional[Item]:
+        return self.items.get(key)
+
+    def write(self, key: ItemKey, item: Optional[Item]) -> None:
+        old_item = self.items.pop(key, None)
+        if old_item is not None:
+            for index_name, (hash_key, _) in self.__schemas():
+                if hash_key in old_item:
+                    self.__partitions[index_name].get(old_item[hash_key], set()).discard(key)
+        if item is None:
+            return
+        self.items[key] = item
+        for index_name, (hash_key, range_key) in self.__schemas():
+            # sparse indexes: an item is in an index only with all the index keys
+            if hash_key in item and (range_key is None or range_key in item):
+                self.__partitions[index_name].setdefault(item[hash_key], set()).add(key)
+
+    def __schemas(self) -> List[Tuple[Optional[str], Tuple[str, Optional[str]]]]:
+        # the table itself is the None index
+        return [(None, (self.hash_key, self.range_key)), *self.indexes.items()]
+
+    def partition(self, index_name: Optional[str], hash_value: Any) -> Iterable[ItemKey]:
+        return self.__partitions[index_name].get(hash_value, ())
+
+    def index_schema(self, index_name: Optional[str]) -> Tuple[str, Optional[str]]:
+        if index_name is None:
+            return self.hash_key, self.range_key
+        if index_name not in self.indexes:
+            raise _validation_error(f"The table does not have the specified index: {index_name}")
+        return self.indexes[index_name]
+
+    def in_index(self, index_name: Optional[str], item: Item) -> bool:
+        hash_key, range_key = self.index_schema(index_name)
+        return hash_key in item and (range_key is None or range_key in item)
+
+    def project_into_index(self, index_name: Optional[str], item: Item) -> Item:
+        if index_name is None or index_name not in self.projections:
+            return item
+        kept = set(self.projections[index_name]) | {self.hash_key, self.range_key, *self.indexes[index_name]}
+        return {name: value for name, value in item.items() if name in kept}
+
+    def order(self, index_name: Optional[str], item: Item, by_hash: bool) -> Tuple:
+        """
+        :return: the position of an item (or of a key) in a query partition, or in a scan when by_hash
+        """
+        hash_key, range_key = self.index_schema(index_name)
+        position = (_order_value(item.get(range_key)) if range_key else (0, ''),
+                    _order_value(item.get(self.hash_key)), _order_value(item.get(self.range_key)))
+        if by_hash:
+            return (_hash_order(item.get(hash_key)), _order_value(item.get(hash_key))) + position
+        return position
+
+
+# -- the fake ---------------------------------------------------------------------------------------------------------
+
+class FakeDynamoDB:
+    """
+    Fake tables behind real boto3 resources and clients, see the module docstring
+    """
+
+    def __init__(self, region_name: str = 'us-east-1'):
+        self.tables: Dict[str, FakeTable] = {}
+        self.requests: List[str] = []
+        self.__lock = threading.RLock()
+        self.__session = boto3.session.Session(aws_access_key_id='fake', aws_secret_access_key='fake',
+                                               region_name=region_name)
+        capacity_metrics.register(self.__session.events)
+        self.__session.events.register_last('before-parameter-build.dynamodb', self.__keep_params)
+        self.__session.events.register('before-call.dynamodb', self.__respond)
+        self.__resource = None
+        self.__client = None
+        self.__operations: Dict[str, Callable[[Dict], Dict]] = {
+            'GetItem': self.__get_item, 'PutItem': self.__put_item, 'UpdateItem': self.__update_item,
+            'DeleteItem': self.__delete_item, 'Query': self.__query, 'Scan': self.__scan,
+            'BatchGetItem': self.__batch_get_item, 'BatchWriteItem': self.__batch_write_item,
+            'TransactWriteItems': self.__transact_write_items}
+
+    def create_table(self, name: str, hash_key: str, range_key: Optional[str] = None,
+                     indexes: Optional[Dict[str, Tuple[str, Optional[str]]]] = None,
+                     projections: Optional[Dict[str, List[str]]] = None) -> FakeTable:
+        table = FakeTable(name, hash_key, range_key, indexes, projections)
+        self.tables[name] = table
+        return table
+
+    def resource(self, *args, **kwargs):
+        with self.__lock:
+            if self.__resource is None:
+                self.__resource = self.__session.resource('dynamodb')
+            return self.__resource
+
+    def client(self, *args, **kwargs):
+        with self.__lock:
+            if self.__client is None:
+                self.__client = self.__session.client('dynamodb')
+            return self.__client
+
+    def install(self, monkeypatch=None) -> None:
+        """
+        Serves boto3.resource('dynamodb') and boto3.client('dynamodb') from the fake, other services are left to
+        boto3
+
+        :param monkeypatch: the pytest fixture undoing it after the test, installed for the process when not given
+        """
+        real_resource, real_client = boto3.resource, boto3.client
+        set_attribute = monkeypatch.setattr if monkeypatch is not None else setattr
+        set_attribute(boto3, 'resource', lambda service_name, *args, **kwargs: self.resource()
+                      if service_name == 'dynamodb' else real_resource(service_name, *args, **kwargs))
+        set_attribute(boto3, 'client', lambda service_name, *args, **kwargs: self.client()
+                      if service_name == 'dynamodb' else real_client(service_name, *args, **kwargs))
+
+    def put(self, table_name: str, item: Item) -> None:
+        """
+        Seeds an item, bypassing the request accounting. The item is stored as it would be read back, numbers as
+        Decimal
+        """
+        table = self.tables[table_name]
+        item = _from_wire(_to_wire(item))
+        with self.__lock:
+            table.write(table.key_of(item), item)
+
+    @staticmethod
+    def __keep_params(params: Dict, context: Dict, **kwargs) -> None:
+        # the same dict is later serialized, so it has every change of the other handlers by 'before-call'
+        context[_CONTEXT_PARAMS] = params
+
+    def __respond(self, model, context: Dict, **kwargs) -> Tuple[AWSResponse, Dict]:
+        operation = self.__operations.get(model.name)
+        try:
+            if operation is None:
+                raise _validation_error(f"Operation '{model.name}' is not supported by the fake")
+            with self.__lock:
+                self.requests.append(model.name)
+                response = operation(context[_CONTEXT_PARAMS])
+            return AWSResponse(None, 200, {}, None), response
+        except FakeDynamoDBError as err:
+            return AWSResponse(None, 400, {}, None), {'Error': {'Code': err.code, 'Message': err.message},
+                                                      'ResponseMetadata': {'HTTPStatusCode': 400}, **err.extra}
+
+    # -- single items
+
+    def __table(self, name: str) -> FakeTable:
+        if name not in self.tables:
+            raise FakeDynamoDBError('ResourceNotFoundException', f"Requested resource not found: Table: {name} "
+                                                                 f"not found")
+        return self.tables[name]
+
+    def __get_item(self, params: Dict) -> Dict:
+        table = self.__table(params['TableName'])
+        item = table.get(table.validate_key(_from_wire(params['Key'])))
+        units = self.__read_units(table, item_size(item) if item else 0, params.get('ConsistentRead', False))
+        response = _capacity_response(params, table.name, units)
+        if item is not None:
+            response['Item'] = _to_wire(_project(item, params))
+        return response
+
+    def __put_item(self, params: Dict) -> Dict:
+        table = self.__table(params['TableName'])
+        item = _from_wire(params['Item'])
+        key = table.key_of(item)
+        old_item = table.get(key)
+        _check_condition(params, old_item)
+        table.write(key, item)
+        return self.__write_response(params, table, old_item, item)
+
+    def __update_item(self, params: Dict) -> Dict:
+        table = self.__table(params['TableName'])
+        key = table.validate_key(_from_wire(params['Key']))
+        old_item = table.get(key)
+        _check_condition(params, old_item)
+        new_item, updated = _updated(table, key, old_item, params)
+        table.write(key, new_item)
+        return self.__write_response(params, table, old_item, new_item, updated)
+
+    def __delete_item(self, params: Dict) -> Dict:
+        table = self.__table(params['TableName'])
+        key = table.validate_key(_from_wire(params['Key']))
+        old_item = table.get(key)
+        _check_condition(params, old_item)
+        table.write(key, None)
+        return self.__write_response(params, table, old_item, None)
+
+    def __write_response(self, params: Dict, table: FakeTable, old_item: Optional[Item], new_item: Optional[Item],
+                         updated: Optional[Set[str]] = None) -> Dict:
+        units = self.__write_units(table, old_item, new_item)
+        response = _capacity_response(params, table.name, units)
+        return_values = params.get('ReturnValues', 'NONE')
+        returned = {'ALL_OLD': old_item, 'ALL_NEW': new_item}.get(return_values)
+        if return_values in ('UPDATED_OLD', 'UPDATED_NEW'):
+            source = old_item if return_values == 'UPDATED_OLD' else new_item
+            returned = {name: value for name, value in (source or {}).items() if name in (updated or ())}
+        if returned:
+            response['Attributes'] = _to_wire(returned)
+        return response
+
+    # -- queries and scans
+
+    def __query(self, params: Dict) -> Dict:
+        table = self.__table(params['TableName'])
+        index_name = params.get('IndexName')
+        hash_key, _ = table.index_schema(index_name)
+        key_condition = _parsed('condition', params['KeyConditionExpression'], params.get('ExpressionAttributeNames'))
+        evaluator = _Evaluator(_from_wire(params.get('ExpressionAttributeValues', {})))
+        hash_value = _hash_key_value(key_condition, hash_key, evaluator)
+        candidates = [table.items[key] for key in table.partition(index_name, hash_value)]
+        candidates = [item for item in candidates if evaluator.matches(key_condition, item)]
+        candidates.sort(key=lambda item: table.order(index_name, item, by_hash=False),
+                        reverse=not params.get('ScanIndexForward', True))
+        return self.__page(table, index_name, candidates, params, evaluator, by_hash=False)
+
+    def __scan(self, params: Dict) -> Dict:
+        table = self.__table(params['TableName'])
+        index_name = params.get('IndexName')
+        hash_key, _ = table.index_schema(index_name)
+        candidates = [item for item in table.items.values() if table.in_index(index_name, item)]
+        if 'Segment' in params:
+            segment, total_segments = params['Segment'], params['TotalSegments']
+            candidates = [item for item in candidates
+                          if int(_hash_order(item[hash_key])[:8], 16) % total_segments == segment]
+        candidates.sort(key=lambda item: table.order(index_name, item, by_hash=True))
+        evaluator = _Evaluator(_from_wire(params.get('ExpressionAttributeValues', {})))
+        return self.__page(table, index_name, candidates, params, evaluator, by_hash=True)
+
+    def __page(self, table: FakeTable, index_name: Optional[str], candidates: List[Item], params: Dict,
+               evaluator: _Evaluator, by_hash: bool) -> Dict:
+        """
+        Reads a page of the sorted candidates after the ExclusiveStartKey, up to Limit evaluated items or 1 MB
+        """
+        descending = not by_hash and not params.get('ScanIndexForward', True)
+        if 'ExclusiveStartKey' in params:
+            start = table.order(index_name, _from_wire(params['ExclusiveStartKey']), by_hash)
+            candidates = [item for item in candidates
+                          if (table.order(index_name, item, by_hash) < start if descending
+                              else table.order(index_name, item, by_hash) > start)]
+        condition = None
+        if 'FilterExpression' in params:
+            condition = _parsed('condition', params['FilterExpression'], params.get('ExpressionAttributeNames'))
+        limit = params.get('Limit')
+
+        evaluated, returned, page_bytes = 0, [], 0
+        for item in candidates:
+            item = table.project_into_index(index_name, item)
+            evaluated += 1
+            page_bytes += item_size(item)
+            if condition is None or evaluator.matches(condition, item):
+                returned.append(item)
+            if (limit is not None and evaluated >= limit) or page_bytes >= MAX_PAGE_BYTES:
+                break
+
+        units = self.__read_units(table, page_bytes, params.get('ConsistentRead', False))
+        response = _capacity_response(params, table.name, units)
+        response.update({'Count': len(returned), 'ScannedCount': evaluated})
+        if params.get('Select') != 'COUNT':
+            response['Items'] = [_to_wire(_project(item, params)) for item in returned]
+        if evaluated < len(candidates):
+            last_item = candidates[evaluated - 1]
+            key_names = {table.hash_key, table.range_key, *table.index_schema(index_name)} - {None}
+            response['LastEvaluatedKey'] = _to_wire({name: last_item[name] for name in key_names})
+        return response
+
+    # -- batches and transactions
+
+    def __batch_get_item(self, params: Dict) -> Dict:
+        request_items = params['RequestItems']
+        if sum(len(request['Keys']) for request in request_items.values()) > MAX_BATCH_GET_KEYS:
+            raise _validation_error("Too many items requested for the BatchGetItem call")
+        responses, capacity = {}, []
+        for table_name, request in request_items.items():
+            table = self.__table(table_name)
+            keys = [table.validate_key(_from_wire(key)) for key in request['Keys']]
+            if len(set(keys)) != len(keys):
+                raise _validation_error("Provided list of item keys contains duplicates")
+            items = [table.get(key) for key in keys]
+            items = [item for item in items if item is not None]
+            units = sum(self.__read_units(table, item_size(item), request.get('ConsistentRead', False))
+                        for item in items)
+            responses[table_name] = [_to_wire(_project(item, request)) for item in items]
+            capacity.append({'TableName': table_name, 'CapacityUnits': units})
+        response = {'Responses': responses, 'UnprocessedKeys': {}}
+        if params.get('ReturnConsumedCapacity', 'NONE') != 'NONE':
+            response['ConsumedCapacity'] = capacity
+        return response
+
+    def __batch_write_item(self, params: Dict) -> Dict:
+        request_items = params['RequestItems']
+        if sum(len(requests) for requests in request_items.values()) > MAX_BATCH_WRITE_ITEMS:
+            raise _validation_error("Too many items requested for the BatchWriteItem call")
+        writes = []
+        for table_name, requests in request_items.items():
+            table = self.__table(table_name)
+            for request in requests:
+                if 'PutRequest' in request:
+                    item = _from_wire(request['PutRequest']['Item'])
+                    writes.append((table, table.key_of(item), item))
+                else:
+                    writes.append((table, table.validate_key(_from_wire(request['DeleteRequest']['Key'])), None))
+        if len({(table.name, key) for table, key, _ in writes}) != len(writes):
+            raise _validation_error("Provided list of item keys contains duplicates")
+
+        units_by_table: Dict[str, float] = {}
+        for table, key, item in writes:
+            units_by_table[table.name] = units_by_table.get(table.name, 0) + \
+                self.__write_units(table, table.get(key), item)
+            table.write(key, item)
+        response = {'UnprocessedItems': {}}
+        if params.get('ReturnConsumedCapacity', 'NONE') != 'NONE':
+            response['ConsumedCapacity'] = [{'TableName': name, 'CapacityUnits': units}
+                                            for name, units in units_by_table.items()]
+        return response
+
+    def __transact_write_items(self, params: Dict) -> Dict:
+        transact_items = params['TransactItems']
+        if len(transact_items) > MAX_TRANSACT_ITEMS:
+            raise _validation_error("Member must have length less than or equal to 100")
+        writes, reasons, failed = [], [], False
+        for transact_item in transact_items:
+            (action, request), = transact_item.items()
+            table = self.__table(request['TableName'])
+            if action == 'Put':
+                new_item = _from_wire(request['Item'])
+                key = table.key_of(new_item)
+            else:
+                key = table.validate_key(_from_wire(request['Key']))
+            old_item = table.get(key)
+            try:
+                _check_condition(request, old_item)
+                reasons.append({'Code': 'None'})
+            except FakeDynamoDBError as err:
+                reasons.append({'Code': 'ConditionalCheckFailed', 'Message': err.message})
+                failed = True
+            if action == 'Update':
+                new_item = _updated(table, key, old_item, request)[0]
+            elif action in ('Delete', 'ConditionCheck'):
+                new_item = None
+            writes.append((action, table, key, old_item, new_item))
+        if len({(table.name, key) for _, table, key, _, _ in writes}) != len(writes):
+            raise _validation_error("Transaction request cannot include multiple operations on one item")
+        if failed:
+            raise FakeDynamoDBError('TransactionCanceledException',
+                                    f"Transaction cancelled, please refer cancellation reasons for specific reasons "
+                                    f"[{', '.join(reason['Code'] for reason in reasons)}]",
+                                    CancellationReasons=reasons)
+
+        units_by_table: Dict[str, float] = {}
+        for action, table, key, old_item, new_item in writes:
+            # transactional requests consume twice the units
+            if action == 'ConditionCheck':
+                units = 2 * _units(item_size(old_item or {}), _READ_UNIT_BYTES)
+                table.read_units += units
+            else:
+                units = 2 * _units(max(item_size(old_item or {}), item_size(new_item or {})), _WRITE_UNIT_BYTES)
+                table.write_units += units
+                table.write(key, new_item)
+            units_by_table[table.name] = units_by_table.get(table.name, 0) + units
+        response = {}
+        if params.get('ReturnConsumedCapacity', 'NONE') != 'NONE':
+            response['ConsumedCapacity'] = [{'TableName': name, 'CapacityUnits': units}
+                                            for name, units in units_by_table.items()]
+        return response
+
+    # -- capacity
+
+    @staticmethod
+    def __read_units(table: FakeTable, size: int, consistent: bool) -> float:
+        # eventually consistent reads cost half
+        units = _units(size, _READ_UNIT_BYTES) * (1 if consistent else 0.5)
+        table.read_units += units
+        return units
+
+    @staticmethod
+    def __write_units(table: FakeTable, old_item: Optional[Item], new_item: Optional[Item]) -> float:
+        units = _units(max(item_size(old_item or {}), item_size(new_item or {})), _WRITE_UNIT_BYTES)
+        table.write_units += units
+        return units
+
+
+def _from_wire(attributes: Dict) -> Item:
+    return {name: _deserializer.deserialize(value) for name, value in attributes.items()}
+
+
+def _to_wire(item: Item) -> Dict:
+    return {name: _serializer.serialize(value) for name, value in item.items()}
+
+
+def _capacity_response(params: Dict, table_name: str, units: float) -> Dict:
+    if params.get('ReturnConsumedCapacity', 'NONE') == 'NONE':
+        return {}
+    return {'ConsumedCapacity': {'TableName': table_name, 'CapacityUnits': units}}
+
+
+def _project(item: Item, params: Dict) -> Item:
+    if 'ProjectionExpression' not in params:
+        return copy.deepcopy(item)
+    projected: Item = {}
+    for _, elements in _parsed('paths', params['ProjectionExpression'], params.get('ExpressionAttributeNames')):
+        value = _get_path(item, elements)
+        if value is _MISSING:
+            continue
+        target = projected
+        for position, element in enumerate(elements[:-1]):
+            if isinstance(elements[position + 1], int):
+                # the elements of a projected list are kept in order, at compacted positions
+                target = target.setdefault(element, [])
+                break
+            target = target.setdefault(element, {})
+        if isinstance(target, list):
+            target.append(copy.deepcopy(value))
+        else:
+            target[elements[-1]] = copy.deepcopy(value)
+    return projected
+
+
+def _check_condition(params: Dict, item: Optional[Item]) -> None:
+    if 'ConditionExpression' not in params:
+        return
+    condition = _parsed('condition', params['ConditionExpression'], params.get('ExpressionAttributeNames'))
+    if not _Evaluator(_from_wire(params.get('ExpressionAttributeValues', {}))).matches(condition, item or {}):
+        raise FakeDynamoDBError('ConditionalCheckFailedException', "The conditional request failed")
+
+
+def _hash_key_value(key_condition: tuple, hash_key: str, evaluator: _Evaluator) -> Any:
+    value = _find_hash_key_value(key_condition, hash_key, evaluator)
+    if value is _MISSING:
+        raise _validation_error(f"Query condition missed key schema element: {hash_key}")
+    return value
+
+
+def _find_hash_key_value(condition: tuple, hash_key: str, evaluator: _Evaluator) -> Any:
+    if condition[0] == 'and':
+        for part in condition[1:]:
+            value = _find_hash_key_value(part, hash_key, evaluator)
+            if value is not _MISSING:
+                return value
+    elif condition[0] == 'cmp' and condition[1] == '=' and condition[2] == ('path', (hash_key,)):
+        return evaluator.operand(condition[3], {})
+    return _MISSING
+
+
+def _updated(table: FakeTable, key: ItemKey, old_item: Optional[Item], params: Dict) -> Tuple[Item, Set[str]]:
+    """
+    :return: the item with the UpdateExpression applied, created from its key when missing, and the names of the
+    top level attributes updated
+    """
+    new_item = copy.deepcopy(old_item) if old_item is not None else table.key_attributes(key)
+    if 'UpdateExpression' not in params:
+        return new_item, set()
+    actions = _parsed('update', params['UpdateExpression'], params.get('ExpressionAttributeNames'))
+    evaluator = _Evaluator(_from_wire(params.get('ExpressionAttributeValues', {})))
+    key_names = set(table.key_attributes(key))
+    # the operands are all evaluated on the item before the update
+    resolved = [(action[0], action[1][1], evaluator.operand(action[2], old_item or {}) if len(action) > 2 else None)
+                for action in actions]
+    updated = set()
+    for action, elements, value in resolved:
+        if elements[0] in key_names:
+            raise _validation_error(f"Cannot update attribute {elements[0]}. This attribute is part of the key")
+        updated.add(elements[0])
+        current = _get_path(new_item, elements)
+        if action == 'SET':
+            _set_path(new_item, elements, value)
+        elif action == 'REMOVE':
+            _remove_path(new_item, elements)
+        elif action == 'ADD':
+            if current is _MISSING:
+                _set_path(new_item, elements, value)
+            elif isinstance(current, Decimal) and isinstance(value, Decimal):
+                _set_path(new_item, elements, current + value)
+            elif isinstance(current, set) and isinstance(value, set):
+                _set_path(new_item, elements, current | value)
+            else:
+                raise _validation_error("An operand in the update expression has an incorrect data type")
+        elif current is not _MISSING:
+            # DELETE from a set, the attribute is removed once empty
+            remaining = current - value
+            if remaining:
+                _set_path(new_item, elements, remaining)
+            else:
+                _remove_path(new_item, elements)
+    return new_item, updated
+
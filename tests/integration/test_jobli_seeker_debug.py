@@ -19,6 +19,7 @@ from service.dao.model.experience import Experience
 from service.dao.model.job_seeker import JobSeeker
 from service.dao.model.job_seeker_answers import JobSeekerAnswers
 from service.lambdas.employer.constants import EmployerConstants
+from service.matching import pack_seeker_answers
 from service.models.employer.employer_job import JobSearchResult
 from service.models.job_seeker_resource import JobSeekerResource
 from tests.helpers.environment_handler import load_env_vars
@@ -42,18 +43,8 @@ def test_job_seekers_get_relevant_jobs_debug(endpoint_url):
     job_seeker_answers: JobSeekerAnswers = JobSeekerAnswers(
         **job_seeker_answers_repository.get_by_seeker_id(user_id))
 
-    answers_arr = [job_seeker_answers.a1,
-                   job_seeker_answers.a2,
-                   job_seeker_answers.a3,
-                   job_seeker_answers.a4,
-                   job_seeker_answers.a5,
-                   job_seeker_answers.a6,
-                   job_seeker_answers.a7,
-                   job_seeker_answers.a8,
-                   job_seeker_answers.a9,
-                   job_seeker_answers.a10]
-
-    search_results: List[JobSearchResult] = jobs_repository.get_jobs(answers_arr, 100)
+    search_results: List[JobSearchResult] = jobs_repository.get_jobs(pack_seeker_answers(job_seeker_answers.dict()),
+                                                                      100)
 
     for item in search_results:
         item.employer_job.created_time = int(item.employer_job.created_time)
@@ -89,18 +80,8 @@ def test_get_batch_items_debug(endpoint_url):
         job_seeker_answers: JobSeekerAnswers = JobSeekerAnswers(
             **job_seeker_answers_repository.get_by_seeker_id(user_id))
 
-        answers_arr = [job_seeker_answers.a1,
-                       job_seeker_answers.a2,
-                       job_seeker_answers.a3,
-                       job_seeker_answers.a4,
-                       job_seeker_answers.a5,
-                       job_seeker_answers.a6,
-                       job_seeker_answers.a7,
-                       job_seeker_answers.a8,
-                       job_seeker_answers.a9,
-                       job_seeker_answers.a10]
-
-        search_results: List[JobSearchResult] = jobs_repository.get_jobs(answers_arr, 100)
+        search_results: List[JobSearchResult] = jobs_repository.get_jobs(
+            pack_seeker_answers(job_seeker_answers.dict()), 100)
 
         employer_keys = []
         dynamo_resource = boto3.resource("dynamodb")
@@ -0,0 +1,40 @@
+import sys
+import os
+sys.path.append(os.getcwd())
+
+import pytest
+
+from service.dao.jobs_corpus_cache import JOBS_LAST_MODIFIED_TIME_ATTRIBUTE, JOBS_SYNC_PK_ATTRIBUTE
+from service.dao.model.seeker_top_jobs import SEEKER_TOP_JOBS_INDEX_ATTRIBUTES, SEEKER_TOP_JOBS_INDEX_NAME, \
+    SEEKER_TOP_JOBS_INDEX_PK_ATTRIBUTE
+from service.lambdas.employer.constants import EmployerConstants
+from tests.helpers.fake_dynamodb import FakeDynamoDB
+
+SEEKERS_TABLE = 'seekers'
+EMPLOYERS_TABLE = 'employers'
+JOBS_TABLE = 'jobs'
+
+
+@pytest.fixture
+def fake_dynamodb(monkeypatch) -> FakeDynamoDB:
+    """
+    The tables of the stack (cdk/jobli_service_cdk/service_stack/jobli_construct.py) in memory, boto3 dynamodb
+    resources and clients served from them. The single table service singletons cache their table, a test of a module
+    using one patches a fresh _SingleTableService in
+    """
+    fake = FakeDynamoDB()
+    fake.create_table(SEEKERS_TABLE, 'pk', 'sk', indexes={
+        'GSI1': ('gsi1Pk', 'gsi1Sk'),
+        SEEKER_TOP_JOBS_INDEX_NAME: (SEEKER_TOP_JOBS_INDEX_PK_ATTRIBUTE, None)},
+        projections={SEEKER_TOP_JOBS_INDEX_NAME: SEEKER_TOP_JOBS_INDEX_ATTRIBUTES})
+    fake.create_table(EMPLOYERS_TABLE, 'employer_id')
+    fake.create_table(JOBS_TABLE, 'job_id', indexes={
+        EmployerConstants.JOBS_EMPLOYER_INDEX_NAME: ('employer_id', None),
+        EmployerConstants.JOBS_LAST_MODIFIED_INDEX_NAME: (JOBS_SYNC_PK_ATTRIBUTE, JOBS_LAST_MODIFIED_TIME_ATTRIBUTE)},
+        projections={EmployerConstants.JOBS_LAST_MODIFIED_INDEX_NAME: [
+            'employer_id', 'answer_bits', 'answered_mask', 'deleted', 'top_seekers_cutoff']})
+    fake.install(monkeypatch)
+    monkeypatch.setenv('JOB_SEEKERS_TABLE_NAME', SEEKERS_TABLE)
+    monkeypatch.setenv(EmployerConstants.EMPLOYERS_TABLE_NAME, EMPLOYERS_TABLE)
+    monkeypatch.setenv(EmployerConstants.JOBS_TABLE_NAME, JOBS_TABLE)
+    return fake
@@ -0,0 +1,85 @@
+import sys
+import os
+sys.path.append(os.getcwd())
+import threading
+
+import pytest
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+
+import service.dao.batch_get
+from service.common.exceptions import UnprocessedKeysError
+from service.dao.batch_get import batch_get
+
+_serializer = TypeSerializer()
+_deserializer = TypeDeserializer()
+
+
+class _FakeClient:
+    def __init__(self, unprocessed_rounds: int = 0):
+        self.unprocessed_rounds = unprocessed_rounds
+        self.requests = []
+        self.__lock = threading.Lock()
+
+    def batch_get_item(self, RequestItems, **kwargs):  # pylint: disable=invalid-name
+        with self.__lock:
+            self.requests.append(RequestItems)
+            unprocessed = self.unprocessed_rounds > 0
+            self.unprocessed_rounds -= 1
+        request = RequestItems['jobs']
+        keys = [{name: _deserializer.deserialize(value) for name, value in key.items()} for key in request['Keys']]
+        # the second half of the keys is left unprocessed while there are unprocessed rounds left
+        processed = keys[:len(keys) // 2] if unprocessed else keys
+        response = {'Responses': {'jobs': [_serializer.serialize(dict(key, title=f"job {key['job_id']}"))['M']
+                                           for key in processed]}}
+        if unprocessed:
+            response['UnprocessedKeys'] = {'jobs': dict(request, Keys=request['Keys'][len(keys) // 2:])}
+        return response
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(service.dao.batch_get.time, 'sleep', lambda seconds: None)
+
+    def _client(unprocessed_rounds: int = 0) -> _FakeClient:
+        fake_client = _FakeClient(unprocessed_rounds)
+        monkeypatch.setattr(service.dao.batch_get.boto3, 'client', lambda name: fake_client)
+        return fake_client
+
+    return _client
+
+
+def test_batch_get_reads_in_chunks_of_100(client):
+    fake_client = client()
+
+    items = batch_get('jobs', [{'job_id': str(i)} for i in range(250)] + [{'job_id': '0'}])
+
+    assert sorted(str(i) for i in range(250)) == sorted(item['job_id'] for item in items)
+    assert [100, 100, 50] == sorted((len(request['jobs']['Keys']) for request in fake_client.requests), reverse=True)
+
+
+def test_batch_get_retries_unprocessed_keys(client):
+    fake_client = client(unprocessed_rounds=2)
+
+    items = batch_get('jobs', [{'job_id': str(i)} for i in range(8)], projection=['job_id', 'title'],
+                      consistent_read=True)
+
+    assert sorted(str(i) for i in range(8)) == sorted(item['job_id'] for item in items)
+    assert [8, 4, 2] == [len(request['jobs']['Keys']) for request in fake_client.requests]
+    assert all('#p0, #p1' == request['jobs']['ProjectionExpression'] for request in fake_client.requests)
+    assert {'#p0': 'job_id', '#p1': 'title'} == fake_client.requests[-1]['jobs']['ExpressionAttributeNames']
+    assert fake_client.requests[-1]['jobs']['ConsistentRead']
+
+
+def test_batch_get_raises_when_keys_stay_unprocessed(client):
+    client(unprocessed_rounds=100)
+
+    with pytest.raises(UnprocessedKeysError) as error:
+        batch_get('jobs', [{'job_id': str(i)} for i in range(64)])
+    assert 1 == len(error.value.unprocessed_keys)
+
+
+def test_batch_get_without_keys_does_not_call_dynamo(client):
+    fake_client = client()
+
+    assert [] == batch_get('jobs', [])
+    assert [] == fake_client.requests
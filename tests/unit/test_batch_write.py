@@ -0,0 +1,83 @@
+import sys
+import os
+sys.path.append(os.getcwd())
+import threading
+
+import pytest
+from boto3.dynamodb.types import TypeDeserializer
+
+import service.dao.batch_write
+from service.common.exceptions import UnprocessedKeysError
+from service.dao.batch_write import batch_delete
+
+_deserializer = TypeDeserializer()
+
+
+class _FakeClient:
+    def __init__(self, unprocessed_rounds: int = 0, failing_ids=()):
+        self.unprocessed_rounds = unprocessed_rounds
+        self.failing_ids = set(failing_ids)
+        self.removed = []
+        self.requests = []
+        self.__lock = threading.Lock()
+
+    def batch_write_item(self, RequestItems, **kwargs):  # pylint: disable=invalid-name
+        requests = RequestItems['jobs']
+        with self.__lock:
+            self.requests.append(requests)
+            unprocessed = self.unprocessed_rounds > 0
+            self.unprocessed_rounds -= 1
+        # the second half of the requests is left unprocessed while there are unprocessed rounds left, the
+        # failing ids are never processed
+        processed = len(requests) // 2 if unprocessed else len(requests)
+        left = requests[processed:] + [request for request in requests[:processed]
+                                       if _job_id(request) in self.failing_ids]
+        with self.__lock:
+            self.removed.extend(_job_id(request) for request in requests if request not in left)
+        return {'UnprocessedItems': {'jobs': left} if left else {}}
+
+
+def _job_id(request) -> str:
+    return _deserializer.deserialize(request['DeleteRequest']['Key']['job_id'])
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(service.dao.batch_write.time, 'sleep', lambda seconds: None)
+
+    def _client(**kwargs) -> _FakeClient:
+        fake_client = _FakeClient(**kwargs)
+        monkeypatch.setattr(service.dao.batch_write.boto3, 'client', lambda name: fake_client)
+        return fake_client
+
+    return _client
+
+
+def test_batch_delete_removes_in_chunks_of_25(client):
+    fake_client = client()
+
+    batch_delete('jobs', [{'job_id': str(i)} for i in range(60)] + [{'job_id': '0'}])
+
+    assert sorted(str(i) for i in range(60)) == sorted(fake_client.removed)
+    assert [25, 25, 10] == sorted((len(requests) for requests in fake_client.requests), reverse=True)
+
+
+def test_batch_delete_retries_unprocessed_items(client):
+    fake_client = client(unprocessed_rounds=2)
+
+    batch_delete('jobs', [{'job_id': str(i)} for i in range(8)])
+
+    assert sorted(str(i) for i in range(8)) == sorted(fake_client.removed)
+    assert [8, 4, 2] == [len(requests) for requests in fake_client.requests]
+
+
+def test_batch_delete_reports_the_items_left(client):
+    fake_client = client(failing_ids={'3', '40'})
+
+    with pytest.raises(UnprocessedKeysError) as error:
+        batch_delete('jobs', [{'job_id': str(i)} for i in range(50)])
+
+    assert [{'job_id': '3'}, {'job_id': '40'}] == sorted(error.value.unprocessed_keys,
+                                                         key=lambda key: int(key['job_id']))
+    assert 48 == len(fake_client.removed)
+    assert 503 == error.value.status_code
@@ -0,0 +1,81 @@
+import sys
+import os
+sys.path.append(os.getcwd())
+import json
+
+import boto3
+import pytest
+from botocore.stub import Stubber
+
+from service.dao.capacity_metrics import capacity_metrics, metrics
+
+
+@pytest.fixture
+def dynamo_client():
+    capacity_metrics.install()
+    capacity_metrics.flush()
+    metrics.clear_metrics()
+    client = boto3.client('dynamodb', region_name='us-east-1')
+    with Stubber(client) as stubber:
+        yield client, stubber
+
+
+def _emitted_metrics(capsys) -> list:
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines() if line.startswith('{')]
+    return [line for line in lines if '_aws' in line]
+
+
+def _values(line: dict, names) -> tuple:
+    # one value per metric per line, serialized as a list
+    return tuple(value for name in names for value in line[name])
+
+
+def test_calls_are_emitted_per_operation_and_table_with_an_invocation_summary(dynamo_client, capsys):
+    client, stubber = dynamo_client
+    stubber.add_response('get_item', {'Item': {'pk': {'S': 'a'}}, 'ConsumedCapacity': {'TableName': 'seekers',
+                                                                                         'CapacityUnits': 0.5}})
+    for count in (3, 2):
+        stubber.add_response('query', {'Items': [{'pk': {'S': 'a'}}] * count, 'Count': count,
+                                       'ConsumedCapacity': {'TableName': 'seekers', 'CapacityUnits': 1.5}})
+
+    @metrics.log_metrics
+    @capacity_metrics.track_invocation
+    def get_seeker(event, context):
+        client.get_item(TableName='seekers', Key={'pk': {'S': 'a'}})
+        client.query(TableName='seekers', KeyConditionExpression='pk = :pk',
+                     ExpressionAttributeValues={':pk': {'S': 'a'}})
+        client.query(TableName='seekers', KeyConditionExpression='pk = :pk',
+                     ExpressionAttributeValues={':pk': {'S': 'a'}})
+        return {}
+
+    requested = []
+    client.meta.events.register_last('before-parameter-build.dynamodb',
+                                     lambda params, **kwargs: requested.append(params['ReturnConsumedCapacity']))
+
+    get_seeker({}, None)
+
+    assert ['TOTAL'] * 3 == requested
+
+    get_item, query, summary = _emitted_metrics(capsys)
+    assert [['handler', 'operation', 'table']] == get_item['_aws']['CloudWatchMetrics'][0]['Dimensions']
+    assert ('get_seeker', 'GetItem', 'seekers') == (get_item['handler'], get_item['operation'], get_item['table'])
+    assert (1, 0, 1, 0.5, 0) == _values(get_item, ('Calls', 'Pages', 'Items', 'ConsumedRCU', 'ConsumedWCU'))
+    assert (2, 2, 5, 3.0) == _values(query, ('Calls', 'Pages', 'Items', 'ConsumedRCU'))
+    # published by log_metrics
+    assert [['handler']] == summary['_aws']['CloudWatchMetrics'][0]['Dimensions']
+    assert ('get_seeker', (3, 3.5, 0)) == (summary['handler'], _values(summary, ('Calls', 'ConsumedRCU',
+                                                                                  'ConsumedWCU')))
+    assert {} == capacity_metrics.snapshot()
+
+
+def test_batch_writes_count_the_processed_items_as_write_units(dynamo_client):
+    client, stubber = dynamo_client
+    stubber.add_response('batch_write_item', {
+        'UnprocessedItems': {'jobs': [{'DeleteRequest': {'Key': {'job_id': {'S': '2'}}}}]},
+        'ConsumedCapacity': [{'TableName': 'jobs', 'CapacityUnits': 2.0}]})
+
+    client.batch_write_item(RequestItems={'jobs': [{'DeleteRequest': {'Key': {'job_id': {'S': str(i)}}}}
+                                                   for i in range(3)]})
+
+    stats = capacity_metrics.snapshot()[('BatchWriteItem', 'jobs')]
+    assert (1, 2, 0, 2.0) == (stats.calls, stats.items, stats.read_units, stats.write_units)
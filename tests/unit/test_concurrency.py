@@ -0,0 +1,60 @@
+import sys
+import os
+sys.path.append(os.getcwd())
+import threading
+import time
+
+import pytest
+
+from service.common.concurrency import _ConcurrentCalls
+from service.common.exceptions import CallTimeoutError, NotFoundError
+
+
+class _Context:
+    def __init__(self, remaining_millis: int):
+        self.remaining_millis = remaining_millis
+
+    def get_remaining_time_in_millis(self) -> int:
+        return self.remaining_millis
+
+
+def test_calls_run_concurrently_and_keep_their_order():
+    barrier = threading.Barrier(3, timeout=5)
+
+    def _call(result):
+        # only completes once the three calls are running together
+        barrier.wait()
+        return result
+
+    assert ['a', 'b', 'c'] == _ConcurrentCalls().run([lambda: _call('a'), lambda: _call('b'), lambda: _call('c')])
+
+
+def test_the_first_failed_call_error_is_raised():
+    def _fail(err: Exception):
+        raise err
+
+    with pytest.raises(NotFoundError):
+        _ConcurrentCalls().run([lambda: 1, lambda: _fail(NotFoundError("missing")), lambda: 3])
+    with pytest.raises(ValueError):
+        _ConcurrentCalls().run([lambda: _fail(ValueError()), lambda: 2])
+
+
+def test_calls_time_out_before_the_invocation(monkeypatch):
+    monkeypatch.setenv('CONCURRENT_CALLS_TIMEOUT_MARGIN_MILLIS', '900')
+    release = threading.Event()
+
+    start = time.monotonic()
+    with pytest.raises(CallTimeoutError):
+        _ConcurrentCalls().run([lambda: 1, lambda: release.wait(5)], _Context(remaining_millis=1000))
+    release.set()
+    assert time.monotonic() - start < 2
+
+
+def test_nested_calls_do_not_wait_for_the_pool(monkeypatch):
+    monkeypatch.setenv('CONCURRENT_CALLS_MAX_WORKERS', '1')
+    calls = _ConcurrentCalls()
+
+    def _nested():
+        return sum(calls.run([lambda: 1, lambda: 2, lambda: 3]))
+
+    assert [0, 6, 6] == calls.run([lambda: 0, _nested, _nested], _Context(remaining_millis=5000))
@@ -0,0 +1,64 @@
+import sys
+import os
+sys.path.append(os.getcwd())
+
+from aws_lambda_context import LambdaContext
+
+from service.common.dynamo_stream import INSERT_EVENT, MODIFY_EVENT, build_stream_record
+from service.lambdas.employer.process_employers_stream import process_employers_stream
+from service.models.employer.employer import Employer
+from service.models.employer.employer_job import EmployerSummary
+
+
+def _job(job_id: str, employer_id: str, **kwargs) -> dict:
+    # large enough for the employer jobs to take two query pages
+    return dict(job_id=job_id, employer_id=employer_id, description='x' * 600_000, **kwargs)
+
+
+def _context() -> LambdaContext:
+    context = LambdaContext()
+    context.function_name = 'ProcessEmployersStream'
+    context.memory_limit_in_mb = 128
+    context.invoked_function_arn = 'arn:aws:lambda:us-east-1:123456789012:function:ProcessEmployersStream'
+    context.aws_request_id = 'request'
+    return context
+
+
+def test_employer_summary_of_an_employer():
+    employer = Employer(employer_id='e1', employer_email='cafe@example.com', business_name='Cafe',
+                        business_website='https://cafe.example.com',
+                        business_address={'city': 'Haifa', 'street': 'Herzl'}, description='coffee',
+                        employer_terms=['t'], business_media=['https://media.example.com/1'], created_time=1)
+
+    summary = EmployerSummary.of(employer)
+
+    # only what the search responses show with a job
+    assert EmployerSummary(business_name='Cafe', city='Haifa', business_website='https://cafe.example.com') == summary
+    assert Employer(employer_id='e1', business_name='Cafe', business_address={'city': 'Haifa'},
+                    business_website='https://cafe.example.com') == summary.to_employer('e1')
+
+
+def test_employer_changes_are_propagated_to_the_employer_jobs(fake_dynamodb):
+    for job in [_job('j1', 'e1'), _job('j2', 'e1'), _job('j3', 'e2'), _job('j4', 'e1', deleted=True)]:
+        fake_dynamodb.put('jobs', job)
+
+    old_employer = {'employer_id': 'e1', 'business_name': 'Cafe', 'business_address': {'city': 'Haifa'},
+                    'created_time': 1}
+    renamed = dict(old_employer, business_name='Cafe Haifa')
+    event = {'Records': [
+        build_stream_record(INSERT_EVENT, {'employer_id': 'e1'}, new_item=old_employer),
+        # rewritten as is
+        build_stream_record(MODIFY_EVENT, {'employer_id': 'e1'}, new_item=old_employer, old_item=old_employer),
+        # not a summary field
+        build_stream_record(MODIFY_EVENT, {'employer_id': 'e1'}, new_item=dict(old_employer, description='coffee'),
+                            old_item=old_employer),
+        build_stream_record(MODIFY_EVENT, {'employer_id': 'e1'}, new_item=renamed, old_item=old_employer),
+    ]}
+
+    assert {'updated_jobs': 2} == process_employers_stream(event, _context())
+    jobs = {job_id: item for (job_id, _), item in fake_dynamodb.tables['jobs'].items.items()}
+    assert 2 == fake_dynamodb.requests.count('Query')
+    assert EmployerSummary.of(Employer.parse_obj(renamed)).dict() == \
+        jobs['j1']['employer_summary'] == jobs['j2']['employer_summary']
+    assert 'Cafe Haifa' == jobs['j1']['employer_summary']['business_name']
+    assert 'employer_summary' not in jobs['j3'] and 'employer_summary' not in jobs['j4']
@@ -0,0 +1,78 @@
+import sys
+import os
+sys.path.append(os.getcwd())
+
+import service.dao.employers_cache
+from service.dao.employers_cache import _EmployersCache
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _fake_batch_get(monkeypatch, employers: dict) -> list:
+    batch_gets = []
+
+    def _batch_get(table_name, keys, projection=None, consistent_read=False):
+        batch_gets.append(sorted(key['employer_id'] for key in keys))
+        return [dict(employers[key['employer_id']]) for key in keys if key['employer_id'] in employers]
+
+    monkeypatch.setenv('EMPLOYERS_TABLE_NAME', 'employers')
+    monkeypatch.setattr(service.dao.employers_cache, 'batch_get', _batch_get)
+    return batch_gets
+
+
+def test_employers_are_read_once_until_they_expire(monkeypatch):
+    employers = {'e1': {'employer_id': 'e1', 'business_name': 'a'}, 'e2': {'employer_id': 'e2', 'business_name': 'b'}}
+    batch_gets = _fake_batch_get(monkeypatch, employers)
+    clock = _Clock()
+    cache = _EmployersCache(clock=clock)
+
+    assert employers == cache.get_many(['e1', 'e2', 'e1'])
+    assert employers == cache.get_many(['e2', 'e1'])
+    assert [['e1', 'e2']] == batch_gets
+    assert (2, 2) == (cache.hits, cache.misses)
+
+    # the returned items are copies, callers may change them
+    cache.get('e1')['business_name'] = 'changed'
+    assert 'a' == cache.get('e1')['business_name']
+
+    clock.now = 61
+    cache.get_many(['e1', 'e2'])
+    assert [['e1', 'e2'], ['e1', 'e2']] == batch_gets
+
+
+def test_unknown_employers_are_cached_for_a_shorter_time(monkeypatch):
+    employers = {'e1': {'employer_id': 'e1'}}
+    batch_gets = _fake_batch_get(monkeypatch, employers)
+    clock = _Clock()
+    cache = _EmployersCache(clock=clock)
+
+    assert {'e1': employers['e1']} == cache.get_many(['e1', 'unknown'])
+    assert cache.get('unknown') is None
+    assert 1 == len(batch_gets)
+
+    clock.now = 11
+    employers['unknown'] = {'employer_id': 'unknown'}
+    assert employers['unknown'] == cache.get('unknown')
+    assert [['e1', 'unknown'], ['unknown']] == batch_gets
+
+
+def test_invalidate_and_eviction(monkeypatch):
+    employers = {f'e{i}': {'employer_id': f'e{i}', 'business_name': 'a'} for i in range(3)}
+    batch_gets = _fake_batch_get(monkeypatch, employers)
+    cache = _EmployersCache(max_entries=2, clock=_Clock())
+
+    cache.get_many(['e0', 'e1'])
+    employers['e0']['business_name'] = 'b'
+    cache.invalidate('e0')
+    assert 'b' == cache.get('e0')['business_name']
+
+    # e1 is the least recently used one
+    cache.get('e2')
+    cache.get_many(['e0', 'e1', 'e2'])
+    assert [['e0', 'e1'], ['e0'], ['e2'], ['e1']] == batch_gets
@@ -0,0 +1,111 @@
+import sys
+import os
+sys.path.append(os.getcwd())
+from decimal import Decimal
+
+import boto3
+import pytest
+from boto3.dynamodb.conditions import Attr, Key
+from botocore.exceptions import ClientError
+
+from service.dao.capacity_metrics import capacity_metrics
+from service.dao.model.job_seeker import JobSeeker
+from service.dao.single_table_service import _SingleTableService
+from service.dao.unit_of_work import unit_of_work
+import service.dao.unit_of_work
+from tests.helpers.fake_dynamodb import MAX_PAGE_BYTES
+
+
+def test_conditional_writes_and_update_expressions(fake_dynamodb):
+    table = boto3.resource('dynamodb').Table('jobs')
+    table.put_item(Item={'job_id': 'j1', 'employer_id': 'e1', 'views': 1},
+                   ConditionExpression=Attr('job_id').not_exists())
+
+    with pytest.raises(ClientError) as error:
+        table.put_item(Item={'job_id': 'j1'}, ConditionExpression=Attr('job_id').not_exists())
+    assert 'ConditionalCheckFailedException' == error.value.response['Error']['Code']
+
+    response = table.update_item(Key={'job_id': 'j1'},
+                                 UpdateExpression='SET #t = if_not_exists(#t, :t), #v = #v + :one ADD tags :tags',
+                                 ConditionExpression='#v < :max',
+                                 ExpressionAttributeNames={'#t': 'title', '#v': 'views'},
+                                 ExpressionAttributeValues={':t': 'cook', ':one': 1, ':max': 5, ':tags': {'a', 'b'}},
+                                 ReturnValues='ALL_NEW')
+    assert {'job_id': 'j1', 'employer_id': 'e1', 'views': Decimal(2), 'title': 'cook', 'tags': {'a', 'b'}} == \
+           response['Attributes']
+
+    table.delete_item(Key={'job_id': 'j1'})
+    assert 'Item' not in table.get_item(Key={'job_id': 'j1'})
+
+
+def test_query_on_a_gsi_with_begins_with_and_pages(fake_dynamodb):
+    table = boto3.resource('dynamodb').Table('seekers')
+    for i in range(5):
+        table.put_item(Item={'pk': f'S#{i}', 'sk': 'ANSWERS', 'gsi1Pk': 'PATTERN#1', 'gsi1Sk': f'ANSWERS#{i}'})
+    table.put_item(Item={'pk': 'S#9', 'sk': 'PROFILE', 'gsi1Pk': 'PATTERN#1', 'gsi1Sk': 'PROFILE#9'})
+
+    pages, args = [], {'IndexName': 'GSI1', 'Limit': 2,
+                       'KeyConditionExpression': Key('gsi1Pk').eq('PATTERN#1') & Key('gsi1Sk').begins_with('ANSWERS#')}
+    while True:
+        page = table.query(**args)
+        pages.append([item['pk'] for item in page['Items']])
+        if 'LastEvaluatedKey' not in page:
+            break
+        args['ExclusiveStartKey'] = page['LastEvaluatedKey']
+
+    assert [['S#0', 'S#1'], ['S#2', 'S#3'], ['S#4']] == pages
+
+
+def test_scan_segments_filters_and_the_one_megabyte_page(fake_dynamodb):
+    table = boto3.resource('dynamodb').Table('jobs')
+    with table.batch_writer() as batch:
+        for i in range(60):
+            batch.put_item(Item={'job_id': str(i), 'employer_id': f'e{i % 3}', 'description': 'x' * 40_000})
+
+    segments = [table.scan(Segment=segment, TotalSegments=4, FilterExpression=Attr('employer_id').eq('e1'))
+                for segment in range(4)]
+    assert sorted(str(i) for i in range(1, 60, 3)) == sorted(item['job_id'] for segment in segments
+                                                             for item in segment['Items'])
+
+    first_page = table.scan(Select='COUNT')
+    assert 'LastEvaluatedKey' in first_page
+    assert MAX_PAGE_BYTES // 40_000 + 1 == first_page['ScannedCount']
+
+
+def test_batch_get_and_transactions(fake_dynamodb):
+    client = boto3.client('dynamodb')
+    client.transact_write_items(TransactItems=[
+        {'Put': {'TableName': 'jobs', 'Item': {'job_id': {'S': 'j1'}}}},
+        {'Update': {'TableName': 'jobs', 'Key': {'job_id': {'S': 'j2'}}, 'UpdateExpression': 'ADD c :one',
+                    'ExpressionAttributeValues': {':one': {'N': '1'}}}}])
+
+    with pytest.raises(ClientError) as error:
+        client.transact_write_items(TransactItems=[
+            {'Put': {'TableName': 'jobs', 'Item': {'job_id': {'S': 'j3'}}}},
+            {'Put': {'TableName': 'jobs', 'Item': {'job_id': {'S': 'j1'}},
+                     'ConditionExpression': 'attribute_not_exists(job_id)'}}])
+    assert [{'Code': 'None'}, {'Code': 'ConditionalCheckFailed', 'Message': 'The conditional request failed'}] == \
+           error.value.response['CancellationReasons']
+
+    response = client.batch_get_item(RequestItems={'jobs': {'Keys': [{'job_id': {'S': f'j{i}'}} for i in range(1, 4)]}})
+    assert ['j1', 'j2'] == sorted(item['job_id']['S'] for item in response['Responses']['jobs'])
+
+
+def test_the_dao_runs_on_the_fake_with_simulated_capacity(fake_dynamodb, monkeypatch):
+    store = _SingleTableService()
+    monkeypatch.setattr(service.dao.unit_of_work, 'single_table_service', store)
+    capacity_metrics.flush()
+
+    with unit_of_work():
+        store.create_item(JobSeeker(id='s1', full_name='n', birth_date=1, address='a', email='e'))
+        store.increment_counters('STATS', '#', {'seekers': 1})
+    job_seeker = JobSeeker.from_item(store.find_by_pk_and_sk(JobSeeker.build_pk('s1'), JobSeeker.build_sk()))
+    job_seeker.full_name = 'm'
+    store.update_item(job_seeker)
+    store.remove_items_by_keys([(JobSeeker.build_pk('s1'), JobSeeker.build_sk())])
+
+    assert {'pk': 'STATS', 'sk': '#', 'seekers': Decimal(1)} == fake_dynamodb.tables['seekers'].items[('STATS', '#')]
+    assert ['TransactWriteItems', 'GetItem', 'UpdateItem', 'BatchWriteItem'] == fake_dynamodb.requests
+    stats = capacity_metrics.snapshot()
+    assert 4 == stats[('TransactWriteItems', 'seekers')].write_units
+    assert 0.5 == stats[('GetItem', 'seekers')].read_units
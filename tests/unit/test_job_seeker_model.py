@@ -43,6 +43,16 @@ def test_JobSeekerAnswerDto():
     print("json_string", json_string)
 
 
+# noinspection PyPep8Naming
+def test_JobSeekerAnswers_pk_is_a_deterministic_shard():
+    answers_model = JobSeekerAnswers(job_seeker_id=job_seeker_id, job_seeker_name=full_name)
+
+    assert JobSeekerAnswers.build_pk(job_seeker_id) == answers_model.produce_pk()
+    assert answers_model.produce_pk() in JobSeekerAnswers.build_shard_pks()
+    shards = {JobSeekerAnswers.build_pk(str(uuid.uuid4())) for _ in range(200)}
+    assert set(JobSeekerAnswers.build_shard_pks()) == shards
+
+
 def __assert_new_model_atts(answers_model):
     assert job_seeker_id == answers_model.job_seeker_id
     assert full_name == answers_model.job_seeker_name
@@ -0,0 +1,147 @@
+import sys
+import os
+sys.path.append(os.getcwd())
+from typing import Dict
+
+import pytest
+
+import service.dao.jobs_corpus_cache
+import service.dao.jobs_repository
+import service.handler
+from service.common.dynamo_stream import INSERT_EVENT, MODIFY_EVENT, REMOVE_EVENT, build_stream_record
+from service.dao.jobs_corpus_cache import _JobsCorpusCache, build_jobs_sync_pk, JOBS_MATCH_ATTRIBUTES_PK, \
+    JOBS_MATCH_ATTRIBUTES_BACKFILLED_SK
+from service.dao.jobs_repository import JobTopSeekers, SeekerAnswersChange, jobs_repository
+from service.dao.job_seeker_answers_repository import SearchResult
+from service.dao.model.job_top_seeker import JobTopSeekerLink
+from service.dao.single_table_service import _SingleTableService
+from service.handler import process_seekers_stream
+from service.matching import AnswerVector, FULL_MASK
+from tests.helpers.fake_dynamodb import FakeDynamoDB
+
+
+class _LambdaContext:
+    function_name = 'process_seekers_stream'
+    memory_limit_in_mb = 128
+    invoked_function_arn = 'arn'
+    aws_request_id = 'request'
+
+    @staticmethod
+    def get_remaining_time_in_millis() -> int:
+        return 60_000
+
+
+def _job(job_id: str, bits: int, scores) -> Dict:
+    top_seekers = JobTopSeekers(top_seekers=[SearchResult(score=item_score, job_seeker_id=f'{job_id}-{i}',
+                                                          job_seeker_name='n') for i, item_score in enumerate(scores)],
+                                max_results=2, version='v')
+    return {'job_id': job_id, 'employer_id': 'e', 'answer_bits': bits, 'answered_mask': FULL_MASK,
+            'sync_pk': build_jobs_sync_pk(job_id), 'last_modified_time': 1,
+            'top_seekers': top_seekers.dict(), 'top_seekers_cutoff': top_seekers.cutoff()}
+
+
+def _listed(fake_dynamodb: FakeDynamoDB, job_id: str):
+    return [top_seeker['job_seeker_id']
+            for top_seeker in fake_dynamodb.tables['jobs'].items[(job_id, None)]['top_seekers']['top_seekers']]
+
+
+def _linked(fake_dynamodb: FakeDynamoDB, job_seeker_id: str):
+    return {sk for pk, sk in fake_dynamodb.tables['seekers'].items if pk == JobTopSeekerLink.build_pk(job_seeker_id)}
+
+
+@pytest.fixture(autouse=True)
+def store(fake_dynamodb, monkeypatch):
+    single_table_service = _SingleTableService()
+    monkeypatch.setattr(service.dao.jobs_repository, 'single_table_service', single_table_service)
+    monkeypatch.setattr(service.dao.jobs_corpus_cache, 'single_table_service', single_table_service)
+    monkeypatch.setattr(service.dao.jobs_repository, 'jobs_corpus_cache', _JobsCorpusCache())
+    fake_dynamodb.put('seekers', {'pk': JOBS_MATCH_ATTRIBUTES_PK, 'sk': JOBS_MATCH_ATTRIBUTES_BACKFILLED_SK,
+                                  'backfilled': True})
+
+
+def test_seeker_answers_update_only_the_lists_they_beat(fake_dynamodb, monkeypatch):
+    # the seeker answers everything 'no': a perfect match of job 1, and 9 matching answers for job 2
+    for job in [_job('1', 0, [10, 3]), _job('2', 1, [9, 9]), _job('3', 1, [5])]:
+        fake_dynamodb.put('jobs', job)
+    monkeypatch.setenv('JOBS_CORPUS_MAX_STALENESS_SECONDS', '0')
+    service.dao.jobs_repository.jobs_corpus_cache.get_corpus()
+    fake_dynamodb.requests.clear()
+
+    assert 2 == jobs_repository.apply_seeker_answers([
+        SeekerAnswersChange('s', 'name', AnswerVector(bits=0, answered=FULL_MASK), None)])
+
+    assert ['1-0', 's'] == _listed(fake_dynamodb, '1')
+    assert 10 == fake_dynamodb.tables['jobs'].items[('1', None)]['top_seekers_cutoff']
+    assert ['s', '3-0'] == _listed(fake_dynamodb, '3')
+    assert ['2-0', '2-1'] == _listed(fake_dynamodb, '2')
+    # the cutoffs come from the warm jobs corpus, job 2 was not read
+    assert 'Scan' not in fake_dynamodb.requests
+    assert 2 == fake_dynamodb.requests.count('GetItem')
+    assert {'1', '3'} == _linked(fake_dynamodb, 's')
+
+    # the raised cutoff of job 1 is refreshed into the corpus, an equal score no longer reads it
+    fake_dynamodb.requests.clear()
+    assert 1 == jobs_repository.apply_seeker_answers([
+        SeekerAnswersChange('t', 'name', AnswerVector(bits=0, answered=FULL_MASK), None)])
+    assert 1 == fake_dynamodb.requests.count('GetItem')
+    assert ['1-0', 's'] == _listed(fake_dynamodb, '1')
+
+
+def test_a_seeker_scoring_lower_leaves_the_lists_it_no_longer_beats(fake_dynamodb):
+    fake_dynamodb.put('jobs', _job('1', 0, [10, 3]))
+
+    # 1-1 scored 3 with all 'yes' answers, it now answers 'yes' to the 10 questions of a job asking for 'no'
+    assert 1 == jobs_repository.apply_seeker_answers([
+        SeekerAnswersChange('1-1', 'n', AnswerVector(bits=FULL_MASK, answered=FULL_MASK),
+                            AnswerVector(bits=0b1111111, answered=FULL_MASK))])
+
+    assert ['1-0'] == _listed(fake_dynamodb, '1')
+    assert not fake_dynamodb.tables['jobs'].items[('1', None)]['top_seekers']['complete']
+
+
+def test_removed_seeker_is_found_with_the_reverse_index(fake_dynamodb):
+    fake_dynamodb.put('jobs', _job('1', 0, [10, 3]))
+    fake_dynamodb.put('jobs', _job('2', 0, [10, 3]))
+    # a stale link, the seeker already left job 2
+    for job_id in ['1', '2']:
+        fake_dynamodb.put('seekers', {'pk': JobTopSeekerLink.build_pk('1-0'), 'sk': job_id, 'job_seeker_id': '1-0',
+                                      'job_id': job_id})
+
+    assert 1 == jobs_repository.remove_seeker('1-0')
+
+    assert ['1-1'] == _listed(fake_dynamodb, '1')
+    assert not fake_dynamodb.tables['jobs'].items[('1', None)]['top_seekers']['complete']
+    assert set() == _linked(fake_dynamodb, '1-0')
+    assert 'Scan' not in fake_dynamodb.requests
+
+
+def test_process_seekers_stream_applies_answer_changes_in_one_pass(monkeypatch):
+    applied = []
+    monkeypatch.setattr(service.handler.jobs_repository, 'apply_seeker_answers',
+                        lambda changes: applied.append(changes) or len(changes))
+    answers = {f'a{i}': False for i in range(1, 11)}
+    changed = dict(answers, a1=True)
+
+    def _answers_item(job_seeker_id: str, **kwargs) -> Dict:
+        return {'pk': f'JOB_SEEKER#{job_seeker_id}', 'sk': 'ANSWERS', 'job_seeker_id': job_seeker_id,
+                'job_seeker_name': 'n', **kwargs}
+
+    event = {'Records': [
+        build_stream_record(INSERT_EVENT, {'pk': 'JOB_SEEKER#1', 'sk': 'ANSWERS'},
+                            new_item=_answers_item('1', **answers)),
+        build_stream_record(MODIFY_EVENT, {'pk': 'JOB_SEEKER#1', 'sk': 'ANSWERS'},
+                            new_item=_answers_item('1', **changed), old_item=_answers_item('1', **answers)),
+        # not an answers change
+        build_stream_record(MODIFY_EVENT, {'pk': 'JOB_SEEKER#2', 'sk': 'ANSWERS'},
+                            new_item=_answers_item('2', **answers), old_item=_answers_item('2', **answers)),
+        build_stream_record(INSERT_EVENT, {'pk': 'JOB_SEEKER#2', 'sk': 'PROFILE'},
+                            new_item={'pk': 'JOB_SEEKER#2', 'sk': 'PROFILE', 'full_name': 'n'}),
+        build_stream_record(REMOVE_EVENT, {'pk': 'JOB_SEEKER#3', 'sk': 'ANSWERS'},
+                            old_item=_answers_item('3', **answers)),
+    ]}
+
+    assert {'applied': 1, 'updated': 1} == process_seekers_stream(event, _LambdaContext())
+
+    [[change]] = applied
+    assert '1' == change.job_seeker_id
+    assert FULL_MASK == change.answers.answered and change.previous_answers is None
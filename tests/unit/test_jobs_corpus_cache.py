@@ -0,0 +1,124 @@
+import sys
+import os
+sys.path.append(os.getcwd())
+from decimal import Decimal
+from typing import Dict
+
+import pytest
+
+import service.dao.jobs_corpus_cache
+import service.dao.jobs_repository
+import service.dao.match_results_cache
+from service.dao.jobs_corpus_cache import _JobsCorpusCache, build_jobs_sync_pk, build_jobs_sync_pks, now_timestamp, \
+    JOBS_MATCH_ATTRIBUTES_PK, JOBS_MATCH_ATTRIBUTES_BACKFILLED_SK
+from service.dao.jobs_repository import jobs_repository
+from service.dao.parallel_scan import get_scan_segments
+from service.dao.single_table_service import _SingleTableService
+from tests.helpers.fake_dynamodb import FakeDynamoDB
+
+
+def _job(job_id: str, answer: bool = True, **kwargs) -> Dict:
+    job = {'job_id': job_id, 'employer_id': 'e', 'answer_bits': 1023 if answer else 0, 'answered_mask': 1023,
+           'sync_pk': build_jobs_sync_pk(job_id), 'last_modified_time': Decimal(1)}
+    job.update(kwargs)
+    return job
+
+
+def _full_loads(fake_dynamodb: FakeDynamoDB) -> int:
+    return fake_dynamodb.requests.count('Scan') // get_scan_segments()
+
+
+def _backfilled(fake_dynamodb: FakeDynamoDB) -> None:
+    fake_dynamodb.put('seekers', {'pk': JOBS_MATCH_ATTRIBUTES_PK, 'sk': JOBS_MATCH_ATTRIBUTES_BACKFILLED_SK,
+                                  'backfilled': True})
+
+
+@pytest.fixture(autouse=True)
+def store(monkeypatch):
+    single_table_service = _SingleTableService()
+    for module in [service.dao.jobs_corpus_cache, service.dao.jobs_repository, service.dao.match_results_cache]:
+        monkeypatch.setattr(module, 'single_table_service', single_table_service)
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_full_load_keeps_only_matchable_jobs(fake_dynamodb):
+    _backfilled(fake_dynamodb)
+    for job in [_job('1'), {'job_id': '2', 'sync_pk': build_jobs_sync_pk('2'), 'last_modified_time': Decimal(1)},
+                _job('3', deleted=True)]:
+        fake_dynamodb.put('jobs', job)
+    cache = _JobsCorpusCache(clock=_Clock())
+
+    assert ['1'] == [job_key.job_id for job_key in cache.get_corpus().job_keys]
+
+
+def test_delta_refresh_within_staleness_bound(fake_dynamodb, monkeypatch):
+    _backfilled(fake_dynamodb)
+    monkeypatch.setenv('JOBS_CORPUS_MAX_STALENESS_SECONDS', '10')
+    clock = _Clock()
+    fake_dynamodb.put('jobs', _job('1'))
+    fake_dynamodb.put('jobs', _job('2'))
+    cache = _JobsCorpusCache(clock=clock)
+    cache.get_corpus()
+
+    # only the jobs modified since the load are read by the delta query
+    for job in [_job('2', answer=False), _job('1', deleted=True), _job('3')]:
+        fake_dynamodb.put('jobs', dict(job, last_modified_time=now_timestamp()))
+    fake_dynamodb.put('jobs', _job('4'))
+    clock.now += 5
+    assert ['1', '2'] == [job_key.job_id for job_key in cache.get_corpus().job_keys]
+    assert 'Query' not in fake_dynamodb.requests
+
+    clock.now += 5
+    corpus = cache.get_corpus()
+    assert ['2', '3'] == [job_key.job_id for job_key in corpus.job_keys]
+    assert 0 == corpus.answers[0].bits
+    assert 1 == _full_loads(fake_dynamodb)
+    # one query of last-modified-index per sync key shard
+    assert len(build_jobs_sync_pks()) == fake_dynamodb.requests.count('Query')
+
+
+def test_full_reload_after_interval(fake_dynamodb, monkeypatch):
+    _backfilled(fake_dynamodb)
+    monkeypatch.setenv('JOBS_CORPUS_FULL_RELOAD_SECONDS', '60')
+    clock = _Clock()
+    fake_dynamodb.put('jobs', _job('1'))
+    cache = _JobsCorpusCache(clock=clock)
+    cache.get_corpus()
+
+    clock.now += 60
+    cache.get_corpus()
+    assert 2 == _full_loads(fake_dynamodb)
+
+
+def test_preload_runs_in_background(fake_dynamodb, monkeypatch):
+    _backfilled(fake_dynamodb)
+    monkeypatch.setenv('JOBS_CORPUS_PRELOAD', 'true')
+    fake_dynamodb.put('jobs', _job('1'))
+    cache = _JobsCorpusCache(clock=_Clock())
+    cache.preload()
+
+    assert ['1'] == [job_key.job_id for job_key in cache.get_corpus().job_keys]
+    assert 1 == _full_loads(fake_dynamodb)
+
+
+def test_jobs_missing_from_the_index_are_scanned_until_the_backfill(fake_dynamodb):
+    answers = [{'key': f'k{i}', 'question': 'q', 'answer': True} for i in range(10)]
+    # written before the packed answers and the index keys
+    fake_dynamodb.put('jobs', {'job_id': '1', 'employer_id': 'e', 'answers': answers})
+    fake_dynamodb.put('jobs', _job('2'))
+
+    assert ['1', '2'] == sorted(job_key.job_id for job_key in _JobsCorpusCache(clock=_Clock()).get_corpus().job_keys)
+
+    assert 1 == jobs_repository.backfill_match_attributes()
+    # read from the index now, a job written the old way again is not seen
+    fake_dynamodb.put('jobs', {'job_id': '3', 'employer_id': 'e', 'answers': answers})
+    corpus = _JobsCorpusCache(clock=_Clock()).get_corpus()
+    assert ['1', '2'] == sorted(job_key.job_id for job_key in corpus.job_keys)
+    assert {1023} == {job_answers.bits for job_answers in corpus.answers}
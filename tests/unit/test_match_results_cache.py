@@ -0,0 +1,102 @@
+import sys
+import os
+sys.path.append(os.getcwd())
+from typing import Dict
+
+import pytest
+
+import service.dao.match_results_cache
+from service.dao.match_results_cache import MatchResultsCache, MATCH_GENERATION_PK, ANSWERS_GENERATION, \
+    JOBS_GENERATION, bump_generation
+from service.dao.single_table_service import single_table_service
+from service.matching import AnswerVector, FULL_MASK
+
+
+@pytest.fixture
+def generations(monkeypatch) -> Dict:
+    # generation by corpus, read with the number of reads
+    counters = {'reads': 0}
+
+    def _find_by_pk_and_sk(pk, sk):
+        counters['reads'] += 1
+        return {'generation': counters[sk]} if pk == MATCH_GENERATION_PK and sk in counters else None
+
+    def _increment_counters(pk, sk, increments):
+        counters[sk] = counters.get(sk, 0) + increments['generation']
+
+    monkeypatch.setattr(single_table_service, 'find_by_pk_and_sk', _find_by_pk_and_sk)
+    monkeypatch.setattr(service.dao.match_results_cache.single_table_service, 'increment_counters',
+                        _increment_counters)
+    return counters
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _answers(bits: int) -> AnswerVector:
+    return AnswerVector(bits=bits, answered=FULL_MASK)
+
+
+def test_results_are_memoized_per_answers(generations):
+    cache = MatchResultsCache(ANSWERS_GENERATION)
+    computed = []
+
+    def _compute(bits):
+        computed.append(bits)
+        return [bits]
+
+    assert [1] == cache.get_or_compute(_answers(1), 10, lambda: _compute(1))
+    assert [1] == cache.get_or_compute(_answers(1), 10, lambda: _compute(1))
+    assert [2] == cache.get_or_compute(_answers(2), 10, lambda: _compute(2))
+    assert [1, 2] == computed
+    assert (1, 2) == (cache.hits, cache.misses)
+
+
+def test_generation_change_drops_all_results(generations):
+    clock = _Clock()
+    cache = MatchResultsCache(ANSWERS_GENERATION, clock=clock)
+    cache.get_or_compute(_answers(1), 10, lambda: [1])
+
+    generations[ANSWERS_GENERATION] = 1
+    # the generation read is reused for a second
+    assert [1] == cache.get_or_compute(_answers(1), 10, lambda: ['recomputed'])
+    clock.now += 1
+    assert ['recomputed'] == cache.get_or_compute(_answers(1), 10, lambda: ['recomputed'])
+    assert 2 == generations['reads']
+
+
+def test_own_writes_drop_only_the_results_over_the_written_corpus(generations):
+    answers_cache, jobs_cache = MatchResultsCache(ANSWERS_GENERATION), MatchResultsCache(JOBS_GENERATION)
+    answers_cache.get_or_compute(_answers(1), 10, lambda: [1])
+    jobs_cache.get_or_compute(_answers(1), 10, lambda: [1])
+
+    bump_generation(ANSWERS_GENERATION)
+
+    assert ['recomputed'] == answers_cache.get_or_compute(_answers(1), 10, lambda: ['recomputed'])
+    assert [1] == jobs_cache.get_or_compute(_answers(1), 10, lambda: ['recomputed'])
+    assert 3 == generations['reads']
+
+
+def test_least_recently_used_results_are_evicted(generations):
+    cache = MatchResultsCache(ANSWERS_GENERATION, max_entries=2)
+    cache.get_or_compute(_answers(1), 10, lambda: [1])
+    cache.get_or_compute(_answers(2), 10, lambda: [2])
+    cache.get_or_compute(_answers(1), 10, lambda: ['recomputed'])
+    cache.get_or_compute(_answers(3), 10, lambda: [3])
+
+    assert [1] == cache.get_or_compute(_answers(1), 10, lambda: ['recomputed'])
+    assert ['recomputed'] == cache.get_or_compute(_answers(2), 10, lambda: ['recomputed'])
+
+
+def test_results_expire(generations):
+    clock = _Clock()
+    cache = MatchResultsCache(ANSWERS_GENERATION, clock=clock)
+    cache.get_or_compute(_answers(1), 10, lambda: [1])
+
+    clock.now += 30
+    assert ['recomputed'] == cache.get_or_compute(_answers(1), 10, lambda: ['recomputed'])
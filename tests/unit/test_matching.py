@@ -0,0 +1,225 @@
+import sys
+import os
+sys.path.append(os.getcwd())
+import random
+from typing import List, Optional
+
+import pytest
+
+import service.dao.job_seeker_answers_repository
+import service.dao.jobs_corpus_cache
+import service.dao.jobs_repository
+import service.dao.match_results_cache
+import service.matching
+from service.dao.jobs_corpus_cache import _JobsCorpusCache, build_jobs_sync_pk
+from service.dao.model.job_seeker_answers import JobSeekerAnswers, JOB_SEEKER_ANSWERS_SHARDS
+from service.dao.job_seeker_answers_repository import job_seeker_answers_repository
+from service.dao.jobs_repository import jobs_repository
+from service.dao.match_results_cache import MatchResultsCache, ANSWERS_GENERATION, JOBS_GENERATION
+from service.dao.single_table_service import _SingleTableService, single_table_service
+from service.matching import NUM_OF_ANSWERS, AnswerVector, TopKCollector, build_answers_matrix, pack_answers, \
+    pack_job_answers, pack_seeker_answers, score, top_k
+
+
+def _reference_score(answers: List[Optional[bool]], candidate: List[Optional[bool]]) -> int:
+    # the kernel semantics spelled out: all NUM_OF_ANSWERS answers, an unanswered question never matches
+    return sum(answers[i] is not None and answers[i] == candidate[i] for i in range(NUM_OF_ANSWERS))
+
+
+def _baseline_score(answers: List[Optional[bool]], item: dict) -> int:
+    # the loop of find_best_match_answers before the kernel, verbatim: answers 1-9 only, missing == missing matches
+    score = 0
+    for i in range(1, 10):
+        score += (answers[i - 1] == item.get('a' + str(i)))
+    return score
+
+
+def _random_answers(rnd: random.Random, allow_missing: bool = False) -> List[Optional[bool]]:
+    choices = [True, False, None] if allow_missing else [True, False]
+    return [rnd.choice(choices) for _ in range(NUM_OF_ANSWERS)]
+
+
+@pytest.fixture(autouse=True)
+def _fresh_match_caches(monkeypatch):
+    # memoized results must not leak between tests
+    monkeypatch.setattr(service.dao.job_seeker_answers_repository, 'answers_match_cache',
+                        MatchResultsCache(ANSWERS_GENERATION))
+    monkeypatch.setattr(service.dao.jobs_repository, 'jobs_match_cache', MatchResultsCache(JOBS_GENERATION))
+
+
+def _seeker_item(job_seeker_id: str, answers: List[Optional[bool]]) -> dict:
+    item = {'job_seeker_id': job_seeker_id, 'job_seeker_name': f'name {job_seeker_id}'}
+    item.update({'a' + str(i + 1): answer for i, answer in enumerate(answers) if answer is not None})
+    return item
+
+
+def test_pack_answers():
+    packed = pack_answers([True, False, None, True, False, False, False, False, False, True])
+    assert 0b1000001001 == packed.bits
+    assert 0b1111111011 == packed.answered
+
+
+def test_pack_job_answers_requires_all_answers():
+    assert pack_job_answers(None) is None
+    assert pack_job_answers([{'answer': True}] * (NUM_OF_ANSWERS - 1)) is None
+    assert AnswerVector(bits=0b1111111111, answered=0b1111111111) == pack_job_answers([{'answer': True}] * 10)
+
+
+def test_score_matches_reference_semantics():
+    rnd = random.Random(7)
+    for _ in range(2000):
+        answers = _random_answers(rnd, allow_missing=True)
+        candidate = _random_answers(rnd, allow_missing=True)
+        assert _reference_score(answers, candidate) == score(pack_answers(answers), pack_answers(candidate))
+
+
+def test_score_differs_from_the_baseline_by_answer_10_and_the_unanswered_questions():
+    rnd = random.Random(5)
+    for _ in range(2000):
+        answers = _random_answers(rnd, allow_missing=True)
+        candidate = _random_answers(rnd, allow_missing=True)
+        both_unanswered = sum(answers[i] is None and candidate[i] is None for i in range(NUM_OF_ANSWERS - 1))
+        answer_10_matches = answers[-1] is not None and answers[-1] == candidate[-1]
+        assert _baseline_score(answers, _seeker_item('s', candidate)) - both_unanswered + answer_10_matches == \
+            score(pack_answers(answers), pack_answers(candidate))
+
+
+def test_find_best_match_answers_ranking_matches_reference(monkeypatch):
+    rnd = random.Random(11)
+    employer_answers = _random_answers(rnd)
+    seekers = [(str(i), _random_answers(rnd, allow_missing=True)) for i in range(300)]
+    monkeypatch.setattr(single_table_service, 'find_by_pk_and_sk', lambda pk, sk: None)
+    monkeypatch.setattr(single_table_service, 'batch_get_by_keys', lambda keys: [])
+    monkeypatch.setattr(single_table_service, 'iter_by_pk_and_sk_begins_with',
+                        lambda pk, sk_starts_with: iter([_seeker_item(seeker_id, answers)
+                                                         for seeker_id, answers in seekers
+                                                         if JobSeekerAnswers.build_pk(seeker_id) == pk]))
+
+    results = job_seeker_answers_repository.find_best_match_answers(pack_answers(employer_answers), max_results=50)
+
+    # ties are broken by answers partition, so only the scores are compared with a stable sort over all seekers
+    expected_scores = sorted((_reference_score(employer_answers, answers) for _, answers in seekers), reverse=True)[:50]
+    assert expected_scores == [result.score for result in results]
+    seeker_answers = dict(seekers)
+    assert all(_reference_score(employer_answers, seeker_answers[result.job_seeker_id]) == result.score
+               for result in results)
+
+
+def test_get_jobs_ranking_matches_reference(fake_dynamodb, monkeypatch):
+    rnd = random.Random(13)
+    seeker_answers = _random_answers(rnd)
+    jobs = [{'job_id': str(i), 'employer_id': 'e',
+             'answers': [{'key': f'k{j}', 'question': 'q', 'answer': answer}
+                         for j, answer in enumerate(_random_answers(rnd))]} for i in range(300)]
+    for job in jobs:
+        job_answers = pack_job_answers(job['answers'])
+        fake_dynamodb.put('jobs', dict(job, answer_bits=job_answers.bits, answered_mask=job_answers.answered,
+                                       sync_pk=build_jobs_sync_pk(job['job_id']), last_modified_time=1))
+    monkeypatch.setattr(service.dao.jobs_repository, 'jobs_corpus_cache', _JobsCorpusCache())
+    store = _SingleTableService()
+    monkeypatch.setattr(service.dao.match_results_cache, 'single_table_service', store)
+    monkeypatch.setattr(service.dao.jobs_corpus_cache, 'single_table_service', store)
+
+    results = jobs_repository.get_jobs(pack_answers(seeker_answers), 50)
+
+    # ties are in the corpus order, the order of the index scan
+    reference = {job['job_id']: _reference_score(seeker_answers, [a['answer'] for a in job['answers']]) for job in jobs}
+    assert sorted(reference.values(), reverse=True)[:50] == [result.score for result in results]
+    assert all(reference[result.employer_job.job_id] == result.score for result in results)
+    # the corpus is read from the index, the ranked jobs in one batch
+    assert 1 == fake_dynamodb.requests.count('BatchGetItem')
+
+
+def test_pack_seeker_answers_reads_a1_to_a10():
+    answers = [True, None, False, True, True, None, False, False, True, True]
+    assert pack_answers(answers) == pack_seeker_answers(_seeker_item('1', answers))
+
+
+def test_top_k_collector_keeps_what_a_stable_sort_keeps():
+    rnd = random.Random(17)
+    for max_results in [0, 1, 5, 50, 400]:
+        scores = [rnd.randint(0, NUM_OF_ANSWERS) for _ in range(300)]
+        collector = TopKCollector(max_results)
+        for index, item_score in enumerate(scores):
+            collector.add(item_score, index)
+
+        expected = sorted(enumerate(scores), key=lambda x: x[1], reverse=True)[:max_results]
+        assert [(item_score, index) for index, item_score in expected] == collector.results()
+        assert [scores.count(item_score) for item_score in range(NUM_OF_ANSWERS + 1)] == collector.score_counts
+
+
+def test_find_best_match_answers_stops_after_max_results_perfect_scores(monkeypatch):
+    answers = [True] * NUM_OF_ANSWERS
+    consumed = []
+
+    def _iter_seekers(pk, sk_starts_with):
+        for i in range(1000):
+            if JobSeekerAnswers.build_pk(str(i)) == pk:
+                consumed.append(i)
+                yield _seeker_item(str(i), answers)
+
+    monkeypatch.setattr(single_table_service, 'find_by_pk_and_sk', lambda pk, sk: None)
+    monkeypatch.setattr(single_table_service, 'batch_get_by_keys', lambda keys: [])
+    monkeypatch.setattr(single_table_service, 'iter_by_pk_and_sk_begins_with', _iter_seekers)
+
+    results = job_seeker_answers_repository.find_best_match_answers(pack_answers(answers), max_results=10)
+
+    assert 10 == len(results)
+    # every answers partition stops reading after max_results perfect scores
+    assert len(consumed) <= 10 * (JOB_SEEKER_ANSWERS_SHARDS + 1)
+
+
+def test_find_best_match_answers_reads_patterns_by_hamming_distance(monkeypatch):
+    rnd = random.Random(19)
+    employer_answers = _random_answers(rnd)
+    seekers = [(str(i), _random_answers(rnd, allow_missing=i % 10 == 0)) for i in range(2000)]
+    by_pattern = {}
+    for seeker_id, answers in seekers:
+        record = JobSeekerAnswers(**_seeker_item(seeker_id, answers))
+        by_pattern.setdefault(record.produce_gsi1_pk(), []).append(_seeker_item(seeker_id, answers))
+    pattern_counts = {gsi1_pk.split('#')[1]: len(items) for gsi1_pk, items in by_pattern.items()}
+    read_items = []
+
+    def _iter_pattern(gsi_1_pk, gsi1sk_starts_with=None, limit=None):
+        for item in by_pattern.get(gsi_1_pk, [])[:limit]:
+            read_items.append(item)
+            yield item
+
+    monkeypatch.setattr(single_table_service, 'find_by_pk_and_sk', lambda pk, sk: None)
+    # the counts spread over two stats shards, and the index built marker
+    shards = [dict(list(pattern_counts.items())[::2]), dict(list(pattern_counts.items())[1::2]), {'index_built': True}]
+    monkeypatch.setattr(single_table_service, 'batch_get_by_keys', lambda keys: shards)
+    monkeypatch.setattr(single_table_service, 'iter_by_gsi1pk_and_gsi1sk_begins_with', _iter_pattern)
+
+    results = job_seeker_answers_repository.find_best_match_answers(pack_answers(employer_answers), max_results=20)
+
+    expected_scores = sorted((_reference_score(employer_answers, answers) for _, answers in seekers), reverse=True)[:20]
+    assert expected_scores == [result.score for result in results]
+    seeker_answers = dict(seekers)
+    assert all(_reference_score(employer_answers, seeker_answers[result.job_seeker_id]) == result.score
+               for result in results)
+    # the partially answered records plus no more than max_results fully answered ones
+    assert len(read_items) <= len(by_pattern['ANSWER_PATTERN#PARTIAL']) + 20
+
+
+def test_vectorized_top_k_is_identical_to_the_loop():
+    pytest.importorskip("numpy")
+    rnd = random.Random(23)
+    candidates = [pack_answers(_random_answers(rnd, allow_missing=i % 7 == 0)) for i in range(3000)]
+    matrix = build_answers_matrix(candidates)
+    for max_results in [0, 1, 10, 100, 2999, 3000, 5000]:
+        query = pack_answers(_random_answers(rnd, allow_missing=max_results % 2 == 0))
+        assert top_k(query, candidates, max_results) == top_k(query, candidates, max_results, matrix)
+
+
+def test_loop_kernel_is_used_without_numpy(monkeypatch):
+    monkeypatch.setattr(service.matching, 'numpy', None)
+    rnd = random.Random(29)
+    candidates = [_random_answers(rnd, allow_missing=i % 7 == 0) for i in range(300)]
+    query = _random_answers(rnd)
+    packed = [pack_answers(candidate) for candidate in candidates]
+    assert build_answers_matrix(packed) is None
+    results = top_k(pack_answers(query), packed, 10)
+    assert sorted((_reference_score(query, candidate) for candidate in candidates), reverse=True)[:10] == \
+        [result_score for result_score, _ in results]
+    assert all(_reference_score(query, candidates[index]) == result_score for result_score, index in results)
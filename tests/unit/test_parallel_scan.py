@@ -0,0 +1,88 @@
+import sys
+import os
+sys.path.append(os.getcwd())
+import threading
+import time
+
+import pytest
+
+from service.dao.parallel_scan import parallel_scan
+
+
+class _SegmentedTable:
+    def __init__(self, items_count: int, page_size: int = 7, delay_seconds: float = 0, failing_segment: int = None):
+        self.items = [{'id': i} for i in range(items_count)]
+        self.page_size = page_size
+        self.delay_seconds = delay_seconds
+        self.failing_segment = failing_segment
+        self.calls = []
+        self.__lock = threading.Lock()
+
+    def scan(self, **kwargs):
+        with self.__lock:
+            self.calls.append(kwargs)
+        time.sleep(self.delay_seconds)
+        segment = kwargs.get('Segment', 0)
+        total_segments = kwargs.get('TotalSegments', 1)
+        if segment == self.failing_segment:
+            raise ValueError("segment failed")
+
+        segment_items = [item for item in self.items if item['id'] % total_segments == segment]
+        start = kwargs.get('ExclusiveStartKey', {}).get('index', 0)
+        page = segment_items[start:start + self.page_size]
+        response = {'Items': page}
+        if start + self.page_size < len(segment_items):
+            response['LastEvaluatedKey'] = {'index': start + self.page_size}
+        return response
+
+
+@pytest.mark.parametrize("total_segments", [1, 3, 8])
+def test_parallel_scan_yields_every_item_once(total_segments):
+    table = _SegmentedTable(100)
+
+    items = list(parallel_scan(lambda: table, total_segments=total_segments, FilterExpression="f"))
+
+    assert sorted(item['id'] for item in items) == list(range(100))
+    assert all(call['FilterExpression'] == "f" for call in table.calls)
+    if total_segments > 1:
+        assert {call['Segment'] for call in table.calls} == set(range(total_segments))
+
+
+def test_parallel_scan_segments_run_concurrently():
+    table = _SegmentedTable(40, page_size=10, delay_seconds=0.05)
+
+    start = time.perf_counter()
+    items = list(parallel_scan(lambda: table, total_segments=4))
+
+    assert 40 == len(items)
+    # 4 segments of one page each, scanned at the same time
+    assert time.perf_counter() - start < 4 * 0.05
+
+
+def test_parallel_scan_raises_segment_error():
+    table = _SegmentedTable(100, failing_segment=2)
+
+    with pytest.raises(ValueError):
+        list(parallel_scan(lambda: table, total_segments=4))
+
+
+def test_parallel_scan_segment_count_from_env(monkeypatch):
+    monkeypatch.setenv('DYNAMO_SCAN_SEGMENTS', '2')
+    table = _SegmentedTable(10)
+
+    list(parallel_scan(lambda: table))
+
+    assert {2} == {call['TotalSegments'] for call in table.calls}
+
+
+def test_parallel_scan_segments_scan_their_own_table():
+    tables = []
+
+    def _table_factory():
+        tables.append(_SegmentedTable(100))
+        return tables[-1]
+
+    list(parallel_scan(_table_factory, total_segments=4))
+
+    assert 4 == len(tables)
+    assert all(1 == len({call['Segment'] for call in table.calls}) for table in tables)
@@ -0,0 +1,197 @@
+import sys
+import os
+sys.path.append(os.getcwd())
+import copy
+import json
+from typing import Dict, Set, Tuple
+
+import pytest
+
+import service.dao.jobs_corpus_cache
+import service.dao.jobs_repository
+import service.dao.match_results_cache
+import service.dao.unit_of_work
+from service.common.exceptions import ConflictError, UnprocessedKeysError
+from service.dao.job_seeker_answers_repository import job_seeker_answers_repository
+from service.dao.job_seeker_experience_repository import job_seeker_experience_repository
+from service.dao.job_seeker_repository import job_seeker_repository
+from service.dao.model.experience import Experience
+from service.dao.model.job_seeker import JobSeeker
+from service.dao.model.job_seeker_answers import JobSeekerAnswers, ANSWER_PATTERN_STATS_PK, \
+    ANSWER_PATTERN_INDEX_BUILT_SK
+from service.dao.model.seeker_top_jobs import SeekerTopJobs
+from service.dao.seeker_cleanup_queue import seeker_cleanup_queue
+from service.dao.seeker_top_jobs_repository import seeker_top_jobs_repository
+from service.dao.single_table_service import _SingleTableService
+from service.matching import pack_answers
+from tests.helpers.fake_dynamodb import FakeDynamoDB
+
+_SEEKER_ID = 'seeker-1'
+_STATS_KEY = (JobSeekerAnswers.build_pattern_stats_pk(_SEEKER_ID), '#')
+
+
+@pytest.fixture
+def store(fake_dynamodb, monkeypatch) -> _SingleTableService:
+    single_table_service = _SingleTableService()
+    for module in [service.dao.jobs_corpus_cache, service.dao.jobs_repository, service.dao.match_results_cache,
+                   service.dao.unit_of_work]:
+        monkeypatch.setattr(module, 'single_table_service', single_table_service)
+    # the repositories keep the single table service they were built with
+    for repository in [job_seeker_repository, job_seeker_answers_repository, job_seeker_experience_repository,
+                       seeker_top_jobs_repository]:
+        monkeypatch.setattr(repository, f"_{type(repository).__name__.lstrip('_')}__single_table_service",
+                            single_table_service)
+    return single_table_service
+
+
+def _items(fake_dynamodb: FakeDynamoDB) -> Dict[Tuple[str, str], Dict]:
+    return fake_dynamodb.tables['seekers'].items
+
+
+def _pattern_counts(fake_dynamodb: FakeDynamoDB, key: Tuple[str, str]) -> Dict:
+    return {name: value for name, value in _items(fake_dynamodb)[key].items() if name not in ('pk', 'sk')}
+
+
+def _experience(experience_id: str) -> Experience:
+    return Experience(job_seeker_id=_SEEKER_ID, experience_id=experience_id, workplace_name='w', start_year=2020)
+
+
+def _write_legacy_seeker(store: _SingleTableService, fake_dynamodb: FakeDynamoDB) -> None:
+    store.create_item(JobSeeker(id=_SEEKER_ID, full_name='n', birth_date=1, address='a', email='e'))
+    store.create_item(_experience('x1'))
+    answers = JobSeekerAnswers(job_seeker_id=_SEEKER_ID, job_seeker_name='n', **{f'a{i}': True for i in range(1, 11)})
+    store.create_item(answers)
+    store.increment_counters(*_STATS_KEY, {answers.produce_pattern(): 1})
+    fake_dynamodb.put('seekers', {'pk': SeekerTopJobs.build_pk(_SEEKER_ID), 'sk': SeekerTopJobs.build_sk(),
+                                  'top_jobs': []})
+
+
+def test_summary_reads_the_legacy_places_until_migrated(monkeypatch, store, fake_dynamodb):
+    _write_legacy_seeker(store, fake_dynamodb)
+    legacy = job_seeker_repository.get_summary(_SEEKER_ID)
+
+    monkeypatch.setenv('SEEKER_SCHEMA_MODE', 'dual')
+    job_seeker_experience_repository.create(_experience('x2'))
+    dual = job_seeker_repository.get_summary(_SEEKER_ID)
+    assert ['x1'] == [experience.experience_id for experience in legacy.experiences]
+    assert ['x2', 'x1'] == [experience.experience_id for experience in dual.experiences]
+    assert legacy.answers == dual.answers
+
+    assert {'experiences': 1, 'answers': 1} == job_seeker_repository.migrate_to_item_collections()
+    assert {JobSeeker.build_pk(_SEEKER_ID)} == {pk for pk, _ in _items(fake_dynamodb)
+                                                if not pk.startswith(ANSWER_PATTERN_STATS_PK)}
+
+    monkeypatch.setenv('SEEKER_SCHEMA_MODE', 'collection')
+    fake_dynamodb.requests.clear()
+    summary = job_seeker_repository.get_summary(_SEEKER_ID)
+    assert ['Query'] == fake_dynamodb.requests
+    assert ['x1', 'x2'] == [experience.experience_id for experience in summary.experiences]
+    # the migration writes the records, the always empty createdBy/lastUpdatedBy of the legacy items are not kept
+    assert JobSeekerAnswers(**dual.answers) == JobSeekerAnswers(**summary.answers)
+    assert dual.profile == summary.profile
+
+
+def test_delete_removes_the_whole_collection(monkeypatch, store, fake_dynamodb):
+    _write_legacy_seeker(store, fake_dynamodb)
+    monkeypatch.setenv('SEEKER_SCHEMA_MODE', 'dual')
+    job_seeker_experience_repository.create(_experience('x2'))
+
+    job_seeker_repository.delete(_SEEKER_ID)
+
+    assert [0] == list(_pattern_counts(fake_dynamodb, _STATS_KEY).values())
+    assert {_STATS_KEY, ('MATCH_GENERATION', 'answers')} == set(_items(fake_dynamodb))
+
+
+def _remaining_records(fake_dynamodb: FakeDynamoDB) -> Set[Tuple[str, str]]:
+    return {key for key in _items(fake_dynamodb)
+            if not key[0].startswith((ANSWER_PATTERN_STATS_PK, 'MATCH_GENERATION'))}
+
+
+def test_legacy_delete_removes_every_record_in_one_batch(store, fake_dynamodb):
+    _write_legacy_seeker(store, fake_dynamodb)
+    store.create_item(_experience('x2'))
+    fake_dynamodb.requests.clear()
+
+    job_seeker_repository.delete(_SEEKER_ID)
+
+    assert set() == _remaining_records(fake_dynamodb)
+    assert 1 == fake_dynamodb.requests.count('BatchWriteItem')
+    assert [0] == list(_pattern_counts(fake_dynamodb, _STATS_KEY).values())
+
+
+def test_delete_can_run_again_after_a_partial_failure(monkeypatch, store, fake_dynamodb):
+    _write_legacy_seeker(store, fake_dynamodb)
+    experience_key = (_experience('x1').produce_pk(), _experience('x1').produce_sk())
+    remove_items_by_keys = store.remove_items_by_keys
+
+    def _remove_all_but_the_experience(keys):
+        remove_items_by_keys([key for key in keys if key != experience_key])
+        raise UnprocessedKeysError('seekers', [experience_key])
+
+    monkeypatch.setattr(store, 'remove_items_by_keys', _remove_all_but_the_experience)
+    with pytest.raises(UnprocessedKeysError):
+        job_seeker_repository.delete(_SEEKER_ID)
+    assert {experience_key} == _remaining_records(fake_dynamodb)
+
+    monkeypatch.setattr(store, 'remove_items_by_keys', remove_items_by_keys)
+    job_seeker_repository.delete(_SEEKER_ID)
+    assert set() == _remaining_records(fake_dynamodb)
+    # the answers record is counted out once
+    assert [0] == list(_pattern_counts(fake_dynamodb, _STATS_KEY).values())
+
+
+def test_cleanup_queue_removes_the_seeker_records(store, fake_dynamodb):
+    _write_legacy_seeker(store, fake_dynamodb)
+
+    seeker_cleanup_queue.enqueue(_SEEKER_ID)
+    seeker_cleanup_queue.drain()
+    assert set() == _remaining_records(fake_dynamodb)
+
+    response = seeker_cleanup_queue.consume({'Records': [
+        {'messageId': 'm1', 'body': json.dumps({'job_seeker_id': _SEEKER_ID})},
+        {'messageId': 'm2', 'body': '{}'}]})
+    assert {'batchItemFailures': [{'itemIdentifier': 'm2'}]} == response
+
+
+def test_cleanup_queue_removes_the_records_synchronously_in_a_lambda_without_a_queue(monkeypatch, store,
+                                                                                     fake_dynamodb):
+    _write_legacy_seeker(store, fake_dynamodb)
+    monkeypatch.setenv('AWS_LAMBDA_FUNCTION_NAME', 'jobli-seekers')
+
+    seeker_cleanup_queue.enqueue(_SEEKER_ID)
+
+    assert set() == _remaining_records(fake_dynamodb)
+
+
+def test_answering_again_is_rejected_while_the_record_is_in_its_legacy_place(monkeypatch, store, fake_dynamodb):
+    _write_legacy_seeker(store, fake_dynamodb)
+    monkeypatch.setenv('SEEKER_SCHEMA_MODE', 'dual')
+    items = copy.deepcopy(_items(fake_dynamodb))
+
+    with pytest.raises(ConflictError):
+        job_seeker_answers_repository.create(JobSeekerAnswers(job_seeker_id=_SEEKER_ID, job_seeker_name='n',
+                                                              **{f'a{i}': False for i in range(1, 11)}))
+
+    assert items == _items(fake_dynamodb)
+
+
+def test_the_pattern_index_is_read_once_the_rebuild_marked_it_built(monkeypatch, store, fake_dynamodb):
+    _write_legacy_seeker(store, fake_dynamodb)
+    pattern_queries = []
+    iter_by_gsi1 = store.iter_by_gsi1pk_and_gsi1sk_begins_with
+    monkeypatch.setattr(store, 'iter_by_gsi1pk_and_gsi1sk_begins_with',
+                        lambda *args, **kwargs: pattern_queries.append(args) or iter_by_gsi1(*args, **kwargs))
+
+    assert 1 == len(job_seeker_answers_repository.find_best_match_answers(pack_answers([True] * 10)))
+    assert [] == pattern_queries
+
+    fake_dynamodb.put('seekers', {'pk': ANSWER_PATTERN_STATS_PK, 'sk': '#', 'stale': 3})
+    assert {JobSeekerAnswers(**job_seeker_answers_repository.get_by_seeker_id(_SEEKER_ID)).produce_pattern(): 1} == \
+        job_seeker_answers_repository.rebuild_answer_pattern_index()
+    assert (ANSWER_PATTERN_STATS_PK, '#') not in _items(fake_dynamodb)
+    assert {'index_built': True} == _pattern_counts(fake_dynamodb,
+                                                    (ANSWER_PATTERN_STATS_PK, ANSWER_PATTERN_INDEX_BUILT_SK))
+    assert 8 == len([pk for pk, _ in _items(fake_dynamodb) if pk.startswith(ANSWER_PATTERN_STATS_PK + '#')])
+
+    assert 1 == len(job_seeker_answers_repository.find_best_match_answers(pack_answers([False] * 10)))
+    assert pattern_queries
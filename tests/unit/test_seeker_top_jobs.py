@@ -0,0 +1,135 @@
+import sys
+import os
+sys.path.append(os.getcwd())
+import random
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from aws_lambda_context import LambdaContext
+
+import service.lambdas.employer.process_jobs_stream
+from service.common.dynamo_stream import INSERT_EVENT, MODIFY_EVENT, REMOVE_EVENT, build_stream_record
+from service.dao.model.seeker_top_jobs import SeekerTopJobs, TopJob
+from service.lambdas.employer.process_jobs_stream import process_jobs_stream
+from service.matching import AnswerVector, FULL_MASK, score
+
+
+def _random_vector(rnd: random.Random) -> AnswerVector:
+    return AnswerVector(bits=rnd.getrandbits(10), answered=FULL_MASK)
+
+
+def _top_jobs(seeker: AnswerVector, jobs: Dict[str, AnswerVector], max_results: int,
+              job_seeker_id: str = 's') -> SeekerTopJobs:
+    ranking = sorted(((score(seeker, job_answers), job_id) for job_id, job_answers in jobs.items()),
+                     key=lambda x: x[0], reverse=True)[:max_results]
+    top_jobs = SeekerTopJobs(job_seeker_id=job_seeker_id, answer_bits=seeker.bits, answered_mask=seeker.answered,
+                             max_results=max_results,
+                             top_jobs=[TopJob(job_id=job_id, score=item_score) for item_score, job_id in ranking],
+                             exhaustive=len(ranking) < max_results, computed_time=Decimal(0),
+                             top_jobs_shard=SeekerTopJobs.build_index_pk(job_seeker_id))
+    top_jobs.top_jobs_cutoff = top_jobs.cutoff()
+    return top_jobs
+
+
+def test_apply_job_keeps_the_top_jobs_of_a_full_recompute():
+    rnd = random.Random(8)
+    seeker = _random_vector(rnd)
+    for max_results in (5, 60):
+        jobs = {str(i): _random_vector(rnd) for i in range(40)}
+        top_jobs = _top_jobs(seeker, jobs, max_results)
+        for change in range(500):
+            job_id = str(rnd.randrange(50))
+            if rnd.random() < 0.3:
+                jobs.pop(job_id, None)
+            else:
+                jobs[job_id] = _random_vector(rnd)
+            job_score = score(seeker, jobs[job_id]) if job_id in jobs else None
+            top_jobs.apply_job(job_id, job_score)
+
+            assert top_jobs.cutoff() == top_jobs.top_jobs_cutoff
+            if not top_jobs.complete:
+                top_jobs = _top_jobs(seeker, jobs, max_results)
+                continue
+            expected = _top_jobs(seeker, jobs, max_results)
+            # ties may be listed in another order, or with another job of the same score at the bottom
+            assert [top_job.score for top_job in expected.top_jobs] == [top_job.score for top_job in top_jobs.top_jobs]
+            assert all(score(seeker, jobs[top_job.job_id]) == top_job.score for top_job in top_jobs.top_jobs)
+
+
+class _FakeTopJobsStore:
+    def __init__(self, items: List[SeekerTopJobs]):
+        self.items = {item.job_seeker_id: item.dict() for item in items}
+        self.reads: List[str] = []
+        self.updates = 0
+
+    def iter_by_index_pk(self, index_name, pk_attribute, pk, projection=None):
+        assert 'top-jobs-index' == index_name
+        yield from ({name: item[name] for name in projection} for item in self.items.values()
+                    if item[pk_attribute] == pk)
+
+    def find_by_pk_and_sk(self, pk, sk):
+        job_seeker_id = pk.split('#')[1]
+        self.reads.append(job_seeker_id)
+        return dict(self.items[job_seeker_id])
+
+    def update_item(self, record, user=None):
+        self.items[record.job_seeker_id] = record.dict()
+        self.updates += 1
+
+
+def _job_item(job_id: str, answers: Optional[AnswerVector], **kwargs) -> Dict:
+    item = {'job_id': job_id, 'employer_id': 'e'}
+    if answers is not None:
+        item.update(answer_bits=answers.bits, answered_mask=answers.answered)
+    item.update(kwargs)
+    return item
+
+
+def _lambda_context() -> LambdaContext:
+    context = LambdaContext()
+    context.function_name = 'ProcessJobsStream'
+    context.memory_limit_in_mb = 128
+    context.invoked_function_arn = 'arn:aws:lambda:us-east-1:123456789012:function:ProcessJobsStream'
+    context.aws_request_id = 'request'
+    return context
+
+
+def test_process_jobs_stream_applies_synthetic_records(monkeypatch):
+    seeker = AnswerVector(bits=0, answered=FULL_MASK)
+    perfect = AnswerVector(bits=0, answered=FULL_MASK)
+    worst = AnswerVector(bits=FULL_MASK, answered=FULL_MASK)
+    store = _FakeTopJobsStore([_top_jobs(seeker, {'1': worst}, 3)])
+    seeker_top_jobs_repository = service.lambdas.employer.process_jobs_stream.seeker_top_jobs_repository
+    monkeypatch.setattr(seeker_top_jobs_repository, '_SeekerTopJobsRepository__single_table_service', store)
+
+    event = {'Records': [
+        build_stream_record(INSERT_EVENT, {'job_id': '2'}, new_item=_job_item('2', perfect)),
+        # not an answers change
+        build_stream_record(MODIFY_EVENT, {'job_id': '2'}, new_item=_job_item('2', perfect, job_name='x'),
+                            old_item=_job_item('2', perfect)),
+        build_stream_record(MODIFY_EVENT, {'job_id': '1'}, new_item=_job_item('1', None, deleted=True),
+                            old_item=_job_item('1', worst)),
+        build_stream_record(REMOVE_EVENT, {'job_id': '3'}, old_item=_job_item('3', perfect)),
+    ]}
+    assert {'applied': 3} == process_jobs_stream(event, _lambda_context())
+
+    assert [{'job_id': '2', 'score': 10}] == store.items['s']['top_jobs']
+    assert 2 == store.updates
+
+
+def test_only_the_materializations_a_job_may_enter_or_leave_are_read(monkeypatch):
+    seeker = AnswerVector(bits=0, answered=FULL_MASK)
+    perfect = AnswerVector(bits=0, answered=FULL_MASK)
+    half = AnswerVector(bits=0b11111, answered=FULL_MASK)
+    # full lists, with a cutoff of 10 and 5
+    store = _FakeTopJobsStore([_top_jobs(seeker, {'1': perfect}, 1, job_seeker_id='high'),
+                               _top_jobs(seeker, {'1': half}, 1, job_seeker_id='low')])
+    seeker_top_jobs_repository = service.lambdas.employer.process_jobs_stream.seeker_top_jobs_repository
+    monkeypatch.setattr(seeker_top_jobs_repository, '_SeekerTopJobsRepository__single_table_service', store)
+
+    # scores 5 before and 10 after the change: only the list with the lower cutoff may change
+    seeker_top_jobs_repository.apply_job_change('2', perfect, half)
+
+    assert ['low'] == store.reads
+    assert [{'job_id': '2', 'score': 10}] == store.items['low']['top_jobs']
+    assert 10 == store.items['low']['top_jobs_cutoff']
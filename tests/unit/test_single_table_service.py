@@ -0,0 +1,64 @@
+import sys
+import os
+sys.path.append(os.getcwd())
+from boto3.dynamodb.conditions import Attr
+
+from service.dao.model.job_seeker import JobSeeker
+from service.dao.single_table_service import _SingleTableService
+from tests.helpers.fake_dynamodb import FakeDynamoDB
+
+
+def _seed(fake_dynamodb: FakeDynamoDB) -> None:
+    # about 100 KB each, the 1 MB query and scan pages hold 11 items
+    for i in range(25):
+        fake_dynamodb.put('seekers', {'pk': 'P', 'sk': f'S#{i:02d}', 'gsi1Pk': 'G', 'gsi1Sk': f'{i:02d}', 'value': i,
+                                      'padding': 'x' * 100_000})
+
+
+def test_list_finders_collect_every_page(fake_dynamodb):
+    _seed(fake_dynamodb)
+    single_table_service = _SingleTableService()
+
+    assert list(range(25)) == [item['value'] for item in single_table_service.find_by_pk_and_sk_begins_with('P', 'S')]
+    assert list(range(25)) == [item['value'] for item in
+                               single_table_service.find_all_by_gsi1pk_and_gsi1sk_begins_with('G', None)]
+    assert list(range(25)) == sorted(item['value'] for item in single_table_service.find_all_by_pk_starts_with('P'))
+    assert list(range(25)) == sorted(item['value'] for item in
+                                     single_table_service.scan_by_filter(Attr('value').gte(0)))
+    assert 6 == fake_dynamodb.requests.count('Query')
+    # the single table index attributes are not returned
+    assert {'value', 'padding'} == set(single_table_service.find_all_by_pk_starts_with('P')[0])
+
+
+def test_iterators_read_no_more_pages_than_needed(fake_dynamodb):
+    _seed(fake_dynamodb)
+    single_table_service = _SingleTableService()
+
+    assert list(range(12)) == [item['value'] for item in
+                               single_table_service.iter_by_pk_and_sk_begins_with('P', 'S', limit=12)]
+    # a full page, then a page of the one item left
+    assert 2 == fake_dynamodb.requests.count('Query')
+
+    iterator = single_table_service.iter_by_gsi1pk_and_gsi1sk_begins_with('G')
+    assert [0, 1] == [next(iterator)['value'] for _ in range(2)]
+    assert 3 == fake_dynamodb.requests.count('Query')
+
+    assert 3 == len(list(single_table_service.iter_by_filter(Attr('value').gte(0), limit=3)))
+
+
+def test_update_writes_only_the_changed_attributes(fake_dynamodb):
+    single_table_service = _SingleTableService()
+    stored = dict(pk='JOB_SEEKER#s1', sk='#', id='s1', full_name='n', birth_date=1, address='a', email='e',
+                  about_me='rewritten meanwhile', version=3, creationTime='t')
+    fake_dynamodb.put('seekers', stored)
+    job_seeker = JobSeeker.from_item(dict(stored, about_me='a long text'))
+
+    job_seeker.languages = ['he']
+    single_table_service.update_item(job_seeker)
+
+    item = fake_dynamodb.tables['seekers'].items[('JOB_SEEKER#s1', '#')]
+    assert ['he'] == item['languages'] and 4 == item['version']
+    assert 'rewritten meanwhile' == item['about_me']
+    assert {'lastUpdateTime', 'lastUpdatedBy'} <= set(item)
+    assert 4 == job_seeker.version
+    assert set() == job_seeker.changed_fields()
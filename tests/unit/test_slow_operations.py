@@ -0,0 +1,72 @@
+import sys
+import os
+sys.path.append(os.getcwd())
+
+import boto3
+import pytest
+from boto3.dynamodb.conditions import Key
+from botocore.stub import Stubber
+
+import service.dao.slow_operations
+from service.dao.capacity_metrics import capacity_metrics
+from service.dao.slow_operations import fingerprint
+
+
+@pytest.fixture
+def jobs_table():
+    capacity_metrics.install()
+    capacity_metrics.flush()
+    table = boto3.resource('dynamodb', region_name='us-east-1').Table('jobs')
+    with Stubber(table.meta.client) as stubber:
+        yield table, stubber
+
+
+def test_fingerprints_are_free_of_parameters():
+    assert "Query seekers[GSI1] key gsi1Pk = ? AND begins_with(gsi1Sk, ?)" == fingerprint(
+        'Query', 'seekers', {'IndexName': 'GSI1', 'KeyConditionExpression': '#n0 = :v0 AND begins_with(#n1, :v1)',
+                             'ExpressionAttributeNames': {'#n0': 'gsi1Pk', '#n1': 'gsi1Sk'},
+                             'ExpressionAttributeValues': {':v0': {'S': 'a'}, ':v1': {'S': 'b'}}})
+    assert "GetItem jobs[-] key job_id" == fingerprint('GetItem', 'jobs', {'Key': {'job_id': {'S': '1'}}})
+    assert "Scan jobs[-] segments 4 full" == fingerprint('Scan', 'jobs', {'Segment': 0, 'TotalSegments': 4})
+
+
+def test_a_scan_over_the_page_budget_is_logged_with_its_fingerprint(jobs_table, monkeypatch):
+    table, stubber = jobs_table
+    monkeypatch.setenv('SLOW_OP_MAX_PAGES', '2')
+    for page in range(3):
+        stubber.add_response('scan', {'Items': [{'job_id': {'S': str(page)}}], 'Count': 1, 'ScannedCount': 40,
+                                      'ConsumedCapacity': {'TableName': 'jobs', 'CapacityUnits': 1.0},
+                                      **({'LastEvaluatedKey': {'job_id': {'S': str(page)}}} if page < 2 else {})})
+    warnings = []
+    monkeypatch.setattr(service.dao.slow_operations.logger, 'warning', warnings.append)
+
+    @capacity_metrics.track_invocation
+    def get_employer_jobs(event, context):
+        args = {'FilterExpression': Key('employer_id').eq('e1')}
+        while True:
+            page = table.scan(**args)
+            if 'LastEvaluatedKey' not in page:
+                return {}
+            args['ExclusiveStartKey'] = page['LastEvaluatedKey']
+
+    get_employer_jobs({}, None)
+
+    assert ["Slow DynamoDB operation 'Scan jobs[-] filter employer_id = ?' in 'get_employer_jobs': '3' pages"] == \
+           [warning.split(", '")[0] for warning in warnings]
+    assert "'120' items scanned for '3' returned" in warnings[0]
+
+
+def test_calls_within_the_budgets_are_not_logged(jobs_table, monkeypatch):
+    table, stubber = jobs_table
+    stubber.add_response('get_item', {'Item': {'job_id': {'S': '1'}},
+                                      'ConsumedCapacity': {'TableName': 'jobs', 'CapacityUnits': 0.5}})
+    warnings = []
+    monkeypatch.setattr(service.dao.slow_operations.logger, 'warning', warnings.append)
+
+    @capacity_metrics.track_invocation
+    def get_employer_job_by_id(event, context):
+        return table.get_item(Key={'job_id': '1'})
+
+    get_employer_job_by_id({}, None)
+
+    assert [] == warnings
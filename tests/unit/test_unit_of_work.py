@@ -0,0 +1,77 @@
+import sys
+import os
+sys.path.append(os.getcwd())
+
+from typing import Dict, Optional
+
+import pytest
+from botocore.exceptions import ClientError
+
+import service.dao.unit_of_work
+from service.dao.model.job_seeker import JobSeeker
+from service.dao.single_table_service import _SingleTableService
+from service.dao.unit_of_work import unit_of_work
+from tests.helpers.fake_dynamodb import FakeDynamoDB
+
+
+@pytest.fixture
+def store(fake_dynamodb, monkeypatch) -> _SingleTableService:
+    fake_dynamodb.put('seekers', dict(pk=JobSeeker.build_pk('s1'), sk=JobSeeker.build_sk(), id='s1', full_name='n',
+                                      birth_date=1, address='a', email='e', version=3, creationTime='t'))
+    single_table_service = _SingleTableService()
+    monkeypatch.setattr(service.dao.unit_of_work, 'single_table_service', single_table_service)
+    return single_table_service
+
+
+def _item(fake_dynamodb: FakeDynamoDB, pk: str, sk: str) -> Optional[Dict]:
+    return fake_dynamodb.tables['seekers'].items.get((pk, sk))
+
+
+def test_items_are_read_once_and_writes_flushed_in_one_transaction(store, fake_dynamodb):
+    pk, sk = JobSeeker.build_pk('s1'), JobSeeker.build_sk()
+
+    with unit_of_work():
+        job_seeker = JobSeeker(**store.find_by_pk_and_sk(pk, sk))
+        job_seeker.languages = ['he']
+        store.update_item(job_seeker)
+        # the written record is read back from the unit of work
+        assert ['he'] == store.find_by_pk_and_sk(pk, sk)['languages']
+        assert 4 == store.find_by_pk_and_sk(pk, sk)['version']
+        store.increment_counters('STATS', '#', {'a': 1})
+        assert ['GetItem'] == fake_dynamodb.requests
+
+    assert ['GetItem', 'TransactWriteItems'] == fake_dynamodb.requests
+    assert (['he'], 4) == (_item(fake_dynamodb, pk, sk)['languages'], _item(fake_dynamodb, pk, sk)['version'])
+    assert 1 == _item(fake_dynamodb, 'STATS', '#')['a']
+
+
+def test_an_item_is_written_once_per_transaction(store, fake_dynamodb):
+    with unit_of_work():
+        store.create_item(JobSeeker(id='s2', full_name='n', birth_date=1, address='a', email='e'))
+        with unit_of_work():
+            # takes part in the enclosing unit of work
+            store.increment_counters('STATS', '#', {'a': 1})
+            store.increment_counters('STATS', '#', {'a': 1})
+        assert ['TransactWriteItems'] == fake_dynamodb.requests
+
+    # the single write left is a plain write
+    assert ['TransactWriteItems', 'UpdateItem'] == fake_dynamodb.requests
+    assert 2 == _item(fake_dynamodb, 'STATS', '#')['a']
+    assert _item(fake_dynamodb, JobSeeker.build_pk('s2'), JobSeeker.build_sk()) is not None
+
+
+def test_a_failed_condition_is_reported_like_a_plain_write(store, fake_dynamodb):
+    with pytest.raises(ClientError) as error:
+        with unit_of_work():
+            store.create_item(JobSeeker(id='s1', full_name='n', birth_date=1, address='a', email='e'))
+            store.increment_counters('STATS', '#', {'a': 1})
+    assert 'ConditionalCheckFailedException' == error.value.response['Error']['Code']
+    assert _item(fake_dynamodb, 'STATS', '#') is None
+
+
+def test_writes_are_dropped_when_the_block_raises(store, fake_dynamodb):
+    with pytest.raises(ValueError):
+        with unit_of_work():
+            store.increment_counters('STATS', '#', {'a': 1})
+            raise ValueError()
+    assert [] == fake_dynamodb.requests
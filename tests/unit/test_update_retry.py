@@ -0,0 +1,62 @@
+import sys
+import os
+sys.path.append(os.getcwd())
+
+import pytest
+from botocore.exceptions import ClientError
+
+import service.dao.update_retry
+from service.common.exceptions import ConflictError
+from service.dao.update_retry import _UpdateRetry, MAX_UPDATE_ATTEMPTS
+
+
+def _conflicting_save(conflicts: int):
+    saved = []
+
+    def _save(record: dict) -> None:
+        if len(saved) < conflicts:
+            saved.append(None)
+            raise ClientError({'Error': {'Code': 'ConditionalCheckFailedException'}}, 'PutItem')
+        saved.append(record)
+
+    return _save, saved
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(service.dao.update_retry.time, 'sleep', lambda seconds: None)
+
+
+def test_the_mutation_is_applied_again_on_a_fresh_read():
+    update_retry = _UpdateRetry()
+    reads = []
+    save, saved = _conflicting_save(conflicts=2)
+
+    def _load() -> dict:
+        reads.append(len(reads))
+        return {'version': len(reads)}
+
+    record = update_retry.run(_load, lambda loaded: loaded.update(languages=['he']), save, 'seeker')
+
+    assert {'version': 3, 'languages': ['he']} == record == saved[-1]
+    assert (2, 1, 0) == (update_retry.conflicts, update_retry.retried_updates, update_retry.failed_updates)
+
+
+def test_gives_up_after_too_many_conflicts():
+    update_retry = _UpdateRetry()
+    save, _ = _conflicting_save(conflicts=MAX_UPDATE_ATTEMPTS)
+
+    with pytest.raises(ConflictError):
+        update_retry.run(dict, lambda loaded: None, save, 'seeker')
+    assert (MAX_UPDATE_ATTEMPTS, 0, 1) == (update_retry.conflicts, update_retry.retried_updates,
+                                           update_retry.failed_updates)
+
+
+def test_other_errors_are_not_retried():
+    def _save(record: dict) -> None:
+        raise ClientError({'Error': {'Code': 'ProvisionedThroughputExceededException'}}, 'PutItem')
+
+    update_retry = _UpdateRetry()
+    with pytest.raises(ClientError):
+        update_retry.run(dict, lambda loaded: None, _save, 'seeker')
+    assert 0 == update_retry.conflicts